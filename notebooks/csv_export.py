@@ -1,6 +1,9 @@
+import numpy as np
 import pandas as pd
 import os
 import argparse
+import mlflow
+from effects_of_noise_in_qfm.helpers.coefficients import FrequencyGrid
 from helper import (
     get_coeffs_df,
     run_ids_from_experiment_id,
@@ -23,6 +26,32 @@ id_expr_file = f"{CSV_DESTINATION}/expr_ids.csv"
 id_training_file = f"{CSV_DESTINATION}/training_ids.csv"
 
 
+def _frequency_axis(frequencies, n_dims):
+    # frequencies of the first input dimension of a grid of frequency vectors
+    return tuple(np.asarray(frequencies)[(slice(None),) + (0,) * n_dims])
+
+
+def _frequency_columns(coeffs_df, n_dims):
+    """
+    Adds the frequencies freq1, ... of the exploded coefficients, looked up
+    by their grid indices coeff0_idx, ... in the frequency grid of each run
+    instead of exploding the nested frequency vectors.
+    """
+    columns = [f"freq{d + 1}" for d in range(n_dims)]
+    for axis, rows in coeffs_df.groupby("frequency_axis").groups.items():
+        grid = FrequencyGrid(np.array(axis), n_dims)
+        index = tuple(
+            coeffs_df.loc[rows, f"coeff{d}_idx"].to_numpy(dtype=int)
+            for d in range(n_dims)
+        )
+        coeffs_df.loc[rows, columns] = grid.vectors[index]
+    return coeffs_df.drop(columns=["frequency_axis"])
+
+
+def _input_dims(coeffs_df):
+    return sorted(int(n) for n in coeffs_df["n_input_feat"].unique())
+
+
 def export_encoding_coeff_data(
     export_full=True,
     export_qubits=[2, 3, 4, 5, 6],
@@ -68,13 +97,21 @@ def export_encoding_coeff_data(
         "coeffs_full_imag",
     ]
 
-    for n_dims in range(1, 3):
+    for n_dims in _input_dims(all_coeffs_df):
         coeffs_df = all_coeffs_df[all_coeffs_df["n_input_feat"] == n_dims]
         if coeffs_df.size == 0:
             continue
 
+        cols = array_columns + big_array_columns if export_full else array_columns
+        if n_dims > 1:
+            # the frequencies are looked up after exploding the coefficients
+            coeffs_df["frequency_axis"] = coeffs_df["frequencies"].map(
+                lambda f: _frequency_axis(f, n_dims)
+            )
+            coeffs_df = coeffs_df.drop(columns=["frequencies"])
+            cols = [c for c in cols if c != "frequencies"]
+
         for d in range(n_dims):
-            cols = array_columns + big_array_columns if export_full else array_columns
             for ac in cols:
                 coeffs_df[ac] = coeffs_df[ac].apply(list)
 
@@ -82,10 +119,11 @@ def export_encoding_coeff_data(
             coeffs_df = coeffs_df.explode(cols, ignore_index=True)
             coeffs_df[f"coeff{d}_idx"] = coeffs_df.groupby("original_idx").cumcount()
 
-        coeffs_df[[f"freq{d + 1}" for d in range(n_dims)]] = pd.DataFrame(
-            coeffs_df["frequencies"].to_list(), index=coeffs_df.index
-        )
-        coeffs_df = coeffs_df.drop(columns=["frequencies"])
+        if n_dims > 1:
+            coeffs_df = _frequency_columns(coeffs_df, n_dims)
+        else:
+            coeffs_df["freq1"] = coeffs_df["frequencies"]
+            coeffs_df = coeffs_df.drop(columns=["frequencies"])
 
         if export_full:
             for ac in big_array_columns:
@@ -197,31 +235,40 @@ def export_coeff_data(
     ]
     cols = array_columns + big_array_columns if export_full else array_columns
 
-    for n_dims in range(1, 3):
+    for n_dims in _input_dims(all_coeffs_df):
         coeffs_df = all_coeffs_df[all_coeffs_df["n_input_feat"] == n_dims]
         if coeffs_df.size == 0:
             continue
 
-        if n_dims == 2:
+        dim_cols = cols
+        if n_dims > 1:
             for ac in cols:
                 coeffs_df = coeffs_df.drop(
                     coeffs_df[coeffs_df[ac].map(lambda x: len(x.shape)) == 0].index
                 )
                 coeffs_df.reset_index()
 
+            # the frequencies are looked up after exploding the coefficients
+            coeffs_df["frequency_axis"] = coeffs_df["frequencies"].map(
+                lambda f: _frequency_axis(f, n_dims)
+            )
+            coeffs_df = coeffs_df.drop(columns=["frequencies"])
+            dim_cols = [c for c in cols if c != "frequencies"]
+
         for d in range(n_dims):
             coeffs_df["original_idx"] = coeffs_df.index
 
-            for ac in cols:
+            for ac in dim_cols:
                 coeffs_df[ac] = coeffs_df[ac].apply(list)
 
-            coeffs_df = coeffs_df.explode(cols, ignore_index=True)
+            coeffs_df = coeffs_df.explode(dim_cols, ignore_index=True)
             coeffs_df[f"coeff{d}_idx"] = coeffs_df.groupby("original_idx").cumcount()
 
-        coeffs_df[[f"freq{d + 1}" for d in range(n_dims)]] = pd.DataFrame(
-            coeffs_df["frequencies"].to_list(), index=coeffs_df.index
-        )
-        coeffs_df = coeffs_df.drop(columns=["frequencies"])
+        if n_dims > 1:
+            coeffs_df = _frequency_columns(coeffs_df, n_dims)
+        else:
+            coeffs_df["freq1"] = coeffs_df["frequencies"]
+            coeffs_df = coeffs_df.drop(columns=["frequencies"])
         if not export_min_max:
             coeffs_df["coeffs_abs_min"] = 0.0
             coeffs_df["coeffs_abs_max"] = 0.0
@@ -406,6 +453,12 @@ def get_arg_parser():
         "--experiment_id",
         help="Experiment ID",
     )
+    parser.add_argument(
+        "-uri",
+        "--tracking_uri",
+        default=None,
+        help='MLflow tracking URI, e.g. "sqlite:///mlflow.db" (default: mlruns)',
+    )
     parser.add_argument(
         "-coeff",
         "--coefficients",
@@ -461,6 +514,9 @@ def get_arg_parser():
 
 if __name__ == "__main__":
     p = get_arg_parser()
+    if p.tracking_uri is not None:
+        mlflow.set_tracking_uri(p.tracking_uri)
+
     kwargs = dict()
     if p.n_qubits != "all":
         kwargs["export_qubits"] = [int(p.n_qubits)]
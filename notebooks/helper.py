@@ -665,8 +665,11 @@ def get_coeffs_df(
         all_cfgs[ansatz][qubits][seed][noise][str(noise_value)][encoding][1000] += 1
 
         if export_selective_noise:
-            selective_noise = client.get_run(run_id).data.params.get(
-                "coefficients.selective_noise", "both"
+            run_params = client.get_run(run_id).data.params
+            # moved from the coefficients to the model parameters
+            selective_noise = run_params.get(
+                "model.selective_noise",
+                run_params.get("coefficients.selective_noise", "both"),
             )
             sub_df_a.loc[it, "selective_noise"] = selective_noise
 
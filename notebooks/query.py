@@ -0,0 +1,319 @@
+"""
+Queries over the results exported by csv_export.py, using DuckDB as an
+embedded engine. The exports are registered as views and only read when a
+query runs, so filters and column selections are applied while scanning and
+only the selected rows are loaded into pandas.
+
+For large exports, convert the CSV files to Parquet once (`to_parquet`).
+Parquet files are preferred over CSV files of the same name and allow DuckDB
+to skip row groups and columns which are not needed.
+
+Example:
+    db = ResultsDB()
+    df = db.coefficients(qubits=4, noise_type="BitFlip", frequency=1)
+    db.sql("SELECT ansatz, avg(mse) FROM training GROUP BY ansatz")
+"""
+
+import glob
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import pandas as pd
+
+try:
+    import duckdb
+except ImportError:  # pragma: no cover
+    duckdb = None
+
+CSV_DESTINATION = "plotting/rplots/csv_data"
+
+NOISE_TYPES = [
+    "BitFlip",
+    "PhaseFlip",
+    "AmplitudeDamping",
+    "PhaseDamping",
+    "Depolarizing",
+    "ThermalRelaxation",
+    "StatePreparation",
+    "Measurement",
+    "GateError",
+]
+
+# view name -> file pattern (without extension) of the csv_export.py outputs
+TABLES = {
+    "coeffs_stat": "coeffs_stat_dims*",
+    "coeffs_full": "coeffs_full_dims*_q*_*",
+    "coeffs_encoding_stat": "coeffs_enc_stat_dims*",
+    "coeffs_encoding_full": "coeffs_enc_full_dims*",
+    "coeffs_subsampling_stat": "subsamplingcoeffs_stat_dims*",
+    "coeffs_subsampling_full": "subsamplingcoeffs_full_dims*_q*_*",
+    "expressibility": "expr",
+    "entanglement": "ent",
+    "training": "training",
+}
+
+
+class ResultsDB:
+    """
+    Exported results registered as DuckDB views (see `TABLES`). Views are
+    only created for exports which exist.
+
+    Args:
+        path (str): Directory of the exports.
+        database (str): DuckDB database file, in memory by default.
+    """
+
+    def __init__(self, path: str = CSV_DESTINATION, database: str = ":memory:"):
+        if duckdb is None:
+            raise ImportError("ResultsDB requires duckdb (pip install duckdb)")
+        self.path = path
+        self.connection = duckdb.connect(database)
+        self.tables: List[str] = []
+        self.refresh()
+
+    def _files(self, pattern: str) -> List[str]:
+        """
+        Files matching the pattern, preferring Parquet over CSV files.
+        """
+        files = []
+        for csv_file in sorted(glob.glob(os.path.join(self.path, f"{pattern}.csv"))):
+            parquet_file = csv_file[: -len(".csv")] + ".parquet"
+            files.append(
+                parquet_file if _up_to_date(parquet_file, csv_file) else csv_file
+            )
+        return files
+
+    def _scan(self, files: List[str]) -> str:
+        """
+        Table function reading the files.
+        """
+        if len(files) == 0:
+            raise FileNotFoundError(f"No exports in {self.path}")
+        parquet = [f for f in files if f.endswith(".parquet")]
+        csv = [f for f in files if f.endswith(".csv")]
+        scans = []
+        if parquet:
+            scans.append(f"SELECT * FROM read_parquet({parquet!r}, union_by_name=true)")
+        if csv:
+            scans.append(f"SELECT * FROM read_csv({csv!r}, union_by_name=true)")
+        return " UNION ALL BY NAME ".join(scans)
+
+    def refresh(self):
+        """
+        (Re-)creates the views, e.g. after new results were exported.
+        """
+        self.tables = []
+        for table, pattern in TABLES.items():
+            files = self._files(pattern)
+            if len(files) == 0:
+                continue
+            self.connection.execute(
+                f"CREATE OR REPLACE VIEW {table} AS {self._scan(files)}"
+            )
+            self.tables.append(table)
+
+    def to_parquet(self, overwrite: bool = False):
+        """
+        Converts the CSV exports to Parquet files next to them. Files which
+        are newer than their CSV file are kept unless overwrite is set.
+        """
+        for pattern in TABLES.values():
+            for csv_file in glob.glob(os.path.join(self.path, f"{pattern}.csv")):
+                parquet_file = csv_file[: -len(".csv")] + ".parquet"
+                if not overwrite and _up_to_date(parquet_file, csv_file):
+                    continue
+                self.connection.execute(
+                    f"COPY (SELECT * FROM read_csv({csv_file!r})) "
+                    f"TO {parquet_file!r} (FORMAT parquet)"
+                )
+        self.refresh()
+
+    def sql(self, query: str, params: Optional[Sequence[Any]] = None) -> pd.DataFrame:
+        """
+        Runs a query over the views and returns the result.
+        """
+        return self.connection.execute(query, params or []).df()
+
+    def columns(self, table: str) -> List[str]:
+        """
+        Column names of a view (or query).
+        """
+        return [r[0] for r in self.connection.execute(f"DESCRIBE {table}").fetchall()]
+
+    def _select(
+        self,
+        source: str,
+        columns: Optional[List[str]],
+        filters: Dict[str, Any],
+        noise_type: Optional[str],
+        order_by: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Selects `columns` (all if None) of `source` (a view or table
+        function) where all columns in `filters` equal the given values
+        (None is ignored) and, if noise_type is given, where this noise is
+        present (or no noise for "noiseless").
+        """
+        available = self.columns(f"SELECT * FROM ({source})")
+        unknown = set(columns or []) - set(available)
+        if unknown:
+            raise ValueError(f"Unknown columns {sorted(unknown)}")
+
+        terms, params = [], []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column not in available:
+                raise ValueError(f"Cannot filter by {column}")
+            terms.append(f'"{column}" = ?')
+            params.append(value)
+
+        if noise_type is not None:
+            noise_columns = [
+                f'coalesce("{n}", 0)' for n in NOISE_TYPES if n in available
+            ]
+            if noise_type == "noiseless":
+                terms.extend(f"{c} = 0" for c in noise_columns)
+            elif noise_type in available:
+                terms.append(f'"{noise_type}" > 0')
+            else:
+                raise ValueError(f"Unknown noise type {noise_type}")
+
+        projection = ", ".join(f'"{c}"' for c in columns) if columns else "*"
+        query = f"SELECT {projection} FROM ({source})"
+        if terms:
+            query += " WHERE " + " AND ".join(terms)
+        if order_by:
+            query += " ORDER BY " + ", ".join(f'"{c}"' for c in order_by)
+        return self.sql(query, params)
+
+    def coefficients(
+        self,
+        qubits: Optional[int] = None,
+        noise_type: Optional[str] = None,
+        frequency: Optional[Union[float, Tuple[float, float]]] = None,
+        ansatz: Optional[str] = None,
+        encoding: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        n_dims: int = 1,
+        full: bool = False,
+        kind: str = "",
+    ) -> pd.DataFrame:
+        """
+        Fourier coefficients (statistics or, with full=True, all samples).
+
+        Args:
+            qubits (Optional[int]): Number of qubits.
+            noise_type (Optional[str]): Noise type (e.g. "BitFlip") or
+                "noiseless".
+            frequency (Optional[Union[float, Tuple[float, float]]]):
+                Frequency, a tuple for 2D inputs.
+            ansatz (Optional[str]): Circuit type.
+            encoding (Optional[str]): Encoding, e.g. "RX" or "RXRY".
+            columns (Optional[List[str]]): Columns to load, all if None.
+            n_dims (int): Number of input dimensions.
+            full (bool): Load the samples instead of their statistics.
+            kind (str): "" (noise sweeps), "encoding" or "subsampling".
+
+        Returns:
+            pd.DataFrame: The selected rows.
+        """
+        if kind not in ("", "encoding", "subsampling"):
+            raise ValueError(f"Unknown kind {kind}")
+        prefix = {
+            "": "coeffs",
+            "encoding": "coeffs_enc",
+            "subsampling": "subsamplingcoeffs",
+        }[kind]
+
+        if full and kind != "encoding":
+            # full exports are split by qubits and noise type, so only the
+            # matching files are read
+            pattern = (
+                f"{prefix}_full_dims{n_dims}_q{qubits if qubits is not None else '*'}"
+                f"_{noise_type if noise_type is not None else '*'}"
+            )
+        else:
+            pattern = f"{prefix}_{'full' if full else 'stat'}_dims{n_dims}"
+
+        filters = {"qubits": qubits, "ansatz": ansatz, "encoding": encoding}
+        if frequency is not None:
+            frequency = frequency if isinstance(frequency, tuple) else (frequency,)
+            if len(frequency) != n_dims:
+                raise ValueError(f"Expected {n_dims} frequencies, got {frequency}")
+            filters.update({f"freq{d + 1}": f for d, f in enumerate(frequency)})
+
+        return self._select(
+            self._scan(self._files(pattern)), columns, filters, noise_type
+        )
+
+    def expressibility(
+        self,
+        qubits: Optional[int] = None,
+        noise_type: Optional[str] = None,
+        ansatz: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Expressibility over the noise levels.
+        """
+        return self._select(
+            "SELECT * FROM expressibility",
+            columns,
+            {"qubits": qubits, "ansatz": ansatz},
+            noise_type,
+        )
+
+    def entanglement(
+        self,
+        qubits: Optional[int] = None,
+        noise_type: Optional[str] = None,
+        ansatz: Optional[str] = None,
+        measure: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Entangling capability over the noise levels.
+        """
+        return self._select(
+            "SELECT * FROM entanglement",
+            columns,
+            {"qubits": qubits, "ansatz": ansatz, "measure": measure},
+            noise_type,
+        )
+
+    def training(
+        self,
+        qubits: Optional[int] = None,
+        noise_type: Optional[str] = None,
+        ansatz: Optional[str] = None,
+        encoding: Optional[str] = None,
+        problem_seed: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Training trajectories, ordered by run and step.
+        """
+        available = self.columns("training")
+        return self._select(
+            "SELECT * FROM training",
+            columns,
+            {
+                "qubits": qubits,
+                "ansatz": ansatz,
+                "encoding": encoding,
+                "problem_seed": problem_seed,
+            },
+            noise_type,
+            order_by=[
+                c
+                for c in ["run_id", "step", "coeff_idx"]
+                if c in available and (columns is None or c in columns)
+            ],
+        )
+
+
+def _up_to_date(target: str, source: str) -> bool:
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(
+        source
+    )
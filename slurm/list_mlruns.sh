@@ -1 +1,6 @@
-find ~/effect-of-noise-in-qfms/mlruns -maxdepth 2 -type f -name 'meta.yaml' -exec sed -n -e 3p -e 6p {} \;
\ No newline at end of file
+DB=~/effect-of-noise-in-qfms/mlflow.db
+if [ -f "$DB" ]; then
+    sqlite3 "$DB" "SELECT 'experiment_id: ''' || experiment_id || '''' || char(10) || 'name: ' || name FROM experiments;"
+else
+    find ~/effect-of-noise-in-qfms/mlruns -maxdepth 2 -type f -name 'meta.yaml' -exec sed -n -e 3p -e 6p {} \;
+fi
@@ -1 +1,6 @@
-find ~/effect-of-noise-in-qfms/mlruns/$1 -maxdepth 1 -type d -printf '%f\n'
\ No newline at end of file
+DB=~/effect-of-noise-in-qfms/mlflow.db
+if [ -f "$DB" ]; then
+    sqlite3 "$DB" "SELECT run_uuid FROM runs WHERE experiment_id = $1;"
+else
+    find ~/effect-of-noise-in-qfms/mlruns/$1 -maxdepth 1 -type d -printf '%f\n'
+fi
@@ -0,0 +1,14 @@
+#!/bin/bash
+
+# first argument: pipeline
+# second argument: seed
+
+# schedules the sweep of sweep_circuits_seed.sh (circuits x noise types x qubits) by the
+# runtime and memory estimated from previous runs, longest first, instead of one job per
+# configuration in loop order
+cd ~/effect-of-noise-in-qfms
+~/effect-of-noise-in-qfms/.venv/bin/python -m kedro schedule --pipeline $1 \
+    --sweep model.circuit_type=Hardware_Efficient,Circuit_19,Strongly_Entangling,Circuit_15 \
+    --sweep noise=BitFlip,PhaseFlip,AmplitudeDamping,PhaseDamping,Depolarizing,StatePreparation,GateError,Measurement \
+    --sweep model.n_qubits+data.omegas=3,4,5,6 \
+    --params seed=$2 --noise-level 0.03 --submit
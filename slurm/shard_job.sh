@@ -0,0 +1,26 @@
+#!/bin/bash
+#
+# Splits the samples of a single configuration over the tasks of an array job,
+# whose partial results are merged in a dependent job. Submit both with
+#   slurm/submit_shards.sh coefficients "model.n_qubits=7" 16
+#
+# first argument: pipeline (coefficients, expressibility or entanglement)
+# second argument: parameters
+#
+#SBATCH --job-name=effects-of-noise-shard
+#SBATCH --nodes=1
+#SBATCH --ntasks=6
+#SBATCH --time=15:00:00
+#SBATCH --partition cpu
+#SBATCH --mem=32000MB
+#SBATCH --output="logs/slurm/slurm-%A_%a-%x.out"
+
+module load devel/python/3.11.7
+# skip interactive-only startup work (e.g. the kedro-viz session store)
+export QFM_BATCH_MODE=1
+
+~/effect-of-noise-in-qfms/.venv/bin/python -m kedro run --pipeline $1_shard \
+    --params="$2,sharding.shard=$SLURM_ARRAY_TASK_ID/$SLURM_ARRAY_TASK_COUNT,sharding.group=$SLURM_ARRAY_JOB_ID"
+
+# Done
+exit 0
@@ -25,6 +25,8 @@
 #SBATCH --output="logs/slurm/slurm-%j-%x.out"
 
 module load devel/python/3.11.7
+# skip interactive-only startup work (e.g. the kedro-viz session store)
+export QFM_BATCH_MODE=1
 # ~/effect-of-noise-in-qfms/.venv/bin/python -m kedro run --pipeline coefficients --params=$1
 # ~/effect-of-noise-in-qfms/.venv/bin/python -m kedro run --pipeline entanglement --params=$1
 # ~/effect-of-noise-in-qfms/.venv/bin/python -m kedro run --pipeline expressibility --params=$1
@@ -0,0 +1,19 @@
+#!/bin/bash
+
+# first argument: pipeline (coefficients, expressibility or entanglement)
+# second argument: parameters
+# third argument: number of shards (default 16)
+
+# submits the shards of a single configuration as an array job (shard_job.sh) and the
+# merge as a job which starts once all tasks of the array job succeeded, e.g.
+#   slurm/submit_shards.sh coefficients "model.n_qubits=7" 16
+cd ~/effect-of-noise-in-qfms
+n_shards=${3:-16}
+array_job_id=$(sbatch --parsable --array=0-$((n_shards - 1)) slurm/shard_job.sh $1 "$2")
+# --parsable prints "<job id>[;<cluster>]"
+array_job_id=${array_job_id%%;*}
+echo "Submitted shards of $1 as array job $array_job_id"
+
+sbatch --dependency=afterok:$array_job_id --job-name=effects-of-noise-merge \
+    --partition cpu --time=01:00:00 --output="logs/slurm/slurm-%j-%x.out" \
+    --wrap="QFM_BATCH_MODE=1 ~/effect-of-noise-in-qfms/.venv/bin/python -m kedro run --pipeline $1_merge --params=sharding.group=$array_job_id"
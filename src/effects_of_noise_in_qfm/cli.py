@@ -0,0 +1,218 @@
+"""Command line tools of the project, available as `kedro <command>`.
+
+Heavy modules (mlflow) are imported within the commands, since this module is
+loaded on every `kedro` invocation.
+"""
+
+import click
+from kedro.framework.cli.project import run  # noqa: F401
+
+CONTEXT_SETTINGS = dict(help_option_names=["-h", "--help"])
+
+
+@click.group(context_settings=CONTEXT_SETTINGS, name=__file__)
+def cli():
+    """Command line tools for manipulating a Kedro project."""
+
+
+cli.add_command(run)
+
+
+@cli.group()
+def tracking():
+    """SQLite tracking store (see conf/sqlite/mlflow.yml)."""
+
+
+@tracking.command()
+@click.option("--mlruns", default="mlruns", help="Root of the file store.")
+@click.option(
+    "--uri", default="sqlite:///mlflow.db", help="URI of the SQLite tracking store."
+)
+@click.option(
+    "--experiment-id",
+    "-e",
+    "experiment_ids",
+    multiple=True,
+    help="Experiment to import (repeatable), all by default.",
+)
+def migrate(mlruns, uri, experiment_ids):
+    """Import the runs of a file-based mlruns tree."""
+    from effects_of_noise_in_qfm.helpers.tracking import migrate as migrate_runs
+
+    n_runs = migrate_runs(mlruns, uri, list(experiment_ids) or None)
+    click.echo(f"Imported {n_runs} runs into {uri}")
+
+
+@tracking.command()
+@click.option(
+    "--uri", default="sqlite:///mlflow.db", help="URI of the SQLite tracking store."
+)
+def index(uri):
+    """Create (or upgrade) the tracking store and its search indexes."""
+    from effects_of_noise_in_qfm.helpers.tracking import open_store
+
+    open_store(uri)
+    click.echo(f"Indexed {uri}")
+
+
+def _split_params(params: str) -> dict:
+    from effects_of_noise_in_qfm.helpers.schedule import parse_value
+
+    items = [item.split("=", 1) for item in params.split(",") if item]
+    if any(len(item) != 2 for item in items):
+        raise click.BadParameter(f"Expected key=value pairs, got {params}")
+    return {k.strip(): parse_value(v.strip()) for k, v in items}
+
+
+def _seconds(time_limit: str) -> int:
+    hours, minutes, seconds = (int(t) for t in time_limit.split(":"))
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def _split_sweep(sweep: str):
+    from effects_of_noise_in_qfm.helpers.schedule import parse_value
+
+    key, _, values = sweep.partition("=")
+    if not values:
+        raise click.BadParameter(f"Expected key=v1,v2,..., got {sweep}")
+    return key.strip(), [parse_value(v.strip()) for v in values.split(",")]
+
+
+@cli.command()
+@click.option(
+    "--pipeline",
+    "-p",
+    "pipelines",
+    multiple=True,
+    required=True,
+    help="Pipeline to run per configuration (repeatable).",
+)
+@click.option(
+    "--sweep",
+    "-s",
+    "sweeps",
+    multiple=True,
+    help="Swept parameter as key=v1,v2,... (repeatable, the Cartesian product "
+    "is scheduled). Keys joined by '+' are set together, the key 'noise' sweeps "
+    "over noise types.",
+)
+@click.option("--params", default="", help="Parameters of all configurations.")
+@click.option("--noise-level", default=0.03, help="Noise level of the noise sweep.")
+@click.option(
+    "--experiment-id",
+    "-e",
+    "experiment_ids",
+    multiple=True,
+    help="Experiment with the history (repeatable), all by default.",
+)
+@click.option(
+    "--local",
+    "workers",
+    default=0,
+    help="Run the configurations with this many local workers instead of "
+    "writing SLURM jobs.",
+)
+@click.option("--uri", default=None, help="Tracking URI with the history.")
+@click.option("--jobs", default=1, help="Minimum number of SLURM jobs.")
+@click.option("--time-limit", default="15:00:00", help="Time limit of a SLURM job.")
+@click.option("--output", default="slurm/scheduled", help="Directory of the jobs.")
+@click.option("--submit", is_flag=True, help="Submit the jobs with sbatch.")
+def schedule(
+    pipelines,
+    sweeps,
+    params,
+    noise_level,
+    experiment_ids,
+    workers,
+    uri,
+    jobs,
+    time_limit,
+    output,
+    submit,
+):
+    """Schedule a sweep by the estimated cost of its configurations."""
+    import subprocess
+
+    from kedro.config import OmegaConfigLoader
+    import mlflow
+
+    from effects_of_noise_in_qfm.helpers import schedule as sc
+
+    configs = sc.grid(
+        pipelines,
+        dict(map(_split_sweep, sweeps)),
+        _split_params(params),
+        noise_level,
+    )
+    defaults = OmegaConfigLoader("conf", base_env="base", default_run_env="local")[
+        "parameters"
+    ]
+    if uri is not None:
+        mlflow.set_tracking_uri(uri)
+    model = sc.CostModel().fit(sc.load_history(list(experiment_ids) or None))
+    estimates = sc.estimate(configs, model, defaults)
+
+    if workers > 0:
+        codes = sc.run_local(configs, estimates, workers)
+        click.echo(f"{codes.count(0)} of {len(codes)} configurations succeeded")
+        return
+
+    packed = sc.pack(configs, estimates, jobs, _seconds(time_limit))
+    paths = sc.write_slurm_jobs(packed, output)
+    for path, job in zip(paths, packed):
+        memory = "unknown" if job.memory_mb is None else f"{job.memory_mb:.0f}MB"
+        click.echo(
+            f"{path}: {len(job.configs)} configurations, "
+            f"{sc.slurm_time(job.seconds)}, memory {memory}"
+        )
+        if submit:
+            subprocess.run(["sbatch", path], check=True)
+
+
+@cli.command()
+@click.option("--pipeline", "-p", default="__default__", help="Pipeline to estimate.")
+@click.option("--params", default="", help="Parameters as for `kedro run`.")
+@click.option("--env", "-e", default=None, help="Kedro configuration environment.")
+@click.option("--memory-limit", default=32000, help="Memory limit of a job in MB.")
+@click.option("--time-limit", default="15:00:00", help="Time limit of a job.")
+@click.option(
+    "--uri", default=None, help="Tracking URI with the history for the wall time."
+)
+def estimate(pipeline, params, env, memory_limit, time_limit, uri):
+    """Estimate the resources of a run without running it.
+
+    Exits with code 1 if the estimate exceeds the memory or time limit.
+    """
+    from kedro.config import OmegaConfigLoader
+    import mlflow
+    from omegaconf import OmegaConf
+
+    from effects_of_noise_in_qfm.helpers import schedule as sc
+    from effects_of_noise_in_qfm.helpers.resources import estimate_resources
+
+    # resolved as by `kedro run --params`
+    loader = OmegaConfigLoader(
+        "conf", base_env="base", default_run_env="local", env=env
+    )
+    overrides = OmegaConf.from_dotlist([p for p in params.split(",") if p])
+    resolved = OmegaConf.to_container(OmegaConf.merge(loader["parameters"], overrides))
+
+    if uri is not None:
+        mlflow.set_tracking_uri(uri)
+    model = sc.CostModel().fit(sc.load_history())
+    name = "training" if pipeline == "__default__" else pipeline
+    seconds = model.predict(name, sc.features(name, {}, resolved)).seconds
+
+    resources = estimate_resources(pipeline, resolved, seconds)
+    for line in resources.report():
+        click.echo(line)
+
+    exceeded = False
+    if resources.peak_memory_mb > memory_limit:
+        click.echo(f"Estimated peak memory exceeds the limit of {memory_limit}MB")
+        exceeded = True
+    if seconds > _seconds(time_limit):
+        click.echo(f"Estimated wall time exceeds the limit of {time_limit}")
+        exceeded = True
+    if exceeded:
+        raise SystemExit(1)
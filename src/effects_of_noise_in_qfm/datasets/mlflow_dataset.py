@@ -103,21 +103,40 @@ class CustomMlflowArtifactDataset(AbstractVersionedDataset):
                 Path(local_path).unlink()
                 Path(run_dir).rmdir()
 
+            def __reduce__(self):
+                # the class is created at runtime and cannot be pickled, e.g.
+                # by the ParallelRunner, so the dataset is created again from
+                # its catalog entry when unpickled
+                return (
+                    CustomMlflowArtifactDataset,
+                    (dataset, run_id, artifact_path, credentials, metadata),
+                )
+
             def _load(self) -> Any:  # pragma: no cover
-                if self.run_id:
+                if hasattr(self, "_version"):
+                    # all kedro datasets inherits from AbstractVersionedDataset
+                    local_path = self._get_load_path()
+                elif hasattr(self, "_filepath"):
+                    # in case custom datasets inherits from AbstractDataset without versioning
+                    local_path = self._filepath  # pragma: no cover
+                elif hasattr(self, "_path"):
+                    # special datasets with a folder instead of a specific files like PartitionedDataset
+                    local_path = Path(self._path)
+
+                run_id = self.run_id
+                if (
+                    run_id is None
+                    and not Path(local_path).exists()
+                    and mlflow.active_run() is not None
+                ):
+                    # the local file is removed after logging in _save, so a dataset
+                    # saved earlier in this run has to be fetched from the active run
+                    run_id = mlflow.active_run().info.run_id
+
+                if run_id:
                     # if no run_id is specified, we take the artifact from the local path rather that the active run:
                     # there are a lot of chances that it has not been saved yet!
 
-                    if hasattr(self, "_version"):
-                        # all kedro datasets inherits from AbstractVersionedDataset
-                        local_path = self._get_load_path()
-                    elif hasattr(self, "_filepath"):
-                        # in case custom datasets inherits from AbstractDataset without versioning
-                        local_path = self._filepath  # pragma: no cover
-                    elif hasattr(self, "_path"):
-                        # special datasets with a folder instead of a specific files like PartitionedDataset
-                        local_path = Path(self._path)
-
                     # BEWARE: we must enforce Path(local_path) because it is a PurePosixPath which fails on windows
                     # this is very weird: if you assign the value, it is converted to a Pureposixpath again, e.g:
                     # this fails:
@@ -140,7 +159,7 @@ class CustomMlflowArtifactDataset(AbstractVersionedDataset):
                         # we cannot use dst_path, because it downloads the file to "local_path / artifact_path /filename.pkl"
                         # the artifact_path suffix prevents from loading when we call super._load()
                         temp_download_filepath = mlflow_client.download_artifacts(
-                            run_id=self.run_id,
+                            run_id=run_id,
                             path=artifact_path,
                             # dst_path=local_path.parent.as_posix(),
                         )
@@ -149,11 +168,12 @@ class CustomMlflowArtifactDataset(AbstractVersionedDataset):
                         from mlflow.artifacts import download_artifacts
 
                         temp_download_filepath = download_artifacts(
-                            run_id=self.run_id,
+                            run_id=run_id,
                             artifact_path=artifact_path,
                             # dst_path=local_path.parent.as_posix(),
                         )
 
+                    Path(local_path).parent.mkdir(parents=True, exist_ok=True)
                     shutil.copy(src=temp_download_filepath, dst=local_path)
 
                 # finally, read locally
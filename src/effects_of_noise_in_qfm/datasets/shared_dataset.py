@@ -0,0 +1,103 @@
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+from kedro.io import AbstractDataset
+
+# directory holding the shared files of this session, created on first use
+_session_dir: Optional[Path] = None
+
+
+def session_directory() -> Path:
+    """
+    Directory of the shared files of the current Kedro session. It is
+    located in /dev/shm (memory-backed) where available.
+    """
+    global _session_dir
+    if _session_dir is None:
+        base = "/dev/shm" if os.path.isdir("/dev/shm") else None
+        _session_dir = Path(tempfile.mkdtemp(prefix="qfm_shared_", dir=base))
+    return _session_dir
+
+
+def release_session_directory():
+    """
+    Removes all shared files of the current Kedro session.
+    """
+    global _session_dir
+    if _session_dir is not None:
+        shutil.rmtree(_session_dir, ignore_errors=True)
+        _session_dir = None
+
+
+class SharedArrayDataset(AbstractDataset):
+    """
+    Dataset for large arrays (training inputs and targets) which are read by
+    many nodes, possibly in different processes (e.g. with the
+    ParallelRunner). Arrays are written once as .npy files and loaded as
+    read-only memory maps, so all processes share the same pages instead of
+    receiving a pickled copy each. Other objects (such as a `ChunkedGrid`)
+    are pickled.
+
+    The files live in the session directory (see `session_directory`), which
+    is determined when the catalog is created in the main process and is
+    removed by `SharedDataHooks` once the pipeline finished.
+
+    Example catalog entry:
+        domain_samples:
+          type: effects_of_noise_in_qfm.datasets.shared_dataset.SharedArrayDataset
+          name: domain_samples
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: Optional[str] = None,
+        metadata: Optional[dict[str, Any]] = None,
+    ):
+        self._directory = Path(directory) if directory else session_directory()
+        self._name = name
+        self.metadata = metadata
+
+    @property
+    def _array_path(self) -> Path:
+        return self._directory / f"{self._name}.npy"
+
+    @property
+    def _pickle_path(self) -> Path:
+        return self._directory / f"{self._name}.pkl"
+
+    def _save(self, data: Any) -> None:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._release()
+        if isinstance(data, np.ndarray) and data.dtype != object:
+            array = np.lib.format.open_memmap(
+                self._array_path, mode="w+", dtype=data.dtype, shape=data.shape
+            )
+            array[...] = data
+            array.flush()
+            del array
+        else:
+            with open(self._pickle_path, "wb") as f:
+                pickle.dump(data, f)
+
+    def _load(self) -> Any:
+        if self._array_path.exists():
+            return np.load(self._array_path, mmap_mode="r")
+        with open(self._pickle_path, "rb") as f:
+            return pickle.load(f)
+
+    def _exists(self) -> bool:
+        return self._array_path.exists() or self._pickle_path.exists()
+
+    def _release(self) -> None:
+        # open memory maps stay valid after the file was unlinked
+        self._array_path.unlink(missing_ok=True)
+        self._pickle_path.unlink(missing_ok=True)
+
+    def _describe(self) -> dict[str, Any]:
+        return {"name": self._name, "directory": str(self._directory)}
@@ -0,0 +1,238 @@
+"""
+Helpers to compute Fourier spectra from model outputs and to summarise the
+coefficients of many parameter samples.
+"""
+
+from functools import lru_cache
+from typing import Dict, Tuple, Union
+import numpy as np
+
+STATISTICS_DTYPES = {"double": np.complex128, "single": np.complex64}
+
+
+def spectrum_inputs(degree: int, n_input_feat: int, mts: int = 1) -> np.ndarray:
+    """
+    Input grid on which the model has to be evaluated to compute its
+    spectrum, i.e. 2 * degree * mts + 1 equidistant points in [0, 2pi) per
+    input dimension.
+
+    Args:
+        degree (int): Maximum frequency of the model.
+        n_input_feat (int): Number of input dimensions.
+        mts (int): Oversampling factor.
+
+    Returns:
+        np.ndarray: Grid of shape ((2 * degree * mts + 1)**n_input_feat,
+            n_input_feat), where the first point is the origin.
+    """
+    n = 2 * degree * mts + 1
+    x = np.arange(n) * 2 * np.pi / n
+    grid = np.stack(np.meshgrid(*[x] * n_input_feat, indexing="ij"), axis=-1)
+    return grid.reshape(-1, n_input_feat)
+
+
+class FrequencyGrid:
+    """
+    Frequencies of a shifted and trimmed spectrum with n_input_feat input
+    dimensions, i.e. of coefficients of shape (n_freqs,) * n_input_feat as
+    returned by `Coefficients.get_spectrum(shift=True, trim=True)`. The
+    frequencies are symmetric around zero, such that the coefficient of -k
+    is the complex conjugate of the coefficient of k for real outputs.
+    All arrays are read-only, as the grids are shared, see `frequency_grid`.
+
+    Args:
+        frequencies (np.ndarray): Sorted frequencies of an input dimension.
+        n_input_feat (int): Number of input dimensions.
+    """
+
+    def __init__(self, frequencies: np.ndarray, n_input_feat: int):
+        self.frequencies = _read_only(np.asarray(frequencies, dtype=float))
+        self.n_input_feat = n_input_feat
+        self.shape = (len(self.frequencies),) * n_input_feat
+        self.size = len(self.frequencies) ** n_input_feat
+
+        # frequency vector of each coefficient, shape (*shape, n_input_feat)
+        self.vectors = _read_only(
+            np.stack(
+                np.meshgrid(*[self.frequencies] * n_input_feat, indexing="ij"),
+                axis=-1,
+            )
+        )
+        # first non-zero component of each vector decides the half it is in
+        leading = np.zeros(self.shape)
+        for d in reversed(range(n_input_feat)):
+            component = self.vectors[..., d]
+            leading = np.where(component != 0, component, leading)
+        self.positive = _read_only(leading > 0)
+        self.zero = _read_only(np.all(self.vectors == 0, axis=-1))
+        # flat index of -k for the flat index of k
+        self.conjugate = _read_only(np.arange(self.size)[::-1].copy())
+
+    def positive_half(self, zero_coefficient: bool = True) -> np.ndarray:
+        """
+        Mask of shape `shape` of the non-redundant half of the spectrum, the
+        frequencies whose first non-zero component is positive and
+        optionally the zero frequency.
+        """
+        return self.positive | self.zero if zero_coefficient else self.positive
+
+    def ravel(self, index: Tuple[Union[int, np.ndarray], ...]) -> np.ndarray:
+        """
+        Flat indices of multi-indices into the grid.
+        """
+        return np.ravel_multi_index(index, self.shape)
+
+    def unravel(self, index: Union[int, np.ndarray]) -> Tuple[np.ndarray, ...]:
+        """
+        Multi-indices of flat indices into the grid.
+        """
+        return np.unravel_index(index, self.shape)
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+@lru_cache(maxsize=None)
+def frequency_grid(degree: int, n_input_feat: int, mts: int = 1) -> FrequencyGrid:
+    """
+    Cached frequency grid of a model of the given degree, with the
+    frequencies of `Coefficients.get_spectrum` for the oversampling mts.
+    The spectrum of `spectrum_from_outputs` with oversampling mts has the
+    grid of `frequency_grid(degree * mts, n_input_feat)`.
+
+    Args:
+        degree (int): Maximum frequency of the model.
+        n_input_feat (int): Number of input dimensions.
+        mts (int): Oversampling factor.
+
+    Returns:
+        FrequencyGrid: The grid, shared by all callers.
+    """
+    n_freqs = 2 * degree + 1
+    frequencies = np.fft.fftfreq(mts * n_freqs, 1 / n_freqs)
+    # trim the Nyquist frequency of even spectra
+    if len(frequencies) % 2 == 0:
+        frequencies = np.delete(frequencies, len(frequencies) // 2)
+    return FrequencyGrid(np.fft.fftshift(frequencies), n_input_feat)
+
+
+def spectrum_from_outputs(
+    outputs: np.ndarray, n_input_feat: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes the (shifted) Fourier coefficients from model outputs on the
+    grid returned by `spectrum_inputs`.
+
+    Args:
+        outputs (np.ndarray): Outputs of shape (n_grid_points, n_samples).
+        n_input_feat (int): Number of input dimensions.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]:
+            - Coefficients of shape (n_freqs, ..., n_samples) with
+              n_input_feat frequency axes and the zero frequency in the center.
+            - Frequencies of shape (n_freqs,).
+    """
+    n = int(round(outputs.shape[0] ** (1 / n_input_feat)))
+    outputs = outputs.reshape(*[n] * n_input_feat, -1)
+    axes = list(range(n_input_feat))
+
+    coeffs = np.fft.fftn(outputs, axes=axes) / n**n_input_feat
+    freqs = np.fft.fftfreq(n, 1 / n)
+
+    return np.fft.fftshift(coeffs, axes=axes), np.fft.fftshift(freqs)
+
+
+class SpectrumSamples:
+    """
+    Coefficients of the parameter samples of a noise level, collected batch
+    by batch into a single contiguous array with the samples on the first
+    axis, such that the statistics need neither per-sample slicing nor
+    concatenation.
+
+    Args:
+        max_samples (int): Maximum number of samples.
+        n_input_feat (int): Number of input dimensions.
+    """
+
+    def __init__(self, max_samples: int, n_input_feat: int):
+        self.max_samples = max_samples
+        self.n_input_feat = n_input_feat
+        self.n_samples = 0
+        self._buffer = None
+
+    def add(self, coeffs: np.ndarray):
+        """
+        Adds a batch of coefficients as returned by
+        `Coefficients.get_spectrum`, i.e. of shape (n_freqs, ..., batch) with
+        n_input_feat frequency axes, or without the batch axis for a single
+        sample.
+        """
+        coeffs = np.asarray(coeffs)
+        shape = coeffs.shape[: self.n_input_feat]
+        coeffs = coeffs.reshape(*shape, -1)
+        if self._buffer is None:
+            self._buffer = np.empty((self.max_samples, *shape), dtype=coeffs.dtype)
+        batch = coeffs.shape[-1]
+        self._buffer[self.n_samples : self.n_samples + batch] = np.moveaxis(
+            coeffs, -1, 0
+        )
+        self.n_samples += batch
+
+    @property
+    def coefficients(self) -> np.ndarray:
+        """
+        Coefficients of shape (n_samples, n_freqs, ...).
+        """
+        return self._buffer[: self.n_samples]
+
+
+def coefficient_statistics(
+    coeffs: np.ndarray, precision: str = "double"
+) -> Dict[str, list]:
+    """
+    Computes the statistics over all samples, which are stored in the
+    coefficients dataframe. The real and imaginary parts are views of a
+    single contiguous array and the absolute values and deviations from
+    the mean are computed once for all statistics.
+
+    Args:
+        coeffs (np.ndarray): Coefficients of shape (n_samples, ...).
+        precision (str): "double" or "single" (statistics in float32).
+
+    Returns:
+        Dict[str, list]: Statistics per frequency, keyed by column name.
+    """
+    if precision not in STATISTICS_DTYPES:
+        raise ValueError(f"precision must be 'double' or 'single', got {precision}")
+    coeffs = np.ascontiguousarray(coeffs, dtype=STATISTICS_DTYPES[precision])
+    real, imag = coeffs.real, coeffs.imag
+    abs_coeffs = np.abs(coeffs)
+
+    mean_real = real.mean(axis=0)
+    mean_imag = imag.mean(axis=0)
+    mean_abs = abs_coeffs.mean(axis=0)
+    deviation_real = real - mean_real
+    deviation_imag = imag - mean_imag
+    deviation_abs = abs_coeffs - mean_abs
+
+    real_var = np.mean(deviation_real * deviation_real, axis=0)
+    imag_var = np.mean(deviation_imag * deviation_imag, axis=0)
+    co_variance_real_imag = np.mean(deviation_real * deviation_imag, axis=0)
+
+    return {
+        "coeffs_abs_var": np.mean(deviation_abs * deviation_abs, axis=0).tolist(),
+        # variance of the complex coefficients, E|c - E[c]|^2
+        "coeffs_var": (real_var + imag_var).tolist(),
+        "coeffs_co_var_real_imag": co_variance_real_imag.tolist(),
+        "coeffs_real_var": real_var.tolist(),
+        "coeffs_imag_var": imag_var.tolist(),
+        "coeffs_abs_max": abs_coeffs.max(axis=0).tolist(),
+        "coeffs_abs_mean": mean_abs.tolist(),
+        "coeffs_real_mean": mean_real.tolist(),
+        "coeffs_imag_mean": mean_imag.tolist(),
+        "coeffs_full_real": real.T.tolist(),
+        "coeffs_full_imag": imag.T.tolist(),
+    }
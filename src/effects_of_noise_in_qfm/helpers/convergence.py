@@ -0,0 +1,110 @@
+"""
+Early stopping criteria for the training, updated in O(1) per step.
+"""
+
+from typing import Optional
+import numpy as np
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class ConvergenceMonitor:
+    """
+    Decides when to stop the training. The costs are passed to `update` in
+    each step, which returns the reason for stopping or None. Criteria which
+    are set to -1 are disabled.
+
+    - "threshold": The cost is below `threshold`.
+    - "gradient": The absolute moving average of the last `window` cost
+      deltas is below `gradient`. The deltas are kept in a ring buffer with a
+      running sum.
+    - "patience": The best cost did not improve by more than
+      `rel_improvement` (relative to the best cost) for `patience` steps.
+
+    Example:
+        monitor = ConvergenceMonitor(threshold=1e-4, gradient=1e-6)
+        for step in range(steps):
+            cost = ...
+            if monitor.update(step, cost) is not None:
+                break
+    """
+
+    def __init__(
+        self,
+        threshold: float = -1,
+        gradient: float = -1,
+        window: int = 50,
+        patience: int = -1,
+        rel_improvement: float = 0.0,
+    ):
+        if window < 1:
+            raise ValueError(f"window must be positive, got {window}")
+        self.threshold = threshold
+        self.gradient = gradient
+        self.window = window
+        self.patience = patience
+        self.rel_improvement = rel_improvement
+
+        self._deltas = np.zeros(window)
+        self._delta_sum = 0.0
+        self._n_deltas = 0
+        self._last_cost: Optional[float] = None
+
+        self.best_cost = np.inf
+        self.best_step: Optional[int] = None
+        self.stop_reason: Optional[str] = None
+        self.stop_step: Optional[int] = None
+
+    @property
+    def mean_delta(self) -> float:
+        """
+        Moving average of the last `window` cost deltas.
+        """
+        if self._n_deltas == 0:
+            return np.nan
+        return self._delta_sum / min(self._n_deltas, self.window)
+
+    def _push_delta(self, delta: float):
+        i = self._n_deltas % self.window
+        self._delta_sum += delta - self._deltas[i]
+        self._deltas[i] = delta
+        self._n_deltas += 1
+
+    def update(self, step: int, cost: float) -> Optional[str]:
+        """
+        Records the cost of a step.
+
+        Args:
+            step (int): Training step.
+            cost (float): Cost in this step.
+
+        Returns:
+            Optional[str]: The stopping reason ("threshold", "gradient" or
+                "patience") or None to continue.
+        """
+        cost = float(cost)
+        if self._last_cost is not None:
+            self._push_delta(cost - self._last_cost)
+        self._last_cost = cost
+
+        if (
+            self.best_step is None
+            or self.best_cost - cost > self.rel_improvement * abs(self.best_cost)
+        ):
+            self.best_cost = cost
+            self.best_step = step
+
+        if cost < self.threshold:
+            reason = "threshold"
+        elif self._n_deltas >= self.window and abs(self.mean_delta) < self.gradient:
+            reason = "gradient"
+        elif self.patience > 0 and step - self.best_step >= self.patience:
+            reason = "patience"
+        else:
+            return None
+
+        self.stop_reason = reason
+        self.stop_step = step
+        log.info(f"Training converged ({reason}) after {step} steps.")
+        return reason
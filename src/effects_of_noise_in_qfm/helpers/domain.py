@@ -0,0 +1,135 @@
+"""
+Sampling of d-dimensional input domains and vectorized evaluation of Fourier
+series on them.
+"""
+
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+import string
+import numpy as np
+
+
+@dataclass
+class ChunkedGrid:
+    """
+    Tensor grid of `n_points_per_dim`**`n_dims` points in [domain[0],
+    domain[1]]^n_dims, which is generated lazily in chunks of `chunk_size`
+    points. The points are ordered as in `grid_points`.
+    """
+
+    domain: Tuple[float, float]
+    n_points_per_dim: int
+    n_dims: int
+    chunk_size: int = 65536
+
+    @property
+    def axis(self) -> np.ndarray:
+        return np.linspace(self.domain[0], self.domain[1], num=self.n_points_per_dim)
+
+    def __len__(self) -> int:
+        return self.n_points_per_dim**self.n_dims
+
+    def chunks(self) -> Iterator[Tuple[slice, np.ndarray]]:
+        """
+        Yields the position of each chunk in the flattened grid and the points
+        of shape (chunk_size, n_dims).
+        """
+        axis = self.axis
+        shape = (self.n_points_per_dim,) * self.n_dims
+        for start in range(0, len(self), self.chunk_size):
+            stop = min(start + self.chunk_size, len(self))
+            indices = np.unravel_index(np.arange(start, stop), shape)
+            yield slice(start, stop), np.stack([axis[i] for i in indices], axis=-1)
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for _, points in self.chunks():
+            yield points
+
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        points = grid_points(self.domain, self.n_points_per_dim, self.n_dims)
+        return points if dtype is None else points.astype(dtype)
+
+
+def grid_points(
+    domain: Tuple[float, float], n_points_per_dim: int, n_dims: int
+) -> np.ndarray:
+    """
+    Full tensor grid in [domain[0], domain[1]]^n_dims.
+
+    Returns:
+        np.ndarray: Points of shape (n_points_per_dim**n_dims, n_dims), where
+            the last dimension varies fastest.
+    """
+    axis = np.linspace(domain[0], domain[1], num=n_points_per_dim)
+    grid = np.meshgrid(*[axis] * n_dims, indexing="ij")
+    return np.stack(grid, axis=-1).reshape(-1, n_dims)
+
+
+def quasi_random_points(
+    domain: Tuple[float, float],
+    n_points: int,
+    n_dims: int,
+    method: str = "sobol",
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Quasi-random (low discrepancy) points in [domain[0], domain[1]]^n_dims.
+    Exactly n_points are drawn. Sobol sequences are balanced only for powers
+    of two, so scipy warns for other numbers of points with method="sobol".
+
+    Args:
+        domain (Tuple[float, float]): Lower and upper bound of each dimension.
+        n_points (int): Number of points.
+        n_dims (int): Number of dimensions.
+        method (str): "sobol" or "halton".
+        seed (Optional[int]): Seed for the scrambling.
+
+    Returns:
+        np.ndarray: Points of shape (n_points, n_dims).
+    """
+    from scipy.stats import qmc
+
+    if method == "sobol":
+        sampler = qmc.Sobol(d=n_dims, seed=seed)
+        samples = sampler.random(n_points)
+    elif method == "halton":
+        sampler = qmc.Halton(d=n_dims, seed=seed)
+        samples = sampler.random(n_points)
+    else:
+        raise ValueError(f"method must be 'sobol' or 'halton', got {method}")
+
+    return qmc.scale(samples, [domain[0]] * n_dims, [domain[1]] * n_dims)
+
+
+def fourier_series(
+    coefficients: np.ndarray, frequencies: np.ndarray, inputs: np.ndarray
+) -> np.ndarray:
+    """
+    Evaluates a d-dimensional Fourier series with coefficients c_k on all
+    inputs at once, i.e. sum_k c_k exp(i k x), using that the exponential
+    factorizes over the dimensions.
+
+    Args:
+        coefficients (np.ndarray): Coefficients of shape (n_freqs,)*d.
+        frequencies (np.ndarray): Frequencies of shape (n_freqs,), shared by
+            all dimensions.
+        inputs (np.ndarray): Inputs of shape (n_inputs, d) or (n_inputs,)
+            for d = 1.
+
+    Returns:
+        np.ndarray: Function values of shape (n_inputs,).
+    """
+    coefficients = np.asarray(coefficients)
+    n_dims = coefficients.ndim
+    inputs = np.asarray(inputs).reshape(-1, n_dims)
+
+    # exponentials of shape (n_inputs, n_freqs) per dimension
+    exps: List[np.ndarray] = [
+        np.exp(1j * np.outer(inputs[:, j], frequencies)) for j in range(n_dims)
+    ]
+    letters = string.ascii_letters[: n_dims + 1]
+    n, freq_axes = letters[0], letters[1:]
+    subscripts = ",".join(n + f for f in freq_axes) + "," + freq_axes + "->" + n
+
+    values = np.einsum(subscripts, *exps, coefficients, optimize=True)
+    return np.real_if_close(values)
@@ -0,0 +1,403 @@
+"""
+Serializable model specification and picklable wrappers for the model parts.
+
+The `Model` of qml_essentials holds QNodes and devices, which cannot be
+pickled. Nodes therefore exchange a `ModelSpec` (plain data) and build the
+model where it is used, e.g. inside the worker process of a ParallelRunner.
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, fields, replace
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+import threading
+import logging
+import time
+import os
+
+import numpy as np
+import pennylane.numpy as pnp
+from qml_essentials.model import Model
+from qml_essentials.ansaetze import Gates
+import pennylane as qml
+from pennylane import Hadamard
+
+from effects_of_noise_in_qfm.helpers.noise import (
+    noise_options,
+    batch_gate_error,
+    set_gate_error_rng,
+)
+from effects_of_noise_in_qfm.helpers.telemetry import telemetry
+
+log = logging.getLogger(__name__)
+
+SELECTIVE_NOISE = ("both", "iec", "pqc")
+PRECISIONS = ("double", "single")
+
+
+def hadamard_state_preparation(wires, **kwargs):
+    """
+    State preparation of the "_Plus" circuits.
+    """
+    return Hadamard(wires)
+
+
+class _Wrapper:
+    """
+    Base class for picklable wrappers around the encoding and ansatz of a
+    model. Attributes (e.g. `get_control_indices` of an ansatz) are
+    delegated to the wrapped object.
+    """
+
+    def __init__(self, wrapped: Callable):
+        self.wrapped = wrapped
+
+    def __getattr__(self, name: str) -> Any:
+        # only called if the attribute is not found on the wrapper itself
+        if name == "wrapped":
+            raise AttributeError(name)
+        return getattr(self.wrapped, name)
+
+    def __call__(self, *args, **kwargs):
+        return self.wrapped(*args, **kwargs)
+
+
+class NoiseFree(_Wrapper):
+    """
+    Calls the wrapped encoding or ansatz without noise.
+    """
+
+    def __call__(self, *args, **kwargs):
+        kwargs["noise_params"] = None
+        return self.wrapped(*args, **kwargs)
+
+
+class ScopedAnsatz(_Wrapper):
+    """
+    Calls the wrapped ansatz with the gate error batching of the current
+    `noise_options`.
+    """
+
+    def __call__(self, *args, **kwargs):
+        with batch_gate_error(noise_options().batch_gate_error):
+            return self.wrapped(*args, **kwargs)
+
+
+class LayerMaskedAnsatz(_Wrapper):
+    """
+    Applies noise only to the given layers of the wrapped ansatz.
+    The model calls the ansatz once per (implicit) layer, so the layer is
+    given by the number of calls since the start of the circuit, which is
+    signalled by `reset` (installed as the first state preparation).
+    """
+
+    def __init__(self, wrapped: Callable, noise_layers: List[int]):
+        super().__init__(wrapped)
+        self.noise_layers = set(noise_layers)
+        self._layer = threading.local()
+
+    def reset(self, *args, **kwargs):
+        self._layer.index = 0
+
+    def __call__(self, *args, **kwargs):
+        layer = getattr(self._layer, "index", 0)
+        self._layer.index = layer + 1
+        if layer not in self.noise_layers:
+            kwargs["noise_params"] = None
+        return self.wrapped(*args, **kwargs)
+
+
+class InstrumentedModel(Model):
+    """
+    Model which records its executions (batch size, simulated state size and
+    duration) in the `telemetry`.
+    """
+
+    # bytes of a complex element of the simulated states
+    element_bytes = 16
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        result = super().__call__(*args, **kwargs)
+        telemetry.record(self, time.perf_counter() - start)
+        return result
+
+
+class SinglePrecisionModel(InstrumentedModel):
+    """
+    Model which simulates density matrices in single precision (complex64).
+    Parameters and inputs are cast to float32, such that the gate matrices
+    are complex64 as well.
+    """
+
+    element_bytes = 8
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        try:
+            device = qml.device(
+                "default.mixed",
+                shots=self.shots,
+                wires=self.n_qubits,
+                c_dtype=np.complex64,
+                r_dtype=np.float32,
+            )
+        except TypeError:
+            log.warning(
+                "The default.mixed device does not support single precision, "
+                "only the parameters, inputs and results are cast."
+            )
+        else:
+            self.circuit_mixed = qml.QNode(self._circuit, device)
+
+    def __call__(self, params=None, inputs=None, *args, **kwargs):
+        if params is not None:
+            params = qml.math.cast(params, np.float32)
+        if inputs is not None:
+            inputs = qml.math.cast(inputs, np.float32)
+        result = super().__call__(params, inputs, *args, **kwargs)
+        if qml.math.requires_grad(result):
+            return result
+        if np.iscomplexobj(result):
+            return np.asarray(result, dtype=np.complex64)
+        return np.asarray(result, dtype=np.float32)
+
+
+@dataclass
+class ModelSpec:
+    """
+    Plain-data specification of a `Model`, which can be passed between
+    Kedro nodes and processes and is turned into a model with `build`.
+
+    Besides the arguments of `Model`, the specification fixes where noise
+    is applied: `selective_noise` is one of "both", "iec" (input encoding
+    only) or "pqc" (ansatz only) and `noise_layers` optionally restricts the
+    noise of the ansatz to the given (implicit) layer indices.
+    """
+
+    n_qubits: int
+    n_layers: int
+    circuit_type: str
+    data_reupload: bool
+    initialization: str
+    initialization_domain: List[float]
+    encoding: Union[str, List[str]]
+    shots: Optional[int]
+    output_qubit: Union[int, List[int]]
+    seed: int
+    mp_threshold: int
+    selective_noise: str = "both"
+    noise_layers: Optional[List[int]] = None
+    precision: str = "double"
+
+    def __post_init__(self):
+        if self.selective_noise not in SELECTIVE_NOISE:
+            raise ValueError(
+                f"selective_noise must be 'both', 'iec' or 'pqc', "
+                f"got {self.selective_noise}"
+            )
+        if self.precision not in PRECISIONS:
+            raise ValueError(
+                f"precision must be 'double' or 'single', got {self.precision}"
+            )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    def structure(self) -> Hashable:
+        """
+        Key of everything that determines the circuit structure, i.e. all
+        fields except the seed, which only affects the initial parameters.
+        """
+
+        def _hashable(value):
+            if isinstance(value, list):
+                return tuple(_hashable(v) for v in value)
+            return value
+
+        return tuple(
+            (f.name, _hashable(getattr(self, f.name)))
+            for f in fields(self)
+            if f.name != "seed"
+        )
+
+    def build(self) -> Model:
+        """
+        Creates the model described by this specification.
+
+        Returns:
+            Model: The (freshly initialized) model, with noise applied as
+                specified and the gate error batching of the current
+                `noise_scope`.
+        """
+        circuit_type = self.circuit_type
+        if circuit_type[-5:] == "_Plus":
+            circuit_type = circuit_type[:-5]
+            sp = [hadamard_state_preparation]
+        else:
+            sp = None
+
+        model_class = (
+            SinglePrecisionModel if self.precision == "single" else InstrumentedModel
+        )
+        model = model_class(
+            n_qubits=self.n_qubits,
+            n_layers=self.n_layers,
+            circuit_type=circuit_type,
+            data_reupload=self.data_reupload,
+            output_qubit=self.output_qubit,
+            initialization=self.initialization,
+            initialization_domain=self.initialization_domain,
+            shots=self.shots,
+            random_seed=self.seed,
+            state_preparation=sp,
+            encoding=self.encoding,
+            mp_threshold=self.mp_threshold,
+        )
+        if self.selective_noise == "pqc":
+            if isinstance(model._enc, list):
+                model._enc = [NoiseFree(enc) for enc in model._enc]
+            else:
+                model._enc = NoiseFree(model._enc)
+
+        pqc = model.pqc
+        if self.selective_noise == "iec":
+            pqc = NoiseFree(pqc)
+        elif self.noise_layers is not None:
+            pqc = LayerMaskedAnsatz(pqc, self.noise_layers)
+            model._sp = [pqc.reset, *model._sp]
+        model.pqc = ScopedAnsatz(pqc)
+
+        return model
+
+
+class ModelCache:
+    """
+    Size-bounded LRU cache of built models, keyed by the structure of their
+    specification. Models are mutable (e.g. their parameters), therefore
+    each thread gets its own instances. The generator of the gate errors is
+    per thread as well (see helpers/noise.py), so resetting a model does not
+    affect the gate errors drawn by other threads.
+
+    Noise parameters are passed on each call of a model and are not part of
+    the key, so the same model is reused for all noise levels.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._models: "OrderedDict[Hashable, Model]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, spec: ModelSpec, reset: bool = True) -> Model:
+        """
+        Returns a model for the given specification.
+
+        Args:
+            spec (ModelSpec): The model specification.
+            reset (bool): Whether the model and the random number generator
+                of the gate errors are reset to the state of a freshly built
+                model (as in the constructor of the model). Otherwise a cached
+                model keeps its parameters and the generator is left as is,
+                e.g. for auxiliary models of a node.
+
+        Returns:
+            Model: The model.
+        """
+        key = (spec.structure(), threading.get_ident())
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if model is None:
+            rng = getattr(Gates, "rng", None)
+            model = spec.build()
+            if not reset and rng is not None:
+                # the constructor of the model re-initializes the generator
+                set_gate_error_rng(rng)
+            if self.maxsize > 0:
+                with self._lock:
+                    self._models[key] = model
+                    while len(self._models) > self.maxsize:
+                        self._models.popitem(last=False)
+        elif reset:
+            # same as in the constructor of the model
+            Gates.init_rng(spec.seed)
+            model.initialize_params(pnp.random.default_rng(spec.seed))
+
+        log.debug(f"Model cache: {self.info()}")
+        return model
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._models),
+            "maxsize": self.maxsize,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+model_cache = ModelCache(maxsize=int(os.environ.get("QFM_MODEL_CACHE_SIZE", 8)))
+
+
+def as_model(model: Union[ModelSpec, Model], reset: bool = True) -> Model:
+    """
+    Returns the (cached) model if a specification is given, which allows
+    the node functions to be called with either of both.
+
+    Args:
+        model (Union[ModelSpec, Model]): Model specification or model.
+        reset (bool): Whether a cached model is reset, see `ModelCache.get`.
+
+    Returns:
+        Model: The model.
+    """
+    if isinstance(model, ModelSpec):
+        return model_cache.get(model, reset=reset)
+    return model
+
+
+def precision_deviation(
+    spec: ModelSpec, params: np.ndarray, evaluate: Callable[[Model], Any]
+) -> float:
+    """
+    Evaluates the single and the double precision variant of a model with the
+    same parameters (and the same gate error seed) and returns the maximum
+    absolute deviation of the results. The parameters of the (cached) models
+    and the random number generator of the gate errors are restored, such
+    that the check does not affect the results of the calling node.
+
+    Args:
+        spec (ModelSpec): The model specification.
+        params (np.ndarray): Parameters of the compared samples.
+        evaluate (Callable[[Model], Any]): Computes the compared results.
+
+    Returns:
+        float: Maximum absolute deviation.
+    """
+    rng = getattr(Gates, "rng", None)
+    results = []
+    try:
+        for precision in PRECISIONS:
+            model = as_model(replace(spec, precision=precision), reset=False)
+            model_params = model.params
+            model.params = params
+            Gates.init_rng(spec.seed)
+            try:
+                results.append(np.asarray(evaluate(model), dtype=np.complex128))
+            finally:
+                model.params = model_params
+    finally:
+        if rng is not None:
+            set_gate_error_rng(rng)
+    return float(np.max(np.abs(results[0] - results[1])))
@@ -0,0 +1,139 @@
+"""
+Context-scoped noise options.
+
+qml_essentials reads the class attribute `Gates.batch_gate_error` while
+building the circuits. Toggling this attribute is not thread-safe, therefore
+it is replaced by a descriptor which reads the value from a `ContextVar`.
+Each thread (and each `contextvars.Context`) sees its own options, which are
+changed within a `noise_scope`.
+
+Likewise, the generator of the gate errors `Gates.rng` is replaced by one
+generator per thread, which `Gates.init_rng` (e.g. in the constructor of a
+model) seeds for the calling thread only.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Iterator
+import threading
+
+import numpy as np
+from qml_essentials.ansaetze import Gates
+
+
+@dataclass(frozen=True)
+class NoiseOptions:
+    """
+    Options on how noise is applied to the model during a call. Where noise
+    is applied is fixed when the model is built (see `ModelSpec`).
+
+    Args:
+        batch_gate_error (bool): Sample the gate errors of the ansatz
+            independently for each batch entry.
+    """
+
+    batch_gate_error: bool = True
+
+
+_options: ContextVar[NoiseOptions] = ContextVar("noise_options", default=NoiseOptions())
+# value of Gates.batch_gate_error, only disabled while an ansatz is executed
+_batch_gate_error: ContextVar[bool] = ContextVar("batch_gate_error", default=True)
+
+
+class _BatchGateError:
+    """
+    Descriptor replacing the class attribute `Gates.batch_gate_error`.
+    """
+
+    def __get__(self, obj, objtype=None) -> bool:
+        return _batch_gate_error.get()
+
+
+class _ThreadRng(threading.local):
+    def __init__(self):
+        # unseeded, as the class attribute of Gates
+        self.rng = np.random.default_rng()
+
+
+_rng = _ThreadRng()
+
+
+class _GateErrorRng:
+    """
+    Descriptor replacing the class attribute `Gates.rng`.
+    """
+
+    def __get__(self, obj, objtype=None) -> np.random.Generator:
+        return _rng.rng
+
+
+def _init_rng(seed: int):
+    """
+    Replaces `Gates.init_rng`: seeds the generator of the current thread.
+    """
+    _rng.rng = np.random.default_rng(seed)
+
+
+def set_gate_error_rng(rng: np.random.Generator):
+    """
+    Sets the generator of the gate errors of the current thread, e.g. to
+    restore it. Replaces assignments to `Gates.rng`.
+    """
+    _rng.rng = rng
+
+
+def install():
+    """
+    Replaces `Gates.batch_gate_error` with the context-scoped value and
+    `Gates.rng` with the generator of the current thread. Must not be
+    assigned directly afterwards.
+    """
+    if not isinstance(Gates.__dict__.get("batch_gate_error"), _BatchGateError):
+        Gates.batch_gate_error = _BatchGateError()
+    if not isinstance(Gates.__dict__.get("rng"), _GateErrorRng):
+        _rng.rng = Gates.__dict__["rng"]
+        Gates.rng = _GateErrorRng()
+        Gates.init_rng = staticmethod(_init_rng)
+
+
+def noise_options() -> NoiseOptions:
+    """
+    Returns the noise options of the current context.
+    """
+    return _options.get()
+
+
+@contextmanager
+def noise_scope(**options) -> Iterator[NoiseOptions]:
+    """
+    Changes the noise options (see `NoiseOptions`) within the current context.
+
+    Example:
+        with noise_scope(batch_gate_error=False):
+            Coefficients.get_spectrum(model, ...)
+
+    Yields:
+        NoiseOptions: The options within the scope.
+    """
+    token = _options.set(replace(_options.get(), **options))
+    try:
+        yield _options.get()
+    finally:
+        _options.reset(token)
+
+
+@contextmanager
+def batch_gate_error(enabled: bool) -> Iterator[None]:
+    """
+    Sets the value of `Gates.batch_gate_error` within the current context.
+    """
+    install()
+    token = _batch_gate_error.set(enabled)
+    try:
+        yield
+    finally:
+        _batch_gate_error.reset(token)
+
+
+install()
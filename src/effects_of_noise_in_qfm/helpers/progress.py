@@ -0,0 +1,182 @@
+"""
+Progress reporting of the nodes. Interactive sessions show rich progress
+bars. Batch jobs (QFM_BATCH_MODE=1 or no terminal) instead append throughput
+records as JSON lines to a file and log a summary at a low frequency, which
+keeps escape codes out of the job logs and per-item updates cheap.
+
+Example:
+    with create_progress() as progress:
+        task = progress.add_task("Sampling...", total=n_samples)
+        for batch in batches:
+            ...
+            progress.advance(task, advance=len(batch))
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, Optional, Union
+import json
+import logging
+import os
+import sys
+import time
+
+from rich.progress import Progress, track as rich_track
+
+from effects_of_noise_in_qfm.helpers.telemetry import telemetry
+from effects_of_noise_in_qfm.helpers.utils import batch_mode, rss_mb
+
+log = logging.getLogger(__name__)
+
+# seconds between the records in the file and between the log messages
+RECORD_INTERVAL = float(os.environ.get("QFM_PROGRESS_INTERVAL", 10))
+LOG_INTERVAL = 300
+
+
+def progress_file() -> str:
+    """
+    File of the progress records, given by QFM_PROGRESS_FILE or named after
+    the SLURM job (array task) or the process.
+    """
+    path = os.environ.get("QFM_PROGRESS_FILE")
+    if path:
+        return path
+    job = os.environ.get("SLURM_JOB_ID", str(os.getpid()))
+    if "SLURM_ARRAY_TASK_ID" in os.environ:
+        job = f"{os.environ['SLURM_ARRAY_JOB_ID']}_{os.environ['SLURM_ARRAY_TASK_ID']}"
+    return os.path.join("logs", "progress", f"progress-{job}.jsonl")
+
+
+class _Task:
+    def __init__(self, description: str, total: Optional[float]):
+        self.description = description
+        self.total = total
+        self.reset()
+
+    def reset(self):
+        self.completed = 0.0
+        self.start = time.monotonic()
+        self.last_completed = 0.0
+        self.last_time = self.start
+
+
+class ThroughputProgress:
+    """
+    Progress without output to the terminal, which supports the methods of
+    `rich.progress.Progress` used by the nodes. At most every
+    `record_interval` seconds, a record of the advanced task (completed
+    items, items per second since the last record, ETA, resident memory,
+    node and noise step) is appended to `path`, and at most every
+    `log_interval` seconds it is logged. When the progress is closed, the
+    mean rate of each task is recorded and logged.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        record_interval: float = RECORD_INTERVAL,
+        log_interval: float = LOG_INTERVAL,
+    ):
+        self.path = path or progress_file()
+        self.record_interval = record_interval
+        self.log_interval = log_interval
+        self.tasks: Dict[int, _Task] = dict()
+        self._file = None
+        self._last_record = float("-inf")
+        self._last_log = time.monotonic()
+
+    def __enter__(self) -> "ThroughputProgress":
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", buffering=1)
+        return self
+
+    def __exit__(self, *exc_info):
+        for task_id in self.tasks:
+            self._record(task_id, time.monotonic(), final=True)
+        self._file.close()
+        self._file = None
+
+    def add_task(self, description: str, total: Optional[float] = None) -> int:
+        task_id = len(self.tasks)
+        self.tasks[task_id] = _Task(description, total)
+        return task_id
+
+    def reset(self, task_id: int):
+        self.tasks[task_id].reset()
+
+    def update(self, task_id: int, advance: float = 0, **kwargs):
+        self.advance(task_id, advance)
+
+    def advance(self, task_id: int, advance: float = 1):
+        self.tasks[task_id].completed += advance
+        now = time.monotonic()
+        if now - self._last_record >= self.record_interval:
+            self._record(task_id, now)
+
+    def _record(self, task_id: int, now: float, final: bool = False):
+        task = self.tasks[task_id]
+        # the final record has the mean rate of the task
+        since, completed = (
+            (task.start, 0.0) if final else (task.last_time, task.last_completed)
+        )
+        elapsed = now - since
+        rate = (task.completed - completed) / elapsed if elapsed > 0 else 0
+        eta = None
+        if task.total is not None and rate > 0:
+            eta = max(task.total - task.completed, 0) / rate
+        node, step = telemetry.current()
+
+        record = {
+            "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "node": node,
+            "noise_step": step,
+            "task": task.description,
+            "completed": task.completed,
+            "total": task.total,
+            "rate": rate,
+            "eta_s": eta,
+            "rss_mb": round(rss_mb(), 1),
+            "final": final,
+        }
+        self._file.write(json.dumps(record) + "\n")
+        task.last_completed, task.last_time = task.completed, now
+        self._last_record = now
+
+        if final or now - self._last_log >= self.log_interval:
+            log.info(
+                f"{task.description} {task.completed:g}/{task.total}, "
+                f"{rate:.2f}/s, ETA {'-' if eta is None else f'{eta:.0f}s'}, "
+                f"RSS {record['rss_mb']}MB"
+            )
+            self._last_log = now
+
+
+def interactive() -> bool:
+    """
+    Whether progress is shown as rich progress bars.
+    """
+    return not batch_mode() and sys.stdout.isatty()
+
+
+def create_progress(**kwargs: Any) -> Union[Progress, ThroughputProgress]:
+    """
+    Progress bars in interactive sessions, throughput records otherwise.
+    The keyword arguments are passed to `ThroughputProgress`.
+    """
+    return Progress() if interactive() else ThroughputProgress(**kwargs)
+
+
+def track(
+    sequence: Iterable, description: str = "Working...", total: Optional[int] = None
+) -> Iterator:
+    """
+    Iterates over the sequence and reports the progress, as
+    `rich.progress.track`.
+    """
+    if interactive():
+        yield from rich_track(sequence, description=description, total=total)
+        return
+    with ThroughputProgress() as progress:
+        task = progress.add_task(description, total=total)
+        for item in sequence:
+            yield item
+            progress.advance(task)
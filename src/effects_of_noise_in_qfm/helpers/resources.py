@@ -0,0 +1,239 @@
+"""
+Estimates of the resources of a run from its resolved parameters, without
+running it: the number of circuit evaluations (density matrix simulations),
+the largest batch of density matrices simulated at once and the resulting
+peak memory. The estimates mirror the loops of the pipeline nodes and are
+meant to catch configurations which exceed the limits of a job before it is
+submitted, not to be exact.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+import math
+
+# memory of the process before any simulation (interpreter, PennyLane,
+# Kedro, MLflow), as measured for small runs
+BASE_MEMORY_MB = 350
+# copies of a batch of density matrices alive while a gate is applied
+# (state, result and intermediate of the contraction)
+SIMULATION_COPIES = 3
+# Python float in a list, as the sample columns of the coefficient frames
+PYTHON_FLOAT_BYTES = 32
+BYTES_PER_ELEMENT = {"double": 16, "single": 8}
+
+
+@dataclass
+class Resources:
+    """
+    Resources of a run of a pipeline.
+
+    Args:
+        pipeline (str): Name of the pipeline.
+        evaluations (int): Circuit evaluations (density matrices) over all
+            noise levels.
+        batch (int): Largest number of density matrices simulated at once.
+        density_matrix_bytes (int): Size of a single density matrix.
+        peak_memory_mb (float): Estimated peak memory.
+        seconds (Optional[float]): Estimated wall time, see
+            `schedule.CostModel`.
+        details (Dict[str, Any]): Sizes the estimate is based on.
+    """
+
+    pipeline: str
+    evaluations: int
+    batch: int
+    density_matrix_bytes: int
+    peak_memory_mb: float
+    seconds: Optional[float] = None
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def report(self) -> List[str]:
+        lines = [
+            f"pipeline:             {self.pipeline}",
+            f"circuit evaluations:  {self.evaluations:,}",
+            f"largest batch:        {self.batch:,} density matrices",
+            f"density matrix:       {_size(self.density_matrix_bytes)}",
+            f"peak memory:          {_size(self.peak_memory_mb * 2**20)}",
+        ]
+        if self.seconds is not None:
+            lines.append(f"wall time:            {_duration(self.seconds)}")
+        lines.extend(f"  {k}: {v:,}" for k, v in self.details.items())
+        return lines
+
+
+def _size(n_bytes: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if n_bytes < 1024:
+            return f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
+    return f"{n_bytes:.1f} TB"
+
+
+def _duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(math.ceil(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def spectrum_size(degree: int, n_input_feat: int, mts: int = 1) -> int:
+    """
+    Number of inputs on which the spectrum is evaluated, see
+    `coefficients.spectrum_inputs`.
+    """
+    return (2 * degree * mts + 1) ** n_input_feat
+
+
+def model_degree(model: Dict[str, Any]) -> int:
+    """
+    Maximum frequency of the model: one per encoding layer and qubit with
+    data re-uploading, as in qml_essentials.
+    """
+    return model["n_qubits"] * model["n_layers"] if model["data_reupload"] else 1
+
+
+def n_noise_levels(model: Dict[str, Any]) -> int:
+    """
+    Number of noise levels, an upper bound for the adaptive sweep.
+    """
+    sweep = model.get("noise_sweep") or dict()
+    levels = model["noise_steps"] + 1
+    if sweep.get("mode", "uniform") == "adaptive":
+        coarse_levels = sweep.get("coarse_steps", 2) + 1
+        levels = max(sweep.get("max_evaluations") or levels, coarse_levels)
+    return levels
+
+
+def n_domain_samples(data: Dict[str, Any], n_input_feat: int) -> int:
+    """
+    Number of training inputs, see `data_generation.sample_domain`.
+    """
+    if data["sampling"] in ("sobol", "halton"):
+        return data["n_points"]
+    omegas = data["omegas"]
+    max_omega = omegas if isinstance(omegas, int) else max(omegas)
+    n_d = int(math.ceil(2 * max(abs(d) for d in data["domain"]) * max_omega))
+    return n_d**n_input_feat
+
+
+def _scaled(n_samples: int, n_qubits: int, scale: bool) -> int:
+    return int(2**n_qubits * n_samples) if scale else n_samples
+
+
+def _shard_count(params: Dict[str, Any]) -> int:
+    shard = (params.get("sharding") or dict()).get("shard") or "0/1"
+    return int(str(shard).split("/")[1])
+
+
+def estimate_resources(
+    pipeline: str, params: Dict[str, Any], seconds: Optional[float] = None
+) -> Resources:
+    """
+    Estimates the resources of a run of a pipeline.
+
+    Args:
+        pipeline (str): Name of the pipeline, e.g. "coefficients" or
+            "entanglement_shard". "__default__" is estimated as "training".
+        params (Dict[str, Any]): Resolved (nested) parameters.
+        seconds (Optional[float]): Estimated wall time.
+
+    Returns:
+        Resources: The estimate.
+    """
+    kind = "training" if pipeline == "__default__" else pipeline.split("_")[0]
+    model = params["model"]
+    n_qubits = model["n_qubits"]
+    precision = model.get("precision", "double")
+    if precision not in BYTES_PER_ELEMENT:
+        raise ValueError(f"precision must be 'double' or 'single', got {precision}")
+    dm_bytes = 4**n_qubits * BYTES_PER_ELEMENT[precision]
+
+    encoding = model["encoding"]
+    n_input_feat = len(encoding) if isinstance(encoding, list) else 1
+    degree = model_degree(model)
+    levels = n_noise_levels(model)
+    sequential = params.get("sequential") or dict()
+    # samples of a single shard
+    shards = _shard_count(params) if pipeline.endswith("_shard") else 1
+
+    results_bytes = 0
+    copies = SIMULATION_COPIES
+    if pipeline.endswith("_merge") or kind == "visualization":
+        evaluations, batch, details = 0, 0, dict()
+    elif kind == "coefficients":
+        c = params["coefficients"]
+        n_samples = _scaled(c["n_samples"], n_qubits, c["scale"]) // shards
+        grid = spectrum_size(degree, n_input_feat, c.get("oversampling", 1))
+        evaluations = levels * n_samples * grid
+        # all grid points of a batch of samples are simulated at once
+        batch_size = sequential.get("batch_size") if sequential.get("enabled") else 0
+        batch = grid * min(batch_size or n_samples, n_samples)
+        # real and imaginary part of all samples are kept in the results
+        results_bytes = levels * n_samples * grid * 2 * PYTHON_FLOAT_BYTES
+        details = dict(samples=n_samples, noise_levels=levels, spectrum_size=grid)
+    elif kind == "entanglement":
+        e = params["entanglement"]
+        n_samples = _scaled(e["n_samples"], n_qubits, e["scale"]) // shards
+        evaluations = levels * n_samples
+        batched = e.get("backend") == "batched" or pipeline.endswith("_shard")
+        batch = n_samples if batched else 1
+        details = dict(samples=n_samples, noise_levels=levels)
+    elif kind == "expressibility":
+        e = params["expressibility"]
+        # the fidelity samples are always scaled with 2**n_qubits
+        n_samples = _scaled(e["n_samples"], n_qubits, True) // shards
+        n_inputs = max(e.get("n_input_samples") or 0, 1)
+        evaluations = levels * n_inputs * 2 * n_samples
+        # pairs of states, for two inputs at a time with input samples
+        batch = 2 * n_samples * min(n_inputs, 2)
+        details = dict(samples=n_samples, noise_levels=levels, inputs=n_inputs)
+    elif kind == "analysis":
+        c, e, x = (
+            params["coefficients"],
+            params["entanglement"],
+            params["expressibility"],
+        )
+        n_coeffs = _scaled(c["n_samples"], n_qubits, c["scale"])
+        n_total = max(
+            n_coeffs,
+            _scaled(e["n_samples"], n_qubits, e["scale"]),
+            2 * _scaled(x["n_samples"], n_qubits, True),
+        )
+        grid = spectrum_size(degree, n_input_feat, c.get("oversampling", 1))
+        evaluations = levels * (n_total + grid * n_coeffs)
+        batch = max(n_total, 2 * n_coeffs)
+        results_bytes = levels * n_coeffs * grid * 2 * PYTHON_FLOAT_BYTES
+        details = dict(samples=n_total, noise_levels=levels, spectrum_size=grid)
+    elif kind == "training":
+        t = params["training"]
+        n_inputs = n_domain_samples(params["data"], n_input_feat)
+        grid = spectrum_size(degree, n_input_feat)
+        # per step: entangling capability, spectrum and cost on all inputs
+        evaluations = levels * t["steps"] * (1 + grid + n_inputs)
+        chunk = params["data"].get("chunk_size") or n_inputs
+        batch = (
+            min(chunk, n_inputs)
+            if params["data"]["sampling"] == "chunked"
+            else n_inputs
+        )
+        # backpropagation keeps the states after each operation (encoding,
+        # rotations and entangling gates per layer and qubit, each followed
+        # by a noise channel) for the gradient
+        copies = 2 * 3 * n_qubits * (model["n_layers"] + 1)
+        details = dict(
+            steps=t["steps"], noise_levels=levels, inputs=n_inputs, spectrum_size=grid
+        )
+    else:
+        raise ValueError(f"Cannot estimate the resources of pipeline {pipeline}")
+
+    peak_memory_mb = (
+        BASE_MEMORY_MB + (batch * dm_bytes * copies + results_bytes) / 2**20
+    )
+    return Resources(
+        pipeline=pipeline,
+        evaluations=evaluations,
+        batch=batch,
+        density_matrix_bytes=dm_bytes,
+        peak_memory_mb=peak_memory_mb,
+        seconds=seconds,
+        details=details,
+    )
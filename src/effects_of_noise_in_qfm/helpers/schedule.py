@@ -0,0 +1,515 @@
+"""
+Cost-aware scheduling of sweeps. The runtime and peak memory of each
+configuration are estimated from the finished runs in the tracking store, and
+the configurations are packed longest first into SLURM job scripts or run by
+a local worker pool.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import ast
+import itertools
+import logging
+import math
+import os
+import subprocess
+import sys
+import time
+
+import mlflow
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+# parameter with the number of samples (training steps) of each pipeline
+SAMPLES_PARAMS = {
+    "coefficients": "coefficients.n_samples",
+    "expressibility": "expressibility.n_samples",
+    "entanglement": "entanglement.n_samples",
+    "analysis": "coefficients.n_samples",
+    "training": "training.steps",
+}
+
+# prior seconds per sample, noise level, layer and 4**n_qubits (density
+# matrix size), used for pipelines without history
+PRIOR_SECONDS = 1e-4
+
+SLURM_TEMPLATE = """#!/bin/bash
+#
+# generated by `kedro schedule`, configurations are run longest first
+#
+#SBATCH --job-name={name}
+#SBATCH --nodes=1
+#SBATCH --ntasks=6
+#SBATCH --time={time}
+#SBATCH --partition cpu
+#SBATCH --mem={memory}MB
+#SBATCH --output="logs/slurm/slurm-%j-%x.out"
+
+module load devel/python/3.11.7
+# skip interactive-only startup work (e.g. the kedro-viz session store)
+export QFM_BATCH_MODE=1
+
+{commands}
+
+# Done
+exit 0
+"""
+
+
+@dataclass
+class Config:
+    """
+    A run of a pipeline with parameters overriding the configuration.
+
+    Args:
+        pipeline (str): Name of the pipeline.
+        params (Dict[str, Any]): Parameters as passed to `--params`, e.g.
+            {"model.n_qubits": 4}.
+    """
+
+    pipeline: str
+    params: Dict[str, Any] = field(default_factory=dict)
+
+    def params_string(self) -> str:
+        return ",".join(f"{k}={v}" for k, v in self.params.items())
+
+    def command(self, python: str = sys.executable) -> List[str]:
+        command = [python, "-m", "kedro", "run", "--pipeline", self.pipeline]
+        if self.params:
+            command.append(f"--params={self.params_string()}")
+        return command
+
+    def __str__(self) -> str:
+        return f"{self.pipeline}({self.params_string()})"
+
+
+@dataclass
+class Estimate:
+    seconds: float
+    memory_mb: Optional[float] = None
+
+
+@dataclass
+class Job:
+    """
+    Configurations which are run one after another, e.g. in a SLURM job.
+    """
+
+    configs: List[Config] = field(default_factory=list)
+    estimates: List[Estimate] = field(default_factory=list)
+
+    @property
+    def seconds(self) -> float:
+        return sum(e.seconds for e in self.estimates)
+
+    @property
+    def memory_mb(self) -> Optional[float]:
+        memory = [e.memory_mb for e in self.estimates]
+        return None if None in memory or not memory else max(memory)
+
+    def add(self, config: Config, estimate: Estimate):
+        self.configs.append(config)
+        self.estimates.append(estimate)
+
+
+def parse_value(value: str) -> Any:
+    """
+    Converts a command line value to int or float if possible.
+    """
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    return value
+
+
+def grid(
+    pipelines: Sequence[str],
+    sweeps: Dict[str, Sequence[Any]],
+    fixed: Optional[Dict[str, Any]] = None,
+    noise_level: float = 0.03,
+) -> List[Config]:
+    """
+    Configurations of the Cartesian product of the sweeps.
+
+    Args:
+        pipelines (Sequence[str]): Pipelines to run for each combination.
+        sweeps (Dict[str, Sequence[Any]]): Values per parameter. Keys joined
+            by "+" set several parameters to the same value (e.g.
+            "model.n_qubits+data.omegas") and the key "noise" sweeps over
+            noise types, each with `noise_level`.
+        fixed (Optional[Dict[str, Any]]): Parameters of all configurations.
+        noise_level (float): Noise level of the "noise" sweep.
+
+    Returns:
+        List[Config]: The configurations.
+    """
+    configs = []
+    keys = list(sweeps)
+    for values in itertools.product(*[sweeps[k] for k in keys]):
+        params = dict(fixed or {})
+        for key, value in zip(keys, values):
+            if key == "noise":
+                params[f"model.noise_params.{value}"] = noise_level
+            else:
+                params.update({k: value for k in key.split("+")})
+        configs.extend(Config(p, dict(params)) for p in pipelines)
+    return configs
+
+
+def _lookup(params: Dict[str, Any], defaults: Dict[str, Any], key: str) -> Any:
+    if key in params:
+        return params[key]
+    value = defaults
+    for part in key.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _noise_type(noise_params: Dict[str, Any]) -> str:
+    present = sorted(k for k, v in noise_params.items() if v)
+    return "+".join(present) or "noiseless"
+
+
+def features(
+    pipeline: str, params: Dict[str, Any], defaults: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Features of the cost model of a run.
+
+    Args:
+        pipeline (str): Name of the pipeline.
+        params (Dict[str, Any]): Flat parameters, either the overrides of a
+            configuration or the parameters logged to MLflow (where
+            `model.noise_params` is a string).
+        defaults (Optional[Dict[str, Any]]): Nested parameters for the keys
+            which are not in `params`.
+
+    Returns:
+        Dict[str, Any]: n_qubits, n_layers, circuit_type, noise_type,
+            n_samples and noise_steps.
+    """
+    defaults = defaults or {}
+    kind = pipeline.split("_")[0]
+
+    noise_params = _lookup(params, defaults, "model.noise_params") or {}
+    if isinstance(noise_params, str):
+        noise_params = ast.literal_eval(noise_params)
+    noise_params = dict(noise_params)
+    prefix = "model.noise_params."
+    noise_params.update(
+        {k[len(prefix) :]: v for k, v in params.items() if k.startswith(prefix)}
+    )
+
+    n_samples = float(_lookup(params, defaults, SAMPLES_PARAMS.get(kind, "")) or 1)
+    shard = _lookup(params, defaults, "sharding.shard")
+    if pipeline.endswith("_shard") and shard:
+        n_samples /= int(str(shard).split("/")[1])
+
+    return {
+        "n_qubits": int(float(_lookup(params, defaults, "model.n_qubits") or 1)),
+        "n_layers": int(float(_lookup(params, defaults, "model.n_layers") or 1)),
+        "circuit_type": str(_lookup(params, defaults, "model.circuit_type")),
+        "noise_type": _noise_type(
+            {
+                k: parse_value(v) if isinstance(v, str) else v
+                for k, v in noise_params.items()
+            }
+        ),
+        "n_samples": n_samples,
+        "noise_steps": int(float(_lookup(params, defaults, "model.noise_steps") or 0)),
+    }
+
+
+def load_history(experiment_ids: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Features, duration (s) and peak memory (MB, logged by the ResourceHooks)
+    of the finished runs in the tracking store.
+
+    Args:
+        experiment_ids (Optional[List[str]]): Experiments to search, all if
+            None.
+
+    Returns:
+        pd.DataFrame: One row per run, with the pipeline and the features.
+    """
+    runs = mlflow.search_runs(
+        experiment_ids,
+        filter_string="attributes.status = 'FINISHED'",
+        search_all_experiments=experiment_ids is None,
+    )
+    rows = []
+    for _, run in runs.iterrows():
+        pipeline = run.get("tags.pipeline_name")
+        if not isinstance(pipeline, str) or pd.isna(run.get("end_time")):
+            continue
+        params = {
+            k[len("params.") :]: v
+            for k, v in run.items()
+            if k.startswith("params.") and isinstance(v, str)
+        }
+        try:
+            row = features(pipeline, params)
+        except (ValueError, SyntaxError) as e:
+            log.debug(f"Skipping run {run['run_id']}: {e}")
+            continue
+        row.update(
+            pipeline=pipeline,
+            duration=(run["end_time"] - run["start_time"]).total_seconds(),
+            memory=run.get("metrics.peak_memory_mb", np.nan),
+        )
+        rows.append(row)
+    log.info(f"Loaded {len(rows)} finished runs")
+    return pd.DataFrame(rows)
+
+
+class CostModel:
+    """
+    Log-linear regression of the duration and peak memory of the runs of a
+    pipeline on n_qubits, log(n_layers), log(n_samples), log(noise_steps + 1)
+    and the one-hot encoded circuit and noise type.
+
+    The duration is regressed relative to the prior scaling of the
+    simulation cost (n_samples * (noise_steps + 1) * n_layers * 4**n_qubits)
+    with a ridge penalty, so a few runs suffice and features without
+    variation in the history (e.g. a single qubit count) follow the prior.
+    Unknown categories are predicted as the average category. Pipelines
+    with fewer than `min_runs` runs fall back to the prior. Runs shorter than
+    `min_duration` seconds are dominated by the startup and not used.
+
+    Example:
+        model = CostModel().fit(load_history())
+        model.predict("coefficients", features(...)).seconds
+    """
+
+    NUMERIC = ["n_qubits", "n_layers", "n_samples", "noise_steps"]
+    CATEGORICAL = ["circuit_type", "noise_type"]
+
+    def __init__(self, ridge: float = 0.1, min_runs: int = 3, min_duration: float = 60):
+        self.ridge = ridge
+        self.min_runs = min_runs
+        self.min_duration = min_duration
+        # pipeline -> target -> (categories, weights)
+        self.models: Dict[str, Dict[str, Any]] = dict()
+
+    @staticmethod
+    def _prior(f: Dict[str, Any]) -> float:
+        return math.log(
+            PRIOR_SECONDS
+            * f["n_samples"]
+            * (f["noise_steps"] + 1)
+            * f["n_layers"]
+            * 4 ** f["n_qubits"]
+        )
+
+    @classmethod
+    def _row(cls, f: Dict[str, Any], categories: Dict[str, List[str]]) -> List[float]:
+        row = [
+            1.0,
+            f["n_qubits"],
+            math.log(f["n_layers"]),
+            math.log(f["n_samples"]),
+            math.log(f["noise_steps"] + 1),
+        ]
+        for c in cls.CATEGORICAL:
+            row.extend(float(f[c] == value) for value in categories[c])
+        return row
+
+    def _fit(self, runs: pd.DataFrame, target: np.ndarray, offset: np.ndarray):
+        categories = {c: sorted(runs[c].unique()) for c in self.CATEGORICAL}
+        X = np.array([self._row(f, categories) for f in runs.to_dict("records")])
+        penalty = self.ridge * np.eye(X.shape[1])
+        penalty[0, 0] = 0  # the intercept is not penalized
+        weights = np.linalg.solve(X.T @ X + penalty, X.T @ (target - offset))
+        return categories, weights
+
+    def fit(self, history: pd.DataFrame) -> "CostModel":
+        """
+        Fits the models of all pipelines in the history (see
+        `load_history`).
+        """
+        for pipeline, runs in history.groupby("pipeline"):
+            runs = runs[runs["duration"] >= self.min_duration]
+            if len(runs) < self.min_runs:
+                continue
+            records = runs.to_dict("records")
+            models = {
+                "duration": self._fit(
+                    runs,
+                    np.log(runs["duration"].to_numpy()),
+                    np.array([self._prior(f) for f in records]),
+                )
+            }
+            with_memory = runs[runs["memory"].notna() & (runs["memory"] > 0)]
+            if len(with_memory) >= self.min_runs:
+                models["memory"] = self._fit(
+                    with_memory,
+                    np.log(with_memory["memory"].to_numpy()),
+                    np.zeros(len(with_memory)),
+                )
+            self.models[pipeline] = models
+            log.debug(f"Fitted cost model of {pipeline} on {len(runs)} runs")
+        return self
+
+    def predict(self, pipeline: str, f: Dict[str, Any]) -> Estimate:
+        """
+        Estimated duration and peak memory (None if unknown) of a run with
+        features `f`.
+        """
+        models = self.models.get(pipeline)
+        if models is None:
+            log.warning(f"No history of {pipeline}, using the prior cost")
+            return Estimate(math.exp(self._prior(f)))
+
+        categories, weights = models["duration"]
+        seconds = math.exp(self._prior(f) + self._row(f, categories) @ weights)
+        memory_mb = None
+        if "memory" in models:
+            categories, weights = models["memory"]
+            memory_mb = math.exp(self._row(f, categories) @ weights)
+        return Estimate(seconds, memory_mb)
+
+
+def estimate(
+    configs: List[Config], model: CostModel, defaults: Dict[str, Any]
+) -> List[Estimate]:
+    return [
+        model.predict(c.pipeline, features(c.pipeline, c.params, defaults))
+        for c in configs
+    ]
+
+
+def pack(
+    configs: List[Config],
+    estimates: List[Estimate],
+    n_jobs: int = 1,
+    time_limit: Optional[float] = None,
+) -> List[Job]:
+    """
+    Longest processing time first packing: configurations are assigned in
+    order of decreasing duration to the job with the least load. If this
+    would exceed the time limit, a new job is opened instead.
+
+    Args:
+        configs (List[Config]): Configurations.
+        estimates (List[Estimate]): Their estimates.
+        n_jobs (int): Minimum number of jobs.
+        time_limit (Optional[float]): Maximum duration of a job in seconds.
+
+    Returns:
+        List[Job]: Non-empty jobs, each with configurations longest first.
+    """
+    jobs = [Job() for _ in range(max(n_jobs, 1))]
+    for i in sorted(range(len(configs)), key=lambda i: -estimates[i].seconds):
+        job = min(jobs, key=lambda j: j.seconds)
+        if time_limit is not None and estimates[i].seconds > time_limit:
+            log.warning(
+                f"{configs[i]} is estimated to exceed the time limit "
+                f"({estimates[i].seconds:.0f}s)"
+            )
+        if (
+            time_limit is not None
+            and job.configs
+            and job.seconds + estimates[i].seconds > time_limit
+        ):
+            job = Job()
+            jobs.append(job)
+        job.add(configs[i], estimates[i])
+    return [j for j in jobs if j.configs]
+
+
+def slurm_time(seconds: float) -> str:
+    """
+    Formats a duration as SLURM time limit (hh:mm:ss), rounded up to minutes.
+    """
+    minutes = math.ceil(seconds / 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}:00"
+
+
+def write_slurm_jobs(
+    jobs: List[Job],
+    directory: str = "slurm/scheduled",
+    name: str = "effects-of-noise",
+    safety: float = 1.5,
+    min_seconds: float = 600,
+    default_memory_mb: int = 32000,
+    python: str = "~/effect-of-noise-in-qfms/.venv/bin/python",
+) -> List[str]:
+    """
+    Writes a job script per job, which requests the estimated duration and
+    peak memory times `safety` (`default_memory_mb` if unknown).
+
+    Returns:
+        List[str]: Paths of the scripts.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i, job in enumerate(jobs):
+        commands = "\n".join(
+            f"# estimated {e.seconds:.0f}s\n"
+            f'{python} -m kedro run --pipeline {c.pipeline} --params="{c.params_string()}"'
+            for c, e in zip(job.configs, job.estimates)
+        )
+        memory = job.memory_mb
+        path = os.path.join(directory, f"{name}-{i}.sh")
+        with open(path, "w") as f:
+            f.write(
+                SLURM_TEMPLATE.format(
+                    name=f"{name}-{i}",
+                    time=slurm_time(max(job.seconds * safety, min_seconds)),
+                    memory=(
+                        default_memory_mb
+                        if memory is None
+                        else math.ceil(memory * safety)
+                    ),
+                    commands=commands,
+                )
+            )
+        os.chmod(path, 0o755)
+        paths.append(path)
+    return paths
+
+
+def run_local(
+    configs: List[Config],
+    estimates: List[Estimate],
+    workers: int = 1,
+    command: Callable[[Config], List[str]] = Config.command,
+) -> List[int]:
+    """
+    Runs the configurations in a pool of `workers` processes, longest first
+    (a free worker takes the longest remaining configuration), e.g. to test
+    a schedule locally.
+
+    Args:
+        configs (List[Config]): Configurations.
+        estimates (List[Estimate]): Their estimates.
+        workers (int): Number of concurrent runs.
+        command (Callable[[Config], List[str]]): Command line of a
+            configuration.
+
+    Returns:
+        List[int]: Return codes, in the order of `configs`.
+    """
+    env = dict(os.environ, QFM_BATCH_MODE="1")
+
+    def run(i: int) -> int:
+        start = time.perf_counter()
+        result = subprocess.run(command(configs[i]), env=env)
+        log.info(
+            f"Finished {configs[i]} with code {result.returncode} in "
+            f"{time.perf_counter() - start:.0f}s "
+            f"(estimated {estimates[i].seconds:.0f}s)"
+        )
+        return result.returncode
+
+    order = sorted(range(len(configs)), key=lambda i: -estimates[i].seconds)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        codes = dict(zip(order, pool.map(run, order)))
+    return [codes[i] for i in range(len(configs))]
@@ -0,0 +1,123 @@
+"""
+Sequential sampling: samples are drawn in batches until the confidence
+interval of the estimated statistic is narrow enough.
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterator, Optional
+import numpy as np
+import logging
+
+log = logging.getLogger(__name__)
+
+# two-sided standard normal quantiles
+_Z = {0.9: 1.6449, 0.95: 1.9600, 0.99: 2.5758}
+
+
+@dataclass
+class SequentialSampling:
+    """
+    Stopping rule for sequential sampling. Sampling stops as soon as the
+    half width of the confidence interval of the statistic is at most
+    `rtol` times its absolute value (for all entries of a vector-valued
+    statistic) or `max_samples` samples were drawn.
+
+    Args:
+        enabled (bool): Use sequential sampling. Otherwise all samples are
+            drawn at once.
+        batch_size (int): Number of samples drawn at once.
+        rtol (float): Relative tolerance of the confidence interval.
+        method (str): "se" (normal approximation using the standard error of
+            the mean) or "bootstrap" (percentile bootstrap of the statistic).
+        confidence (float): Confidence level, 0.9, 0.95 or 0.99.
+        n_bootstrap (int): Number of bootstrap resamples.
+        seed (Optional[int]): Seed for the bootstrap resampling.
+    """
+
+    enabled: bool = False
+    batch_size: int = 32
+    rtol: float = 0.05
+    method: str = "se"
+    confidence: float = 0.95
+    n_bootstrap: int = 200
+    seed: Optional[int] = None
+
+    def __post_init__(self):
+        if self.method not in ("se", "bootstrap"):
+            raise ValueError(f"method must be 'se' or 'bootstrap', got {self.method}")
+        if self.confidence not in _Z:
+            raise ValueError(
+                f"confidence must be one of {list(_Z.keys())}, got {self.confidence}"
+            )
+
+    def batches(self, max_samples: int) -> Iterator[int]:
+        """
+        Yields the sizes of the batches to draw, i.e. a single batch of
+        max_samples if sequential sampling is disabled.
+        """
+        if not self.enabled:
+            yield max_samples
+            return
+        for start in range(0, max_samples, self.batch_size):
+            yield min(self.batch_size, max_samples - start)
+
+    def half_width(
+        self,
+        samples: np.ndarray,
+        statistic: Callable[[np.ndarray], np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Half width of the confidence interval of the statistic.
+
+        Args:
+            samples (np.ndarray): Samples of shape (n_samples, ...).
+            statistic (Callable[[np.ndarray], np.ndarray]): Statistic over the
+                first axis, the mean by default. Must be the mean for "se".
+
+        Returns:
+            np.ndarray: Half widths of shape (...).
+        """
+        n = samples.shape[0]
+        if self.method == "se":
+            if statistic is not None:
+                raise ValueError("method 'se' only supports the mean")
+            return _Z[self.confidence] * samples.std(axis=0, ddof=1) / np.sqrt(n)
+
+        statistic = statistic or (lambda x: x.mean(axis=0))
+        rng = np.random.default_rng(self.seed)
+        estimates = np.stack(
+            [statistic(samples[rng.integers(0, n, n)]) for _ in range(self.n_bootstrap)]
+        )
+        alpha = (1 - self.confidence) / 2
+        low, high = np.quantile(estimates, [alpha, 1 - alpha], axis=0)
+        return (high - low) / 2
+
+    def relative_half_width(
+        self,
+        samples: np.ndarray,
+        statistic: Callable[[np.ndarray], np.ndarray] = None,
+    ) -> float:
+        """
+        Maximum half width of the confidence interval relative to the
+        absolute value of the statistic.
+        """
+        if samples.shape[0] < 2:
+            return np.inf
+        estimate = (statistic or (lambda x: x.mean(axis=0)))(samples)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            relative = self.half_width(samples, statistic) / np.abs(estimate)
+        # statistics which are exactly zero (e.g. noiseless limits) are exact
+        relative = np.where(np.abs(estimate) > 0, relative, 0.0)
+        return float(np.max(relative))
+
+    def converged(
+        self,
+        samples: np.ndarray,
+        statistic: Callable[[np.ndarray], np.ndarray] = None,
+    ) -> bool:
+        """
+        Whether the sampling can be stopped.
+        """
+        if not self.enabled:
+            return False
+        return self.relative_half_width(samples, statistic) <= self.rtol
@@ -0,0 +1,160 @@
+"""
+Sharding of the parameter samples of a configuration over several runs (e.g.
+the tasks of a SLURM array job). Each shard processes a contiguous slice of the
+samples of every noise level and saves mergeable partial results, which the
+merge pipelines combine into the results of an unsharded run. Gate errors
+(GateError noise) are the exception, as each shard draws its own.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import pickle
+import logging
+
+import mlflow
+
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.helpers.sequential import SequentialSampling
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Shard:
+    """
+    Slice `index` (0-based) of `count` of the parameter samples.
+
+    Example:
+        shard = Shard.parse("3/16")
+        model.params = model.params[..., shard.samples(n_samples)]
+    """
+
+    index: int
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1 or not 0 <= self.index < self.count:
+            raise ValueError(f"Invalid shard {self.index}/{self.count}")
+
+    @classmethod
+    def parse(cls, shard: str) -> "Shard":
+        """
+        Parses a shard given as "i/N".
+        """
+        try:
+            index, count = (int(s) for s in str(shard).split("/"))
+        except ValueError:
+            raise ValueError(f"shard must be given as 'i/N', got {shard}")
+        return cls(index, count)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    def samples(self, n_samples: int) -> slice:
+        """
+        The samples of this shard. The slices of all shards partition
+        range(n_samples) in order.
+        """
+        if n_samples < self.count:
+            raise ValueError(f"Cannot split {n_samples} samples into {self.count}")
+        return slice(
+            self.index * n_samples // self.count,
+            (self.index + 1) * n_samples // self.count,
+        )
+
+
+def shard_from_params(shard: str, group: Optional[str]) -> Shard:
+    """
+    Parses the sharding parameters of a shard run.
+    """
+    if group is None:
+        raise ValueError("sharding.group is required to merge the shards")
+    return Shard.parse(shard)
+
+
+def check_shardable(sweep: NoiseSweep, sampling: Optional[SequentialSampling] = None):
+    """
+    Raises a ValueError if the options depend on the results of all samples,
+    which the shards cannot agree on.
+    """
+    if sweep.mode != "uniform":
+        raise ValueError("Sharding requires the 'uniform' noise sweep")
+    if sampling is not None and sampling.enabled:
+        raise ValueError("Sharding does not support sequential sampling")
+
+
+def load_partials(group: str, pipeline_name: str, dataset: str) -> List[Dict]:
+    """
+    Loads the partial results of all shards of a group, which are searched
+    among the finished runs of the current experiment.
+
+    Args:
+        group (str): Value of `sharding.group` of the shards.
+        pipeline_name (str): Pipeline of the shards, e.g. "coefficients_shard".
+        dataset (str): Name of the partial results dataset.
+
+    Returns:
+        List[Dict]: Partial results, ordered by shard index.
+    """
+    if group is None:
+        raise ValueError("sharding.group is required to merge shards")
+
+    experiment_id = mlflow.active_run().info.experiment_id
+    runs = mlflow.search_runs(
+        [experiment_id],
+        filter_string=(
+            f"params.`sharding.group` = '{group}' "
+            f"and tags.pipeline_name = '{pipeline_name}' "
+            "and attributes.status = 'FINISHED'"
+        ),
+        order_by=["attributes.start_time ASC"],
+    )
+    if len(runs) == 0:
+        raise ValueError(f"No finished {pipeline_name} runs of group {group}")
+
+    # repeated shards (e.g. resubmitted tasks) are taken from the latest run
+    run_ids: Dict[int, str] = dict()
+    counts = set()
+    for run_id, spec in zip(runs["run_id"], runs["params.sharding.shard"]):
+        shard = Shard.parse(spec)
+        counts.add(shard.count)
+        run_ids[shard.index] = run_id
+    if len(counts) > 1:
+        raise ValueError(f"Group {group} mixes shard counts {sorted(counts)}")
+
+    count = counts.pop()
+    missing = sorted(set(range(count)) - set(run_ids))
+    if missing:
+        raise ValueError(f"Group {group} is missing shards {missing} of {count}")
+
+    partials = []
+    for index in range(count):
+        path = mlflow.artifacts.download_artifacts(
+            run_id=run_ids[index], artifact_path=f"{dataset}.pkl"
+        )
+        with open(path, "rb") as f:
+            partials.append(pickle.load(f))
+
+    mlflow.set_tag("merged_runs", ",".join(run_ids[i] for i in range(count)))
+    log.info(f"Loaded {count} shards of group {group}")
+    return partials
+
+
+def merge_levels(partials: List[Dict]) -> List[List[Dict[str, Any]]]:
+    """
+    Groups the per noise level results of all shards.
+
+    Args:
+        partials (List[Dict]): Partial results ordered by shard index, each
+            with a list of per noise level results under "levels".
+
+    Returns:
+        List[List[Dict[str, Any]]]: For each noise level, the results of all
+            shards.
+    """
+    if len({partial["n_samples"] for partial in partials}) > 1:
+        raise ValueError("The shards were run with different numbers of samples")
+    levels = [[p["noise_level"] for p in partial["levels"]] for partial in partials]
+    if any(lv != levels[0] for lv in levels):
+        raise ValueError("The shards were run with different noise levels")
+    return [list(level) for level in zip(*[p["levels"] for p in partials])]
@@ -0,0 +1,139 @@
+"""
+Helpers to simulate density matrices once and derive measurement results and
+state fidelities from them, instead of re-simulating the model per metric.
+"""
+
+from typing import Dict, List, Optional, Union
+import numpy as np
+
+from qml_essentials.model import Model
+
+
+def simulate_density_matrices(
+    model: Model,
+    inputs: Optional[np.ndarray] = None,
+    noise_params: Optional[Dict] = None,
+) -> np.ndarray:
+    """
+    Simulates the density matrices of all parameter samples in `model.params`
+    for each input.
+
+    Args:
+        model (Model): The quantum model to evaluate.
+        inputs (Optional[np.ndarray]): Inputs of shape (n_inputs,
+            n_input_feat), or None for a single zero input.
+        noise_params (Optional[Dict]): Noise parameters for the simulation.
+
+    Returns:
+        np.ndarray: Density matrices of shape (n_inputs, n_samples, 2**n, 2**n).
+    """
+    n_samples = model.params.shape[-1] if model.params.ndim == 3 else 1
+    if inputs is None:
+        inputs = np.zeros((1, model.n_input_feat))
+    inputs = np.asarray(inputs).reshape(-1, model.n_input_feat)
+    n_inputs = len(inputs)
+
+    # The model evaluates all combinations of inputs and parameter samples only
+    # if their numbers differ and there is more than one input. Otherwise the
+    # inputs are padded with a duplicate of the first one. Zero inputs are not
+    # encoded at all and need no padding.
+    skip_encoding = model.remove_zero_encoding and not inputs.any()
+    if n_samples > 1 and (
+        (n_inputs == 1 and not skip_encoding) or n_inputs == n_samples
+    ):
+        inputs = np.concatenate([inputs, inputs[:1]])
+
+    rhos = model(
+        params=model.params,
+        inputs=inputs,
+        noise_params=noise_params,
+        cache=False,
+        execution_type="density",
+    )
+    dim = 2**model.n_qubits
+    # the result is ordered by input first, independent of its shape
+    return np.asarray(rhos).reshape(len(inputs), n_samples, dim, dim)[:n_inputs]
+
+
+def output_qubits(model: Model) -> List[int]:
+    """
+    Resolves the output qubits of a model (-1 refers to all qubits).
+    """
+    output_qubit: Union[int, List[int]] = model.output_qubit
+    if isinstance(output_qubit, int):
+        if output_qubit == -1:
+            return list(range(model.n_qubits))
+        return [output_qubit]
+    return list(output_qubit)
+
+
+def _z_eigenvalues(n_qubits: int, qubits: List[int]) -> np.ndarray:
+    basis = np.arange(2**n_qubits)
+    # qubit 0 is the most significant bit of the basis state index
+    bits = np.stack([(basis >> (n_qubits - 1 - q)) & 1 for q in qubits], axis=-1)
+    return 1 - 2 * bits
+
+
+def expectation_values_from_probs(probs: np.ndarray) -> np.ndarray:
+    """
+    Computes the mean Pauli-Z expectation value over all measured qubits from
+    measured probabilities, as the model does with `force_mean=True`.
+    Only uses operators supported by autograd, so it can be used in cost
+    functions.
+
+    Args:
+        probs (np.ndarray): Probabilities of shape (..., 2**k) over k qubits.
+
+    Returns:
+        np.ndarray: Expectation values of shape (...).
+    """
+    n_measured = int(np.log2(probs.shape[-1]))
+    return (probs @ _z_eigenvalues(n_measured, list(range(n_measured)))).mean(axis=-1)
+
+
+def expectation_values(
+    rhos: np.ndarray, n_qubits: int, qubits: List[int]
+) -> np.ndarray:
+    """
+    Computes the mean Pauli-Z expectation value over the given qubits, as the
+    model does with `force_mean=True`.
+
+    Args:
+        rhos (np.ndarray): Density matrices of shape (..., 2**n, 2**n).
+        n_qubits (int): Number of qubits.
+        qubits (List[int]): Measured qubits.
+
+    Returns:
+        np.ndarray: Expectation values of shape (...).
+    """
+    probs = np.real(np.diagonal(rhos, axis1=-2, axis2=-1))
+    return (probs @ _z_eigenvalues(n_qubits, qubits)).mean(axis=-1)
+
+
+def sqrtm_psd(rhos: np.ndarray) -> np.ndarray:
+    """
+    Matrix square root of a stack of positive semi-definite matrices.
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(rhos)
+    sqrt_eigenvalues = np.sqrt(np.clip(eigenvalues, 0, None))
+    return (eigenvectors * sqrt_eigenvalues[..., None, :]) @ np.swapaxes(
+        eigenvectors.conj(), -1, -2
+    )
+
+
+def fidelities(rhos: np.ndarray, sigmas: np.ndarray) -> np.ndarray:
+    """
+    Computes the (Uhlmann) fidelities F = (Tr sqrt(sqrt(rho) sigma sqrt(rho)))^2
+    between two stacks of density matrices.
+
+    Args:
+        rhos (np.ndarray): Density matrices of shape (..., d, d).
+        sigmas (np.ndarray): Density matrices of shape (..., d, d).
+
+    Returns:
+        np.ndarray: Fidelities of shape (...).
+    """
+    sqrt_rhos = sqrtm_psd(rhos)
+    inner = sqrt_rhos @ sigmas @ sqrt_rhos
+    eigenvalues = np.linalg.eigvalsh(inner)
+    return np.clip(np.sum(np.sqrt(np.clip(eigenvalues, 0, None)), axis=-1) ** 2, 0, 1)
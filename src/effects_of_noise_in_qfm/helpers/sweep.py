@@ -0,0 +1,115 @@
+"""
+Noise sweeps over the noise level in [0, 1], which scales the noise
+parameters.
+"""
+
+from typing import Iterator, List, Optional, Sequence, Union
+import numpy as np
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class NoiseSweep:
+    """
+    Iterates over noise levels in [0, 1].
+
+    In "uniform" mode, the levels are step / noise_steps for all steps.
+    In "adaptive" mode, the sweep starts from a coarse grid of
+    `coarse_steps` + 1 levels. After each evaluation the metric is passed to
+    `record` and the interval where the metric deviates most from a linear
+    interpolation of its neighbours is bisected, as long as this deviation
+    exceeds `tolerance` (relative to the largest magnitude of the metric),
+    the interval is wider than `min_width` and at most `max_evaluations`
+    levels were evaluated. By default, this is the number of levels of the
+    uniform sweep, such that smooth metrics need fewer evaluations.
+
+    Example:
+        sweep = NoiseSweep(noise_steps, mode="adaptive")
+        for step, noise_level in enumerate(sweep):
+            value = evaluate(noise_params * noise_level)
+            sweep.record(value)
+    """
+
+    def __init__(
+        self,
+        noise_steps: int,
+        mode: str = "uniform",
+        tolerance: float = 0.05,
+        max_evaluations: Optional[int] = None,
+        min_width: float = 1 / 64,
+        coarse_steps: int = 2,
+    ):
+        if mode not in ("uniform", "adaptive"):
+            raise ValueError(f"mode must be 'uniform' or 'adaptive', got {mode}")
+        self.noise_steps = noise_steps
+        self.mode = mode
+        self.tolerance = tolerance
+        self.max_evaluations = max_evaluations or noise_steps + 1
+        self.min_width = min_width
+        self.coarse_steps = coarse_steps
+
+        self.levels: List[float] = []
+        self.values: List[np.ndarray] = []
+
+    def __len__(self) -> int:
+        """
+        Number of evaluations (upper bound in adaptive mode).
+        """
+        if self.mode == "uniform":
+            return self.noise_steps + 1
+        return max(self.max_evaluations, self.coarse_steps + 1)
+
+    def record(self, value: Union[float, Sequence[float]]):
+        """
+        Records the metric(s) of the last noise level. Multiple metrics are
+        refined jointly, each relative to its own magnitude.
+        """
+        self.values.append(np.atleast_1d(np.asarray(value, dtype=float)))
+
+    def _next_level(self) -> Optional[float]:
+        if len(self.values) < len(self.levels):
+            raise RuntimeError("NoiseSweep.record must be called for each level")
+
+        order = np.argsort(self.levels)
+        levels = np.asarray(self.levels)[order]
+        values = np.stack(self.values)[order]
+
+        # deviation of the inner levels from the linear interpolation of
+        # their neighbours, relative to the magnitude of each metric
+        scale = np.max(np.abs(values), axis=0)
+        scale[scale == 0] = np.inf
+        t = (levels[1:-1] - levels[:-2]) / (levels[2:] - levels[:-2])
+        interpolated = values[:-2] + t[:, None] * (values[2:] - values[:-2])
+        deviation = np.max(np.abs(values[1:-1] - interpolated) / scale, axis=-1)
+
+        # an interval is refined if one of its ends deviates
+        widths = np.diff(levels)
+        errors = np.zeros_like(widths)
+        errors[:-1] = deviation
+        errors[1:] = np.maximum(errors[1:], deviation)
+        errors[widths <= self.min_width] = 0
+
+        # largest error first, the wider interval on ties
+        i = int(np.lexsort((widths, errors))[-1])
+        if errors[i] <= self.tolerance:
+            return None
+        return float((levels[i] + levels[i + 1]) / 2)
+
+    def __iter__(self) -> Iterator[float]:
+        steps = self.noise_steps if self.mode == "uniform" else self.coarse_steps
+        for step in range(steps + 1):  # +1 to go for 100%
+            self.levels.append(step / steps)
+            yield self.levels[-1]
+
+        if self.mode == "uniform":
+            return
+
+        while len(self.levels) < self.max_evaluations:
+            level = self._next_level()
+            if level is None:
+                break
+            self.levels.append(level)
+            yield level
+
+        log.info(f"Adaptive noise sweep evaluated {len(self.levels)} noise levels")
@@ -0,0 +1,152 @@
+"""
+Telemetry of the circuit executions. Each call of an `InstrumentedModel` is
+recorded with its batch size, the size of the simulated states and its
+duration, aggregated per node (set by the `TelemetryHooks`) and per noise
+step (set by the nodes with `noise_step`).
+
+Example:
+    for step, noise_level in enumerate(sweep):
+        noise_step(step)
+        ...  # executions of the model are recorded for this step
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+import threading
+
+import numpy as np
+
+
+@dataclass
+class ExecutionStats:
+    """
+    Aggregated executions of a model.
+
+    Args:
+        calls (int): Calls of the model.
+        circuits (int): Simulated circuits, i.e. the sum of the batch sizes.
+        max_batch (int): Largest batch of a single call.
+        n_qubits (int): Largest number of simulated qubits.
+        state_bytes (int): Largest size of the states simulated in a single
+            call (density matrices on the mixed device, state vectors
+            otherwise).
+        seconds (float): Time spent in the calls.
+    """
+
+    calls: int = 0
+    circuits: int = 0
+    max_batch: int = 0
+    n_qubits: int = 0
+    state_bytes: int = 0
+    seconds: float = 0.0
+
+    def add(self, batch: int, n_qubits: int, state_bytes: int, seconds: float):
+        self.calls += 1
+        self.circuits += batch
+        self.max_batch = max(self.max_batch, batch)
+        self.n_qubits = max(self.n_qubits, n_qubits)
+        self.state_bytes = max(self.state_bytes, state_bytes)
+        self.seconds += seconds
+
+    def merge(self, other: "ExecutionStats"):
+        self.calls += other.calls
+        self.circuits += other.circuits
+        self.max_batch = max(self.max_batch, other.max_batch)
+        self.n_qubits = max(self.n_qubits, other.n_qubits)
+        self.state_bytes = max(self.state_bytes, other.state_bytes)
+        self.seconds += other.seconds
+
+
+class Telemetry:
+    """
+    Thread-safe recorder of model executions, keyed by node and noise step.
+    The current node and step are kept per thread, as nodes of the
+    ThreadRunner run in separate threads. Executions in the worker processes
+    of the ParallelRunner are not collected.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._context = threading.local()
+        self.stats: Dict[Tuple[Optional[str], Optional[int]], ExecutionStats] = dict()
+
+    def start_node(self, node: Optional[str]):
+        self._context.node = node
+        self._context.step = None
+
+    def noise_step(self, step: Optional[int]):
+        self._context.step = step
+
+    def current(self) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Node and noise step of the current thread.
+        """
+        return (
+            getattr(self._context, "node", None),
+            getattr(self._context, "step", None),
+        )
+
+    def record(self, model, seconds: float):
+        """
+        Records a call of the model, after it was executed.
+        """
+        batch = int(np.prod(model.batch_shape))
+        # qml_essentials simulates density matrices with noise or if they
+        # are requested, state vectors otherwise
+        mixed = (
+            getattr(model, "execution_type", None) == "density"
+            or model.noise_params is not None
+        )
+        dim = 4**model.n_qubits if mixed else 2**model.n_qubits
+        state_bytes = batch * dim * getattr(model, "element_bytes", 16)
+
+        key = self.current()
+        with self._lock:
+            self.stats.setdefault(key, ExecutionStats()).add(
+                batch, model.n_qubits, state_bytes, seconds
+            )
+
+    def node_stats(self, node: Optional[str]) -> Dict[Optional[int], ExecutionStats]:
+        """
+        Statistics of a node per noise step (None for executions outside of
+        the noise steps).
+        """
+        with self._lock:
+            return {s: v for (n, s), v in self.stats.items() if n == node}
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Statistics per node, with the totals and the noise steps, e.g. to
+        save them as JSON.
+        """
+        summary: Dict[str, Any] = dict()
+        with self._lock:
+            items = sorted(
+                self.stats.items(),
+                key=lambda i: (str(i[0][0]), -1 if i[0][1] is None else i[0][1]),
+            )
+        for (node, step), stats in items:
+            entry = summary.setdefault(
+                str(node), {"total": ExecutionStats(), "noise_steps": dict()}
+            )
+            entry["total"].merge(stats)
+            if step is not None:
+                entry["noise_steps"][str(step)] = asdict(stats)
+        for entry in summary.values():
+            entry["total"] = asdict(entry["total"])
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+        self.start_node(None)
+
+
+telemetry = Telemetry()
+
+
+def noise_step(step: Optional[int]):
+    """
+    Sets the noise step of the executions of the current node.
+    """
+    telemetry.noise_step(step)
@@ -0,0 +1,183 @@
+"""
+SQLite tracking store: creation of the indexes used by our run searches and
+migration of runs from the file-based mlruns tree.
+"""
+
+from typing import Iterator, List, Optional
+import logging
+
+from mlflow.entities import LifecycleStage, Metric, Param, RunTag, ViewType
+from mlflow.store.tracking.file_store import FileStore
+from mlflow.store.tracking.sqlalchemy_store import SqlAlchemyStore
+from mlflow.store.tracking.dbmodels.models import SqlExperiment, SqlRun
+import sqlalchemy
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TRACKING_URI = "sqlite:///mlflow.db"
+
+# Searches filter by params (model.circuit_type, model.n_qubits, seed,
+# data.seed, model.noise_params) and tags (pipeline_name) with "key = value"
+# terms. MLflow binds the key as a parameter, which rules out partial
+# indexes per key, so (key, value) indexes serve all of them.
+INDEXES = {
+    "idx_params_key_value": "params (key, value)",
+    "idx_tags_key_value": "tags (key, value)",
+    "idx_runs_experiment_id": "runs (experiment_id)",
+}
+
+# limits of a single log_batch call
+_MAX_METRICS, _MAX_PARAMS, _MAX_TAGS = 1000, 100, 100
+
+
+def open_store(
+    tracking_uri: str = DEFAULT_TRACKING_URI, artifact_root: str = "./mlruns"
+) -> SqlAlchemyStore:
+    """
+    Opens (and if necessary creates or upgrades) the SQL tracking store and
+    creates the indexes in `INDEXES`.
+
+    Args:
+        tracking_uri (str): SQLAlchemy URI of the store.
+        artifact_root (str): Artifact location of new experiments.
+
+    Returns:
+        SqlAlchemyStore: The tracking store.
+    """
+    store = SqlAlchemyStore(tracking_uri, artifact_root)
+    with store.engine.begin() as connection:
+        for name, columns in INDEXES.items():
+            connection.execute(
+                sqlalchemy.text(f"CREATE INDEX IF NOT EXISTS {name} ON {columns}")
+            )
+    return store
+
+
+def _batches(items: List, size: int) -> Iterator[List]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def migrate(
+    mlruns: str = "mlruns",
+    tracking_uri: str = DEFAULT_TRACKING_URI,
+    experiment_ids: Optional[List[str]] = None,
+) -> int:
+    """
+    Imports experiments and runs of a file store into the SQL tracking store.
+    Experiment and run ids are kept and artifacts are referenced in place, so
+    existing run ids (e.g. in notebooks/runs) remain valid. Runs which exist
+    in the SQL store already are skipped, so the migration can be repeated
+    to import new runs.
+
+    Args:
+        mlruns (str): Root directory of the file store.
+        tracking_uri (str): SQLAlchemy URI of the target store.
+        experiment_ids (Optional[List[str]]): Experiments to import, all if
+            None.
+
+    Returns:
+        int: Number of imported runs.
+    """
+    source = FileStore(mlruns)
+    target = open_store(tracking_uri)
+
+    experiments = [
+        e
+        for e in source.search_experiments(view_type=ViewType.ALL)
+        if experiment_ids is None or e.experiment_id in experiment_ids
+    ]
+
+    n_runs = 0
+    for experiment in experiments:
+        with target.ManagedSessionMaker() as session:
+            exists = (
+                session.query(SqlExperiment)
+                .filter(
+                    (SqlExperiment.experiment_id == int(experiment.experiment_id))
+                    | (SqlExperiment.name == experiment.name)
+                )
+                .first()
+            )
+            if exists is None:
+                session.add(
+                    SqlExperiment(
+                        experiment_id=int(experiment.experiment_id),
+                        name=experiment.name,
+                        artifact_location=experiment.artifact_location,
+                        lifecycle_stage=experiment.lifecycle_stage,
+                        creation_time=experiment.creation_time,
+                        last_update_time=experiment.last_update_time,
+                    )
+                )
+            elif str(exists.experiment_id) != experiment.experiment_id:
+                log.warning(
+                    f"Skipping experiment {experiment.name}, its name is used "
+                    f"by experiment {exists.experiment_id}"
+                )
+                continue
+
+        page_token = None
+        while True:
+            runs = source.search_runs(
+                [experiment.experiment_id],
+                filter_string="",
+                run_view_type=ViewType.ALL,
+                max_results=1000,
+                page_token=page_token,
+            )
+            for run in runs:
+                n_runs += _migrate_run(source, target, run)
+            page_token = runs.token
+            if not page_token:
+                break
+
+        log.info(f"Migrated experiment {experiment.name} ({experiment.experiment_id})")
+
+    log.info(f"Migrated {n_runs} runs to {tracking_uri}")
+    return n_runs
+
+
+def _migrate_run(source: FileStore, target: SqlAlchemyStore, run) -> bool:
+    info = run.info
+    with target.ManagedSessionMaker() as session:
+        if session.query(SqlRun).filter(SqlRun.run_uuid == info.run_id).first():
+            return False
+        session.add(
+            SqlRun(
+                run_uuid=info.run_id,
+                name=info.run_name,
+                source_type="UNKNOWN",
+                source_name="",
+                entry_point_name="",
+                user_id=info.user_id,
+                status=info.status,
+                start_time=info.start_time,
+                end_time=info.end_time,
+                source_version="",
+                # runs must be active to log to them, see below
+                lifecycle_stage=LifecycleStage.ACTIVE,
+                artifact_uri=info.artifact_uri,
+                experiment_id=int(info.experiment_id),
+            )
+        )
+
+    params = [Param(k, v) for k, v in run.data.params.items()]
+    tags = [RunTag(k, v) for k, v in run.data.tags.items()]
+    metrics: List[Metric] = []
+    for key in run.data.metrics:
+        metrics.extend(source.get_metric_history(info.run_id, key))
+
+    for batch in _batches(params, _MAX_PARAMS):
+        target.log_batch(info.run_id, metrics=[], params=batch, tags=[])
+    for batch in _batches(tags, _MAX_TAGS):
+        target.log_batch(info.run_id, metrics=[], params=[], tags=batch)
+    for batch in _batches(metrics, _MAX_METRICS):
+        target.log_batch(info.run_id, metrics=batch, params=[], tags=[])
+
+    if info.lifecycle_stage != LifecycleStage.ACTIVE:
+        with target.ManagedSessionMaker() as session:
+            session.query(SqlRun).filter(SqlRun.run_uuid == info.run_id).update(
+                {SqlRun.lifecycle_stage: info.lifecycle_stage}
+            )
+    return True
@@ -1,5 +1,42 @@
 from typing import Dict
 from copy import copy
+import os
+import resource
+import sys
+
+
+def batch_mode() -> bool:
+    """
+    Whether the project runs as a non-interactive batch job, i.e. if the
+    environment variable QFM_BATCH_MODE is set to a truthy value.
+    """
+    return os.environ.get("QFM_BATCH_MODE", "0").lower() in ("1", "true", "yes")
+
+
+def peak_memory_mb() -> float:
+    """
+    Peak resident memory in MB of this process or, if larger, of its
+    terminated child processes (e.g. the workers of the ParallelRunner).
+    """
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+    # ru_maxrss is given in bytes on macOS and in kilobytes elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def rss_mb() -> float:
+    """
+    Current resident memory in MB of this process, the peak memory where
+    /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return peak_memory_mb()
+    return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
 
 
 class NoiseDict(Dict[str, float]):
@@ -0,0 +1,103 @@
+"""
+Project hooks. The settings import them at startup, so mlflow is only
+imported once a hook needs it (see tests/test_startup.py).
+"""
+
+import logging
+
+from kedro.framework.hooks import hook_impl
+
+from effects_of_noise_in_qfm.datasets.shared_dataset import release_session_directory
+from effects_of_noise_in_qfm.helpers.telemetry import ExecutionStats, telemetry
+from effects_of_noise_in_qfm.helpers.utils import peak_memory_mb
+
+log = logging.getLogger(__name__)
+
+
+class SharedDataHooks:
+    """
+    Ties the lifetime of the files of `SharedArrayDataset`s to the Kedro
+    session: they are removed when the pipeline finished or failed.
+    """
+
+    @hook_impl
+    def after_pipeline_run(self):
+        release_session_directory()
+
+    @hook_impl
+    def on_pipeline_error(self):
+        log.debug("Removing shared datasets after pipeline error")
+        release_session_directory()
+
+
+class ResourceHooks:
+    """
+    Logs the peak memory of the run as the `peak_memory_mb` metric, which
+    the sweep scheduler (helpers/schedule.py) uses to estimate the memory of
+    new configurations. The run duration is recorded by MLflow already.
+    """
+
+    # before the MLflow hook ends the run
+    @hook_impl(tryfirst=True)
+    def after_pipeline_run(self):
+        import mlflow
+
+        if mlflow.active_run() is None:
+            return
+        mlflow.log_metric("peak_memory_mb", peak_memory_mb())
+
+
+class TelemetryHooks:
+    """
+    Attributes the model executions (see helpers/telemetry.py) to the
+    running node. The statistics of each node are logged as MLflow metrics
+    per noise step (`<node>.circuits`, ...) and in total
+    (`<node>.circuits_total`, ...), and all statistics are saved as the
+    `telemetry.json` artifact.
+    """
+
+    METRICS = ("calls", "circuits", "max_batch", "state_bytes", "seconds")
+
+    @hook_impl
+    def before_pipeline_run(self):
+        telemetry.reset()
+
+    @hook_impl
+    def before_node_run(self, node):
+        telemetry.start_node(node.name)
+
+    @hook_impl
+    def after_node_run(self, node):
+        telemetry.start_node(None)
+        stats = telemetry.node_stats(node.name)
+        if not stats:
+            return
+
+        import mlflow
+
+        if mlflow.active_run() is None:
+            return
+
+        total = ExecutionStats()
+        for step, s in stats.items():
+            total.merge(s)
+            if step is not None:
+                mlflow.log_metrics(
+                    {f"{node.name}.{m}": getattr(s, m) for m in self.METRICS},
+                    step=step,
+                )
+        mlflow.log_metrics(
+            {f"{node.name}.{m}_total": getattr(total, m) for m in self.METRICS}
+        )
+
+    # before the MLflow hook ends the run
+    @hook_impl(tryfirst=True)
+    def after_pipeline_run(self):
+        summary = telemetry.summary()
+        if not summary:
+            return
+
+        import mlflow
+
+        if mlflow.active_run() is not None:
+            mlflow.log_dict(summary, "telemetry.json")
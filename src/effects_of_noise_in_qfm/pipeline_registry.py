@@ -1,49 +1,163 @@
 """Project pipelines."""
 
-from typing import Dict
+from typing import Callable, Dict, Iterator, Mapping
+import importlib
 
-from kedro.framework.project import find_pipelines
 from kedro.pipeline import Pipeline
 
-from effects_of_noise_in_qfm.pipelines.data_generation.pipeline import (
-    create_pipeline as create_data_generation_pipeline,
-)
-from effects_of_noise_in_qfm.pipelines.data_science.entanglement.pipeline import (
-    create_pipeline as create_entanglement_pipeline,
-)
-from effects_of_noise_in_qfm.pipelines.data_science.training.pipeline import (
-    create_noise_iteration_pipeline as create_training_pipeline,
-)
-from effects_of_noise_in_qfm.pipelines.data_science.expressibility.pipeline import (
-    create_pipeline as create_expressibility_pipeline,
-)
-from effects_of_noise_in_qfm.pipelines.data_science.coefficients.pipeline import (
-    create_pipeline as create_coefficients_pipeline,
-)
-
-# from effects_of_noise_in_qfm.pipelines.visualization.pipeline import (
-#     create_pipeline as create_visualization_pipeline,
-# )
-
-
-def register_pipelines() -> Dict[str, Pipeline]:
+# Pipeline modules are imported inside the factories below, such that only the
+# node modules (and thereby pennylane, qml_essentials, mlflow, ...) of the
+# pipeline that is actually executed get imported.
+
+
+def _data_generation() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_generation.pipeline import (
+        create_pipeline,
+    )
+
+    return create_pipeline()
+
+
+def _entanglement() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_science.entanglement.pipeline import (
+        create_pipeline,
+    )
+
+    return create_pipeline()
+
+
+def _training() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_science.training.pipeline import (
+        create_noise_iteration_pipeline,
+    )
+
+    return create_noise_iteration_pipeline()
+
+
+def _expressibility() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_science.expressibility.pipeline import (
+        create_pipeline,
+    )
+
+    return create_pipeline()
+
+
+def _expressibility_inputs() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_science.expressibility.pipeline import (
+        create_inputs_pipeline,
+    )
+
+    return create_inputs_pipeline()
+
+
+def _coefficients() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_science.coefficients.pipeline import (
+        create_pipeline,
+    )
+
+    return create_pipeline()
+
+
+def _analysis() -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.data_science.analysis.pipeline import (
+        create_pipeline,
+    )
+
+    return create_pipeline()
+
+
+def _sharded(name: str, kind: str) -> Pipeline:
+    # kind: "shard" (partial results of a slice of the samples) or "merge"
+    module = importlib.import_module(
+        f"effects_of_noise_in_qfm.pipelines.data_science.{name}.pipeline"
+    )
+    return getattr(module, f"create_{kind}_pipeline")()
+
+
+def _visualization(name: str) -> Pipeline:
+    from effects_of_noise_in_qfm.pipelines.visualization import pipeline
+
+    return getattr(pipeline, f"create_{name}_pipeline")()
+
+
+class LazyPipelines(Mapping[str, Pipeline]):
+    """
+    Mapping from pipeline names to pipelines, which only creates a pipeline
+    (and imports its nodes) when it is accessed for the first time.
+    Kedro only looks up the requested pipeline on `kedro run`, while tools
+    such as kedro-viz that iterate all pipelines still get all of them.
+    """
+
+    def __init__(self, factories: Dict[str, Callable[[], Pipeline]]):
+        self._factories = factories
+        self._pipelines: Dict[str, Pipeline] = {}
+
+    def __getitem__(self, name: str) -> Pipeline:
+        if name not in self._pipelines:
+            self._pipelines[name] = self._factories[name]()
+        return self._pipelines[name]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._factories)
+
+    def __len__(self) -> int:
+        return len(self._factories)
+
+
+def register_pipelines() -> Mapping[str, Pipeline]:
     """Register the project's pipelines.
 
     Returns:
         A mapping from pipeline names to ``Pipeline`` objects.
     """
-    pipelines = {
-        "__default__": create_data_generation_pipeline()
-        + create_entanglement_pipeline()
-        + create_expressibility_pipeline()
-        + create_entanglement_pipeline()
-        + create_training_pipeline(),
-        "training": create_data_generation_pipeline() + create_training_pipeline(),
-        "coefficients": create_data_generation_pipeline()
-        + create_coefficients_pipeline(),
-        "entanglement": create_data_generation_pipeline()
-        + create_entanglement_pipeline(),
-        "expressibility": create_data_generation_pipeline()
-        + create_expressibility_pipeline(),
-    }
+    pipelines = LazyPipelines(
+        {
+            "__default__": lambda: _data_generation()
+            + _entanglement()
+            + _expressibility()
+            + _training(),
+            "training": lambda: _data_generation()
+            + _training()
+            + _visualization("training"),
+            "coefficients": lambda: _data_generation()
+            + _coefficients()
+            + _visualization("coefficients"),
+            "entanglement": lambda: _data_generation()
+            + _entanglement()
+            + _visualization("entanglement"),
+            "expressibility": lambda: _data_generation()
+            + _expressibility()
+            + _visualization("expressibility"),
+            # fidelity histograms per input sample, see
+            # expressibility.n_input_samples in the parameters
+            "expressibility_inputs": lambda: _data_generation()
+            + _expressibility_inputs(),
+            # coefficients, expressibility and entanglement from one simulation
+            "analysis": lambda: _data_generation()
+            + _analysis()
+            + _visualization("coefficients")
+            + _visualization("expressibility")
+            + _visualization("entanglement"),
+            # split the samples of a configuration over several runs and merge
+            # their partial results, see sharding in the parameters
+            "coefficients_shard": lambda: _data_generation()
+            + _sharded("coefficients", "shard"),
+            "coefficients_merge": lambda: _sharded("coefficients", "merge")
+            + _visualization("coefficients"),
+            "entanglement_shard": lambda: _data_generation()
+            + _sharded("entanglement", "shard"),
+            "entanglement_merge": lambda: _sharded("entanglement", "merge")
+            + _visualization("entanglement"),
+            "expressibility_shard": lambda: _data_generation()
+            + _sharded("expressibility", "shard"),
+            "expressibility_merge": lambda: _sharded("expressibility", "merge")
+            + _visualization("expressibility"),
+            # render figures for the results of an existing run, see
+            # visualization.run_id in the parameters
+            "visualization_training": lambda: _visualization("training"),
+            "visualization_coefficients": lambda: _visualization("coefficients"),
+            "visualization_entanglement": lambda: _visualization("entanglement"),
+            "visualization_expressibility": lambda: _visualization("expressibility"),
+        }
+    )
     return pipelines
@@ -1,13 +1,17 @@
-from qml_essentials.model import Model
-from qml_essentials.coefficients import Coefficients
-from pennylane import Hadamard
-
 from typing import List, Union, Optional
 import numpy as np
 import mlflow
 
 import logging
 
+from effects_of_noise_in_qfm.helpers.model import ModelSpec, as_model
+from effects_of_noise_in_qfm.helpers.domain import (
+    ChunkedGrid,
+    grid_points,
+    quasi_random_points,
+    fourier_series,
+)
+
 log = logging.getLogger(__name__)
 
 
@@ -23,70 +27,121 @@ def create_model(
     output_qubit: int,
     seed: int,
     mp_threshold: int,
-) -> Model:
+    selective_noise: str = "both",
+    noise_layers: Optional[List[int]] = None,
+    precision: str = "double",
+) -> ModelSpec:
+    """
+    Creates the specification of the model, which is built by the consuming
+    nodes. Other than the model itself, the specification can be pickled
+    and therefore be passed to other processes (e.g. by the ParallelRunner).
+
+    Args:
+        selective_noise (str): Where noise is applied: "both", "iec" (input
+            encoding only) or "pqc" (ansatz only).
+        noise_layers (Optional[List[int]]): Indices of the (implicit) ansatz
+            layers with noise, None for all layers.
+        precision (str): "double" or "single" (complex64 density matrices).
+
+    Returns:
+        ModelSpec: The model specification.
+    """
     log.info(
         f"Creating model with {n_qubits} qubits, {n_layers} layers, and {circuit_type} circuit."
     )
 
-    if circuit_type[-5:] == "_Plus":
-        circuit_type = circuit_type[:-5]
-        sp = [lambda wires, **kwargs: Hadamard(wires)]
-    else:
-        sp = None
-
-    model = Model(
+    return ModelSpec(
         n_qubits=n_qubits,
         n_layers=n_layers,
         circuit_type=circuit_type,
         data_reupload=data_reupload,
-        output_qubit=output_qubit,
         initialization=initialization,
         initialization_domain=initialization_domain,
-        shots=shots,
-        random_seed=seed,
-        state_preparation=sp,
         encoding=encoding,
+        shots=shots,
+        output_qubit=output_qubit,
+        seed=seed,
         mp_threshold=mp_threshold,
+        selective_noise=selective_noise,
+        noise_layers=noise_layers,
+        precision=precision,
     )
-    return model
 
 
-def print_model(model: Model):
-    return str(model)
+def print_model(model: ModelSpec):
+    return str(as_model(model))
 
 
-def sample_domain(domain: List[float], omegas: List[List[float]]) -> np.ndarray:
+def sample_domain(
+    domain: List[float],
+    omegas: Union[List[float], int],
+    encoding: Union[str, List[str]] = "RX",
+    mode: str = "grid",
+    n_points: Optional[int] = None,
+    chunk_size: int = 65536,
+    seed: Optional[int] = None,
+) -> Union[np.ndarray, ChunkedGrid]:
     """
-    Generates a flattened grid of (x,y,...) coordinates in a range of -1 to 1.
+    Samples the input domain [domain[0], domain[1]]^d, where d is the number
+    of input features of the model.
 
     Parameters
     ----------
-    sidelen : int
-        Side length of the grid
-    dim : int, optional
-        Dimensionality of the grid, by default 2
+    domain : List[float]
+        Lower and upper bound of each dimension
+    omegas : Union[List[float], int]
+        Frequencies or maximum frequency of the target, which determine the
+        number of grid points per dimension
+    encoding : Union[str, List[str]]
+        Encoding of the model, one per input feature
+    mode : str, optional
+        "grid" (full tensor grid), "chunked" (tensor grid generated lazily in
+        chunks), "sobol" or "halton" (quasi-random points), by default "grid"
+    n_points : Optional[int], optional
+        Number of points for "sobol" and "halton"
+    chunk_size : int, optional
+        Number of points per chunk for "chunked"
+    seed : Optional[int], optional
+        Seed for the scrambling of the quasi-random points
 
     Returns
     -------
-    np.Tensor
-        Grid tensor of shape (sidelen^dim, dim)
+    Union[np.ndarray, ChunkedGrid]
+        Points of shape (n, d), or (n,) for d = 1, or a ChunkedGrid
     """
-    dimensions = 1  # len(omega)
+    dimensions = len(encoding) if isinstance(encoding, list) else 1
 
     if isinstance(omegas, int):
         omegas = [o for o in range(omegas + 1)]
     # using the max of all dimensions because we want uniform sampling
     n_d = int(np.ceil(2 * np.max(np.abs(domain)) * np.max(omegas)))
 
-    log.info(f"Using {n_d} data points on {len(omegas)} dimensions")
-
-    tensors = tuple(dimensions * [np.linspace(domain[0], domain[1], num=n_d)])
+    if mode == "grid":
+        log.info(f"Using {n_d} data points on {dimensions} dimensions")
+        samples = grid_points(domain, n_d, dimensions)
+    elif mode == "chunked":
+        log.info(
+            f"Using {n_d} data points on {dimensions} dimensions "
+            f"in chunks of {chunk_size}"
+        )
+        return ChunkedGrid(tuple(domain), n_d, dimensions, chunk_size)
+    elif mode in ("sobol", "halton"):
+        if n_points is None:
+            raise ValueError(f"data.n_points is required for mode {mode}")
+        samples = quasi_random_points(domain, n_points, dimensions, mode, seed)
+        log.info(f"Using {len(samples)} {mode} points on {dimensions} dimensions")
+    else:
+        raise ValueError(
+            f"mode must be 'grid', 'chunked', 'sobol' or 'halton', got {mode}"
+        )
 
-    return np.meshgrid(*tensors)[0].reshape(-1)  # .reshape(-1, dimensions)
+    if dimensions == 1:
+        return samples.reshape(-1)
+    return samples
 
 
 def generate_fourier_series(
-    domain_samples: np.ndarray,
+    domain_samples: Union[np.ndarray, ChunkedGrid],
     omegas: Union[List[List[float]], int],
     amplitude: Union[float, str],
     norm_factor: float,
@@ -97,8 +152,8 @@ def generate_fourier_series(
 
     Parameters
     ----------
-    domain_samples : np.ndarray
-        Grid of domain samples.
+    domain_samples : Union[np.ndarray, ChunkedGrid]
+        Domain samples of shape (n, d), or (n,) for d = 1.
     omega : Union[List[List[float]], int]
         List of frequencies for each dimension or number of frequencies
     amplitude : Union[float, str]
@@ -117,30 +172,53 @@ def generate_fourier_series(
         omegas = np.arange(-omegas, omegas + 1)
     omegas = np.array(omegas)
 
+    if isinstance(domain_samples, ChunkedGrid):
+        n_dims = domain_samples.n_dims
+    else:
+        n_dims = 1 if domain_samples.ndim == 1 else domain_samples.shape[1]
+    shape = (len(omegas),) * n_dims
+
     if isinstance(amplitude, float):
-        coefficients = [amplitude for _ in omegas]
+        coefficients = np.full(shape, amplitude)
     elif amplitude == "random":
         rng = np.random.default_rng(seed=seed)
-        max_f = max(omegas)
-        c_pos = rng.random(max_f) + 1j * rng.random(max_f)
-        c_neg = np.conj(c_pos)[::-1]
-        c0 = rng.random(1)
-        coefficients = np.concatenate([c_neg.T, c0, c_pos.T])
+        if n_dims == 1:
+            max_f = max(omegas)
+            c_pos = rng.random(max_f) + 1j * rng.random(max_f)
+            c_neg = np.conj(c_pos)[::-1]
+            c0 = rng.random(1)
+            coefficients = np.concatenate([c_neg.T, c0, c_pos.T])
+        else:
+            c = rng.random(shape) + 1j * rng.random(shape)
+            # c_-k = conj(c_k), such that the series is real-valued
+            coefficients = (c + np.conj(np.flip(c))) / 2
     else:
         raise ValueError("No amplidudes provided")
 
-    values = np.stack(
-        [
-            Coefficients.evaluate_Fourier_series(coefficients, omegas, x)
-            for x in domain_samples
-        ]
-    )
+    if isinstance(domain_samples, ChunkedGrid):
+        values = np.concatenate(
+            [fourier_series(coefficients, omegas, x) for x in domain_samples]
+        )
+    else:
+        values = fourier_series(coefficients, omegas, domain_samples)
+    values = np.real_if_close(values)
+
     norm_factor = np.max(np.abs(values)) / norm_factor
     values /= norm_factor
     coefficients /= norm_factor
 
-    mlflow.log_param("target_coefficients_real", coefficients.real.tolist())
-    mlflow.log_param("target_coefficients_imag", coefficients.imag.tolist())
+    if n_dims == 1:
+        mlflow.log_param("target_coefficients_real", coefficients.real.tolist())
+        mlflow.log_param("target_coefficients_imag", coefficients.imag.tolist())
+    else:
+        # too long for a parameter
+        mlflow.log_dict(
+            {
+                "real": coefficients.real.tolist(),
+                "imag": coefficients.imag.tolist(),
+            },
+            "target_coefficients.json",
+        )
 
     return {
         "fourier_series": values,
@@ -20,6 +20,9 @@ def create_pipeline() -> Pipeline:
                     "output_qubit": "params:model.output_qubit",
                     "seed": "params:seed",
                     "mp_threshold": "params:model.mp_threshold",
+                    "selective_noise": "params:model.selective_noise",
+                    "noise_layers": "params:model.noise_layers",
+                    "precision": "params:model.precision",
                 },
                 outputs="model",
                 name="create_model",
@@ -29,6 +32,11 @@ def create_pipeline() -> Pipeline:
                 inputs={
                     "domain": "params:data.domain",
                     "omegas": "params:data.omegas",
+                    "encoding": "params:model.encoding",
+                    "mode": "params:data.sampling",
+                    "n_points": "params:data.n_points",
+                    "chunk_size": "params:data.chunk_size",
+                    "seed": "params:data.seed",
                 },
                 outputs="domain_samples",
                 name="sample_domain",
@@ -0,0 +1,277 @@
+from qml_essentials.expressibility import Expressibility
+import numpy as np
+import pennylane.numpy as pnp
+from typing import Dict, Optional
+import pandas as pd
+import mlflow
+import logging
+
+from effects_of_noise_in_qfm.helpers.utils import NoiseDict
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.helpers import entanglement as batched
+from effects_of_noise_in_qfm.helpers.model import (
+    ModelSpec,
+    as_model,
+    precision_deviation,
+)
+from effects_of_noise_in_qfm.helpers.coefficients import (
+    spectrum_inputs,
+    spectrum_from_outputs,
+    coefficient_statistics,
+    frequency_grid,
+)
+from effects_of_noise_in_qfm.helpers.states import (
+    simulate_density_matrices,
+    fidelities,
+)
+from effects_of_noise_in_qfm.helpers.noise import noise_scope
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step
+from effects_of_noise_in_qfm.helpers.progress import create_progress
+
+log = logging.getLogger(__name__)
+
+
+def _noise_columns(df: pd.DataFrame, step: int, noise_params: NoiseDict, level):
+    for n, v in noise_params.items():
+        if n == "ThermalRelaxation" and isinstance(v, dict):
+            df.loc[step, n] = v["t_factor"]
+        else:
+            df.loc[step, n] = v
+    df.loc[step, "noise_level"] = level
+
+
+def iterate_noise(
+    model: ModelSpec,
+    noise_params: Dict[str, float],
+    noise_steps: int,
+    seed: int,
+    coefficients_n_samples: int,
+    coefficients_scale: bool,
+    zero_coefficient: bool,
+    oversampling: int,
+    expressibility_n_samples: int,
+    n_bins: int,
+    entanglement_n_samples: int,
+    entanglement_scale: bool,
+    measure: str,
+    precision_check: int = 0,
+    noise_sweep: Optional[Dict] = None,
+    statistics_precision: str = "double",
+) -> Dict[str, pd.DataFrame]:
+    """
+    Iterates over different noise levels and derives the Fourier coefficients,
+    the expressibility and the entangling capability from common parameter
+    samples, with one simulation call per noise level and kind of output.
+
+    For each noise level, the coefficient samples are simulated on the input
+    grid of the spectrum in a single call, with the gate errors drawn once
+    for all inputs as in the coefficients pipeline. Then the density matrices
+    of all parameter samples are simulated at the zero input (used for
+    expressibility and entanglement). The coefficient samples are therefore
+    simulated twice: the spectrum requires the encoded origin, while the
+    encoding is skipped at the zero input in the expressibility and
+    entanglement pipelines, and keeping the density matrices of the whole
+    grid would require the memory of n_inputs * n_coeffs states.
+    The first samples are shared between the metrics, i.e. the metrics are
+    computed from common random parameters instead of independent draws.
+
+    Args:
+        model: Specification of the quantum model to evaluate.
+        noise_params: A dictionary of noise parameters with their initial values.
+        noise_steps: The number of steps to incrementally apply noise.
+        seed: The random seed for reproducibility.
+        coefficients_n_samples: Number of samples for the coefficients.
+        coefficients_scale: Scale the coefficient samples with 2**n_qubits.
+        zero_coefficient: Include the zero frequency (1D inputs only).
+        oversampling: Oversampling factor of the spectrum.
+        expressibility_n_samples: Number of fidelity samples, which is always
+            scaled with 2**n_qubits (as in the expressibility pipeline).
+        n_bins: Number of histogram bins for the expressibility.
+        entanglement_n_samples: Number of samples for the entangling capability.
+        entanglement_scale: Scale the entanglement samples with 2**n_qubits.
+        measure: Entanglement measure, "EF" or "MW" (always computed with the
+            "batched" backend).
+        precision_check: Number of fidelities which are compared against
+            double precision if the model is simulated in single precision.
+        noise_sweep: Options of the `NoiseSweep` over the noise levels. In
+            adaptive mode, all three metrics are refined jointly.
+        statistics_precision: Precision of the coefficient statistics,
+            "double" or "single".
+
+    Returns:
+        A dictionary containing the coefficients, expressibility and
+        entangling capability dataframes for each noise level.
+
+    Raises:
+        ValueError: If the measure is not supported by the "batched" backend.
+    """
+    batched.validate_measure(measure)
+    spec = model if isinstance(model, ModelSpec) else None
+    model = as_model(model)
+    noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
+
+    n_coeffs = coefficients_n_samples
+    if coefficients_scale:
+        n_coeffs = int(np.power(2, model.n_qubits) * n_coeffs)
+    n_ent = entanglement_n_samples
+    if entanglement_scale:
+        n_ent = int(np.power(2, model.n_qubits) * n_ent)
+    # Expressibility.state_fidelities scales the samples and bins with scale=True
+    n_expr = int(np.power(2, model.n_qubits) * expressibility_n_samples)
+    n_expr_bins = model.n_qubits * n_bins
+    n_total = max(n_coeffs, n_ent, 2 * n_expr)
+
+    _, y_haar = Expressibility.haar_integral(
+        n_qubits=model.n_qubits, n_bins=n_bins, scale=True, cache=True
+    )
+    for i, prob in enumerate(y_haar):
+        mlflow.log_metric("haar_probability", prob, i)
+    mlflow.set_tag("entanglement_backend", "batched")
+
+    inputs = spectrum_inputs(model.degree, model.n_input_feat, oversampling)
+    grid = frequency_grid(model.degree * oversampling, model.n_input_feat)
+
+    noise_columns = [n for n in noise_params.keys()]
+    df_coeffs = pd.DataFrame(
+        columns=[
+            *noise_columns,
+            "noise_level",
+            "coeffs_abs_var",
+            "coeffs_var",
+            "coeffs_co_var_real_imag",
+            "coeffs_real_var",
+            "coeffs_imag_var",
+            "coeffs_abs_mean",
+            "coeffs_abs_max",
+            "coeffs_real_mean",
+            "coeffs_imag_mean",
+            "coeffs_full_real",
+            "coeffs_full_imag",
+            "frequencies",
+        ]
+    )
+    df_expr = pd.DataFrame(columns=[*noise_columns, "noise_level", "expressibility"])
+    df_ent = pd.DataFrame(
+        columns=[*noise_columns, "noise_level", "entangling_capability"]
+    )
+
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
+
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
+            part_noise_params = noise_params * noise_level
+
+            # grid points only for the coefficient samples, in a single call
+            # as in Coefficients.get_spectrum, such that the gate errors do not
+            # vary over the inputs. The grid is simulated before the states,
+            # so the gate errors are drawn as in the coefficients pipeline.
+            model.initialize_params(rng=pnp.random.default_rng(seed), repeat=n_total)
+            all_params = model.params
+            model.params = all_params[..., :n_coeffs]
+            # the model evaluates all combinations of inputs and samples only
+            # if their numbers differ
+            grid_inputs = inputs
+            if len(inputs) == n_coeffs:
+                grid_inputs = np.concatenate([inputs, inputs[:1]])
+            with noise_scope(batch_gate_error=False):
+                outputs = model(
+                    params=model.params,
+                    inputs=grid_inputs,
+                    noise_params=part_noise_params,
+                    cache=False,
+                    execution_type="expval",
+                    force_mean=True,
+                )
+            outputs = np.asarray(outputs).reshape(len(grid_inputs), n_coeffs)
+            outputs = outputs[: len(inputs)]
+            model.params = all_params
+
+            # all samples at the zero input
+            states = simulate_density_matrices(
+                model, inputs=inputs[:1], noise_params=part_noise_params
+            )[0]
+
+            # coefficients
+            cs, _ = spectrum_from_outputs(outputs, model.n_input_feat)
+            if model.n_input_feat == 1:
+                positive = grid.positive_half(zero_coefficient)
+                coeffs = cs[positive].T
+                frequencies = grid.frequencies[positive]
+            else:
+                coeffs = np.moveaxis(cs, -1, 0)
+                frequencies = grid.vectors
+
+            _noise_columns(df_coeffs, step, part_noise_params, noise_level)
+            statistics = coefficient_statistics(coeffs, statistics_precision)
+            for column, value in statistics.items():
+                df_coeffs.loc[step, column] = value
+            df_coeffs.loc[step, "frequencies"] = frequencies.tolist()
+
+            # expressibility
+            z, _ = np.histogram(
+                fidelities(states[:n_expr], states[n_expr : 2 * n_expr]),
+                bins=n_expr_bins,
+                range=(0, 1),
+            )
+            # a single input, i.e. a single divergence
+            kl_divergence = float(
+                Expressibility.kullback_leibler_divergence(
+                    vqc_prob_dist=z / n_expr, haar_dist=y_haar
+                )[0]
+            )
+            mlflow.log_metric("kl_divergence", kl_divergence, step=step)
+            _noise_columns(df_expr, step, part_noise_params, noise_level)
+            df_expr.loc[step, "expressibility"] = kl_divergence
+
+            # entanglement
+            entangling_capability = float(
+                batched.entanglement(states[:n_ent], model.n_qubits, measure).mean()
+            )
+            mlflow.log_metric("entangling_capability", entangling_capability, step=step)
+            _noise_columns(df_ent, step, part_noise_params, noise_level)
+            df_ent.loc[step, "entangling_capability"] = entangling_capability
+
+            if spec is not None and spec.precision == "single" and precision_check > 0:
+                n_check = min(precision_check, n_expr)
+
+                def check_fidelities(m):
+                    rhos = simulate_density_matrices(
+                        m, inputs=inputs[:1], noise_params=part_noise_params
+                    )[0]
+                    return fidelities(rhos[:n_check], rhos[n_check:])
+
+                deviation = precision_deviation(
+                    spec,
+                    np.concatenate(
+                        [
+                            all_params[..., :n_check],
+                            all_params[..., n_expr : n_expr + n_check],
+                        ],
+                        axis=-1,
+                    ),
+                    check_fidelities,
+                )
+                mlflow.log_metric(
+                    "precision_fidelities_max_deviation", deviation, step=step
+                )
+
+            log.info(
+                f"Noise level {noise_level:.2f}: expressibility {kl_divergence}, "
+                f"entangling capability {entangling_capability}"
+            )
+            sweep.record(
+                [
+                    np.mean(df_coeffs.loc[step, "coeffs_abs_mean"]),
+                    kl_divergence,
+                    entangling_capability,
+                ]
+            )
+            progress.advance(noise_it_task)
+
+    return {
+        "coefficients_noise": df_coeffs.sort_values("noise_level"),
+        "expressibility_noise": df_expr.sort_values("noise_level"),
+        "entangling_capability_noise": df_ent.sort_values("noise_level"),
+    }
@@ -0,0 +1,37 @@
+from kedro.pipeline import Pipeline, node, pipeline
+
+from .nodes import iterate_noise
+
+
+def create_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=iterate_noise,
+                inputs={
+                    "model": "model",
+                    "noise_params": "params:model.noise_params",
+                    "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
+                    "seed": "params:seed",
+                    "coefficients_n_samples": "params:coefficients.n_samples",
+                    "coefficients_scale": "params:coefficients.scale",
+                    "zero_coefficient": "params:coefficients.zero_coefficient",
+                    "oversampling": "params:coefficients.oversampling",
+                    "statistics_precision": "params:coefficients.statistics_precision",
+                    "expressibility_n_samples": "params:expressibility.n_samples",
+                    "n_bins": "params:expressibility.n_bins",
+                    "entanglement_n_samples": "params:entanglement.n_samples",
+                    "entanglement_scale": "params:entanglement.scale",
+                    "measure": "params:entanglement.measure",
+                    "precision_check": "params:model.precision_check",
+                },
+                outputs={
+                    "coefficients_noise": "coefficients_noise",
+                    "expressibility_noise": "expressibility_noise",
+                    "entangling_capability_noise": "entangling_capability_noise",
+                },
+                name="analysis_iterate_noise",
+            ),
+        ]
+    )
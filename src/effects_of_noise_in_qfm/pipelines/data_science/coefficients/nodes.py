@@ -1,33 +1,39 @@
-from qml_essentials.model import Model
 from qml_essentials.coefficients import Coefficients
-from qml_essentials.ansaetze import Gates
 import pennylane.numpy as np
-from rich.progress import Progress
-from typing import Dict
+from typing import Dict, Optional
 import pandas as pd
-from functools import partial
+import mlflow
 import logging
 
 from effects_of_noise_in_qfm.helpers.utils import NoiseDict
-
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.helpers.sequential import SequentialSampling
+from effects_of_noise_in_qfm.helpers.shards import (
+    check_shardable,
+    load_partials,
+    merge_levels,
+    shard_from_params,
+)
+from effects_of_noise_in_qfm.helpers.model import (
+    ModelSpec,
+    as_model,
+    precision_deviation,
+)
+from effects_of_noise_in_qfm.helpers.noise import noise_scope
+from effects_of_noise_in_qfm.helpers.coefficients import (
+    FrequencyGrid,
+    SpectrumSamples,
+    coefficient_statistics,
+    frequency_grid,
+)
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step
+from effects_of_noise_in_qfm.helpers.progress import create_progress
 
 log = logging.getLogger(__name__)
 
 
-def iterate_noise(
-    model: Model,
-    noise_params: Dict[str, float],
-    noise_steps: int,
-    n_samples: int,
-    seed: int,
-    zero_coefficient: bool,
-    oversampling: int = 1,
-    selective_noise: str = "both",
-    scale=False,
-) -> None:
-    noise_params = NoiseDict(noise_params)
-
-    df = pd.DataFrame(
+def _coefficients_frame(noise_params: NoiseDict) -> pd.DataFrame:
+    return pd.DataFrame(
         columns=[
             *[n for n in noise_params.keys()],
             "noise_level",
@@ -45,137 +51,289 @@ def iterate_noise(
             "frequencies",
         ]
     )
-    rng = np.random.default_rng(seed)
 
-    enc = model._enc
-
-    def enc_noise_free(i, *args, **kwargs):
-        kwargs["noise_params"] = None
-        ret = enc[i](*args, **kwargs)
-        return ret
-
-    pqc = model.pqc
-
-    def pqc_noise_free(*args, **kwargs):
-        kwargs["noise_params"] = None
-        return pqc(*args, **kwargs)
-
-    def pqc_no_batch_gate_error(*args, **kwargs):
-        Gates.batch_gate_error = False
-        ret = pqc(*args, **kwargs)
-        Gates.batch_gate_error = True
-        return ret
-
-    if selective_noise == "iec":
-        model.pqc = pqc_noise_free
-    elif selective_noise == "pqc":
-        model._enc = [partial(enc_noise_free, i) for i in range(len(model._enc))]
-        model.pqc = pqc_no_batch_gate_error
-    elif selective_noise != "both":
-        raise ValueError(
-            f"selective_noise must be 'both', 'iec' or 'pqc', got {selective_noise}"
-        )
+
+def _coefficients_row(
+    df: pd.DataFrame,
+    step: int,
+    part_noise_params: NoiseDict,
+    noise_level: float,
+    coeffs: np.ndarray,
+    grid: FrequencyGrid,
+    zero_coefficient: bool,
+    statistics_precision: str = "double",
+):
+    """
+    Writes the statistics of the coefficients of a noise level to row step.
+
+    Args:
+        df (pd.DataFrame): Coefficients dataframe.
+        step (int): Row of the noise level.
+        part_noise_params (NoiseDict): Noise parameters of the noise level.
+        noise_level (float): Noise level.
+        coeffs (np.ndarray): Shifted coefficients of shape (n_samples,
+            n_freqs, ...) with one frequency axis per input feature.
+        grid (FrequencyGrid): Frequencies of the coefficients.
+        zero_coefficient (bool): Keep the zero frequency (1D inputs only).
+        statistics_precision (str): Precision of the statistics, see
+            `coefficient_statistics`.
+    """
+    if grid.n_input_feat == 1:
+        positive = grid.positive_half(zero_coefficient)
+        coeffs, freqs = coeffs[:, positive], grid.frequencies[positive]
     else:
-        model.pqc = pqc_no_batch_gate_error
+        freqs = grid.vectors
+
+    for n, v in part_noise_params.items():
+        if n == "ThermalRelaxation":
+            if isinstance(v, dict):
+                df.loc[step, "ThermalRelaxation"] = v["t_factor"]
+            else:
+                df.loc[step, "ThermalRelaxation"] = 0.0
+        else:
+            df.loc[step, n] = v
+    df.loc[step, "noise_level"] = noise_level
+
+    statistics = coefficient_statistics(coeffs, statistics_precision)
+    for column, value in statistics.items():
+        df.loc[step, column] = value
+    df.loc[step, "frequencies"] = freqs.tolist()
+
+
+def iterate_noise(
+    model: ModelSpec,
+    noise_params: Dict[str, float],
+    noise_steps: int,
+    n_samples: int,
+    seed: int,
+    zero_coefficient: bool,
+    oversampling: int = 1,
+    scale=False,
+    precision_check: int = 0,
+    noise_sweep: Optional[Dict] = None,
+    sequential: Optional[Dict] = None,
+    statistics_precision: str = "double",
+) -> None:
+    spec = model if isinstance(model, ModelSpec) else None
+    model = as_model(model)
+    noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
+    sampling = SequentialSampling(**{"seed": seed, **(sequential or dict())})
+
+    df = _coefficients_frame(noise_params)
+    rng = np.random.default_rng(seed)
 
     if scale:
         n_samples = int(np.power(2, model.n_qubits) * n_samples)
+    grid = frequency_grid(model.degree, model.n_input_feat, oversampling)
 
-    with Progress() as progress:
-        noise_it_task = progress.add_task(
-            "Iterating noise levels...", total=noise_steps + 1
-        )
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
         sample_coeff_task = progress.add_task("Sampling...", total=n_samples)
 
-        for step in range(0, noise_steps + 1):  # +1 to go for 100%
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
             progress.reset(sample_coeff_task)
-            part_noise_params = noise_params * (step / noise_steps)
+            part_noise_params = noise_params * noise_level
 
-            coeffs = []
-            freqs = []
-            # Re-initialize model, because it triggers new sampling
-            model.initialize_params(rng=rng, repeat=n_samples)
+            samples = SpectrumSamples(n_samples, model.n_input_feat)
+            for batch_size in sampling.batches(n_samples):
+                # Re-initialize model, because it triggers new sampling
+                model.initialize_params(rng=rng, repeat=batch_size)
 
-            cs, f = Coefficients.get_spectrum(
-                model=model,
-                mts=oversampling,
-                shift=True,
-                trim=True,
-                noise_params=part_noise_params,
-            )
-
-            for it in range(n_samples):
-                c = cs[..., it]
-                if model.n_input_feat == 1:
-                    if zero_coefficient:
-                        coeffs.append(c[len(c) // 2 :])
-                        freqs.append(f[len(f) // 2 :])
-                    else:
-                        coeffs.append(c[len(c) // 2 + 1 :])
-                        freqs.append(f[len(f) // 2 + 1 :])
-                else:
-                    coeffs.append(c)
-                    _f = np.stack(np.meshgrid(*[f] * model.n_input_feat)).T.reshape(
-                        *c.shape, model.n_input_feat
+                # gate errors must not vary over the inputs of the spectrum
+                with noise_scope(batch_gate_error=False):
+                    c, _ = Coefficients.get_spectrum(
+                        model=model,
+                        mts=oversampling,
+                        shift=True,
+                        trim=True,
+                        noise_params=part_noise_params,
                     )
-                    freqs.append(_f)
-
-                progress.update(sample_coeff_task, advance=1)
-
-            for n, v in part_noise_params.items():
-                if n == "ThermalRelaxation":
-                    if isinstance(v, dict):
-                        df.loc[step, "ThermalRelaxation"] = v["t_factor"]
-                    else:
-                        df.loc[step, "ThermalRelaxation"] = 0.0
-                else:
-                    df.loc[step, n] = v
-            df.loc[step, "noise_level"] = step / noise_steps
-
-            mean_real = np.real(coeffs).mean(axis=0)
-            mean_imag = np.imag(coeffs).mean(axis=0)
-            co_variance_real_imag = np.mean(
-                (np.real(coeffs) - mean_real) * (np.imag(coeffs) - mean_imag),
-                axis=0,
-            )
+                samples.add(c)
+                progress.update(sample_coeff_task, advance=batch_size)
+
+                # stop once the mean absolute coefficients are accurate enough
+                if sampling.enabled:
+                    abs_coeffs = np.abs(samples.coefficients)
+                    if sampling.converged(abs_coeffs):
+                        break
+            cs = samples.coefficients
 
-            df.loc[step, "coeffs_abs_var"] = np.abs(coeffs).var(axis=0).tolist()
-            df.loc[step, "coeffs_var"] = np.array(coeffs).var(axis=0).tolist()
-            df.loc[step, "coeffs_co_var_real_imag"] = co_variance_real_imag.tolist()
-            df.loc[step, "coeffs_real_var"] = np.real(coeffs).var(axis=0).tolist()
-            df.loc[step, "coeffs_imag_var"] = np.imag(coeffs).var(axis=0).tolist()
-            df.loc[step, "coeffs_abs_max"] = np.abs(coeffs).max(axis=0).tolist()
-            df.loc[step, "coeffs_abs_mean"] = np.abs(coeffs).mean(axis=0).tolist()
-            df.loc[step, "coeffs_real_mean"] = mean_real.tolist()
-            df.loc[step, "coeffs_imag_mean"] = mean_imag.tolist()
-            df.loc[step, "coeffs_full_real"] = np.array(coeffs).T.real.tolist()
-            df.loc[step, "coeffs_full_imag"] = np.array(coeffs).T.imag.tolist()
-            df.loc[step, "frequencies"] = freqs[0].tolist()
+            if sampling.enabled:
+                n_drawn = cs.shape[0]
+                ci = sampling.relative_half_width(abs_coeffs)
+                log.info(
+                    f"Sampled {n_drawn} of max. {n_samples} samples, "
+                    f"relative CI half width {ci:.4f}"
+                )
+                mlflow.log_metric("coefficients_n_samples", n_drawn, step=step)
+                mlflow.log_metric("coefficients_ci_rel_half_width", ci, step=step)
 
+            if spec is not None and spec.precision == "single" and precision_check > 0:
+                check_params = model.params[..., :precision_check]
+
+                def spectrum(m):
+                    with noise_scope(batch_gate_error=False):
+                        return Coefficients.get_spectrum(
+                            model=m,
+                            mts=oversampling,
+                            shift=True,
+                            trim=True,
+                            noise_params=part_noise_params,
+                        )[0]
+
+                deviation = precision_deviation(spec, check_params, spectrum)
+                log.debug(f"Max. deviation of single precision: {deviation}")
+                mlflow.log_metric(
+                    "precision_coefficients_max_deviation", deviation, step=step
+                )
+
+            _coefficients_row(
+                df,
+                step,
+                part_noise_params,
+                noise_level,
+                cs,
+                grid,
+                zero_coefficient,
+                statistics_precision,
+            )
+
+            sweep.record(np.mean(df.loc[step, "coeffs_abs_mean"]))
             progress.advance(noise_it_task)
 
-    import plotly.graph_objects as go
-    import plotly.colors as pc
-
-    colors = pc.sequential.Plasma
-    fig = go.Figure(
-        data=[
-            go.Scatter(
-                x=df.frequencies[i],
-                y=df.coeffs_abs_mean.iloc[i],
-                mode="markers",
-                name=f"Noise level {df.noise_level[i]:.2f}",
-                marker=dict(color=colors[i]),
+    return {"coefficients_noise": df.sort_values("noise_level")}
+
+
+def iterate_noise_shard(
+    model: ModelSpec,
+    noise_params: Dict[str, float],
+    noise_steps: int,
+    n_samples: int,
+    seed: int,
+    shard: str,
+    group: str,
+    oversampling: int = 1,
+    scale=False,
+    noise_sweep: Optional[Dict] = None,
+) -> Dict:
+    """
+    Computes the coefficients of a shard of the parameter samples for each
+    noise level. All parameters are drawn as in an unsharded run, but only
+    the slice of the shard is simulated, such that `merge_shards` reproduces
+    the results of `iterate_noise` (without sequential sampling) unless
+    GateError noise is applied: the gate errors are drawn from a global
+    stream, whose draws depend on the number of simulated samples, so each
+    shard samples different gate errors than the unsharded run.
+
+    The raw coefficients of all samples are saved instead of mergeable
+    statistics, as `merge_shards` has to provide all of them
+    (coeffs_full_real and coeffs_full_imag).
+
+    Args:
+        model: Specification of the quantum model to evaluate.
+        noise_params: A dictionary of noise parameters with their initial values.
+        noise_steps: The number of steps to incrementally apply noise.
+        n_samples: The number of parameter samples of all shards.
+        seed: The random seed for reproducibility.
+        shard: The shard as "i/N".
+        group: Name of the shards of this configuration, see `merge_shards`.
+        oversampling: Oversampling of the spectrum.
+        scale: Scale n_samples with 2**n_qubits.
+        noise_sweep: Options of the (uniform) `NoiseSweep` over the noise levels.
+
+    Returns:
+        A dictionary containing the partial results, i.e. the coefficients of
+        the shard's samples for each noise level.
+    """
+    model = as_model(model)
+    noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
+    check_shardable(sweep)
+    shard = shard_from_params(shard, group)
+    rng = np.random.default_rng(seed)
+
+    if scale:
+        n_samples = int(np.power(2, model.n_qubits) * n_samples)
+    samples = shard.samples(n_samples)
+    log.info(f"Shard {shard}: samples {samples.start} to {samples.stop - 1}")
+
+    levels = []
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
+
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
+            part_noise_params = noise_params * noise_level
+
+            model.initialize_params(rng=rng, repeat=n_samples)
+            model.params = model.params[..., samples]
+            with noise_scope(batch_gate_error=False):
+                c, f = Coefficients.get_spectrum(
+                    model=model,
+                    mts=oversampling,
+                    shift=True,
+                    trim=True,
+                    noise_params=part_noise_params,
+                )
+            levels.append(
+                {
+                    "noise_level": noise_level,
+                    "noise_params": part_noise_params,
+                    "coefficients": np.asarray(
+                        c.reshape(*c.shape[: model.n_input_feat], -1)
+                    ),
+                    "frequencies": np.asarray(f),
+                }
             )
-            for i in range(noise_steps + 1)
-        ]
-    )
-    fig.update_layout(
-        title="Absolute value of the coefficients",
-        xaxis_title="Frequency",
-        yaxis_title="Absolute value of the coefficient",
-        template="plotly_white",
-        yaxis_type="log",
-    )
-    fig.show()
-    return {"coefficients_noise": df}
+            progress.advance(noise_it_task)
+
+    return {
+        "coefficients_partial": {
+            "shard": str(shard),
+            "n_samples": n_samples,
+            "levels": levels,
+        }
+    }
+
+
+def merge_shards(
+    group: str, zero_coefficient: bool, statistics_precision: str = "double"
+) -> Dict:
+    """
+    Merges the partial results of the coefficients_shard runs of a group
+    into the coefficients of all samples.
+
+    Args:
+        group: Value of `sharding.group` of the shards.
+        zero_coefficient: Keep the zero frequency (1D inputs only).
+        statistics_precision: Precision of the statistics, "double" or
+            "single".
+
+    Returns:
+        A dictionary containing a DataFrame as returned by `iterate_noise`.
+    """
+    partials = load_partials(group, "coefficients_shard", "coefficients_partial")
+    levels = merge_levels(partials)
+
+    df = _coefficients_frame(levels[0][0]["noise_params"])
+    first = levels[0][0]
+    grid = FrequencyGrid(first["frequencies"], first["coefficients"].ndim - 1)
+    for step, shards in enumerate(levels):
+        # samples on the first axis, the partial results have them last
+        cs = np.concatenate(
+            [np.moveaxis(s["coefficients"], -1, 0) for s in shards], axis=0
+        )
+        _coefficients_row(
+            df,
+            step,
+            shards[0]["noise_params"],
+            shards[0]["noise_level"],
+            cs,
+            grid,
+            zero_coefficient,
+            statistics_precision,
+        )
+
+    return {"coefficients_noise": df.sort_values("noise_level")}
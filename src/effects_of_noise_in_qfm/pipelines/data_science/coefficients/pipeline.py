@@ -1,6 +1,6 @@
 from kedro.pipeline import Pipeline, node, pipeline
 
-from .nodes import iterate_noise
+from .nodes import iterate_noise, iterate_noise_shard, merge_shards
 
 
 def create_pipeline() -> Pipeline:
@@ -12,15 +12,59 @@ def create_pipeline() -> Pipeline:
                     "model": "model",
                     "noise_params": "params:model.noise_params",
                     "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
                     "n_samples": "params:coefficients.n_samples",
                     "seed": "params:seed",
                     "zero_coefficient": "params:coefficients.zero_coefficient",
                     "oversampling": "params:coefficients.oversampling",
-                    "selective_noise": "params:coefficients.selective_noise",
                     "scale": "params:coefficients.scale",
+                    "precision_check": "params:model.precision_check",
+                    "sequential": "params:sequential",
+                    "statistics_precision": "params:coefficients.statistics_precision",
                 },
                 outputs={"coefficients_noise": "coefficients_noise"},
                 name="coefficients_iterate_noise",
             ),
         ]
     )
+
+
+def create_shard_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=iterate_noise_shard,
+                inputs={
+                    "model": "model",
+                    "noise_params": "params:model.noise_params",
+                    "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
+                    "n_samples": "params:coefficients.n_samples",
+                    "seed": "params:seed",
+                    "shard": "params:sharding.shard",
+                    "group": "params:sharding.group",
+                    "oversampling": "params:coefficients.oversampling",
+                    "scale": "params:coefficients.scale",
+                },
+                outputs={"coefficients_partial": "coefficients_partial"},
+                name="coefficients_iterate_noise_shard",
+            ),
+        ]
+    )
+
+
+def create_merge_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=merge_shards,
+                inputs={
+                    "group": "params:sharding.group",
+                    "zero_coefficient": "params:coefficients.zero_coefficient",
+                    "statistics_precision": "params:coefficients.statistics_precision",
+                },
+                outputs={"coefficients_noise": "coefficients_noise"},
+                name="coefficients_merge_shards",
+            ),
+        ]
+    )
@@ -1,26 +1,130 @@
 from qml_essentials.model import Model
 from qml_essentials.entanglement import Entanglement
-from rich.progress import Progress
+import pennylane.numpy as np
 import pandas as pd
-from typing import Dict
+from typing import Dict, Optional, Union
 import mlflow
 import logging
 
 from effects_of_noise_in_qfm.helpers.utils import NoiseDict
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.helpers.sequential import SequentialSampling
+from effects_of_noise_in_qfm.helpers.shards import (
+    check_shardable,
+    load_partials,
+    merge_levels,
+    shard_from_params,
+)
+from effects_of_noise_in_qfm.helpers import entanglement as batched
+from effects_of_noise_in_qfm.helpers.model import ModelSpec, as_model
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step
+from effects_of_noise_in_qfm.helpers.progress import create_progress
 
 log = logging.getLogger(__name__)
 
 
 def calculate_entanglement(
-    model: Model,
+    model: Union[ModelSpec, Model],
     samples: int,
     sigmas: int,
     scale: bool,
     seed: int,
     noise_params: Dict,
     measure: str,
+    backend: str = "qml_essentials",
     iterator=None,
+    sequential: Optional[Dict] = None,
 ):
+    model = as_model(model)
+    sampling = SequentialSampling(**{"seed": seed, **(sequential or dict())})
+    if backend == "batched":
+        entangling_capability = _batched_entanglement(
+            model=model,
+            samples=samples,
+            scale=scale,
+            seed=seed,
+            noise_params=noise_params,
+            measure=measure,
+            sampling=sampling,
+            iterator=iterator,
+        )
+    elif backend == "qml_essentials":
+        if sampling.enabled:
+            log.warning(
+                "Sequential sampling requires the 'batched' backend, "
+                f"drawing all {samples} samples"
+            )
+        entangling_capability = _qml_essentials_entanglement(
+            model=model,
+            samples=samples,
+            sigmas=sigmas,
+            scale=scale,
+            seed=seed,
+            noise_params=noise_params,
+            measure=measure,
+        )
+    else:
+        raise ValueError(
+            f"backend must be 'qml_essentials' or 'batched', got {backend}"
+        )
+
+    log.info(f"Calculated entangling capability: {entangling_capability}")
+    if iterator is not None:
+        mlflow.log_metric("entangling_capability", entangling_capability, step=iterator)
+
+    return entangling_capability
+
+
+def _batched_entanglement(
+    model: Model,
+    samples: int,
+    scale: bool,
+    seed: int,
+    noise_params: Dict,
+    measure: str,
+    sampling: SequentialSampling,
+    iterator=None,
+) -> float:
+    if scale:
+        samples = int(np.power(2, model.n_qubits) * samples)
+
+    rng = np.random.default_rng(seed)
+    ent = []
+    for batch_size in sampling.batches(samples):
+        rhos = batched.sample_density_matrices(
+            model=model,
+            n_samples=batch_size,
+            seed=rng,
+            scale=False,
+            noise_params=noise_params,
+        )
+        ent.append(batched.entanglement(rhos, model.n_qubits, measure))
+        if sampling.converged(np.concatenate(ent)):
+            break
+    ent = np.concatenate(ent)
+
+    if sampling.enabled:
+        ci = sampling.relative_half_width(ent)
+        log.info(
+            f"Sampled {len(ent)} of max. {samples} samples, "
+            f"relative CI half width {ci:.4f}"
+        )
+        if iterator is not None:
+            mlflow.log_metric("entanglement_n_samples", len(ent), step=iterator)
+            mlflow.log_metric("entanglement_ci_rel_half_width", ci, step=iterator)
+
+    return float(ent.mean())
+
+
+def _qml_essentials_entanglement(
+    model: Model,
+    samples: int,
+    sigmas: int,
+    scale: bool,
+    seed: int,
+    noise_params: Dict,
+    measure: str,
+) -> float:
     kwargs = dict()
     if measure == "RE":
         ent_measure = Entanglement.relative_entropy
@@ -42,16 +146,11 @@ def calculate_entanglement(
         noise_params=noise_params,
         **kwargs,
     )
-
-    log.info(f"Calculated entangling capability: {entangling_capability}")
-    if iterator is not None:
-        mlflow.log_metric("entangling_capability", entangling_capability, step=iterator)
-
     return entangling_capability
 
 
 def iterate_noise(
-    model: Model,
+    model: ModelSpec,
     noise_params: Dict[str, float],
     noise_steps: int,
     n_samples: int,
@@ -59,24 +158,48 @@ def iterate_noise(
     scale: bool,
     seed: int,
     measure: str,
+    backend: str = "qml_essentials",
+    noise_sweep: Optional[Dict] = None,
+    sequential: Optional[Dict] = None,
 ) -> None:
     """
     Iterates over different noise levels and calculates the entangling capability
     for each level using the given model and noise parameters.
 
     Args:
-        model: The quantum model to evaluate.
+        model: Specification of the quantum model to evaluate.
         noise_params: A dictionary of noise parameters with their initial values.
         noise_steps: The number of steps to incrementally apply noise.
         n_samples: The number of samples to use in the entangling capability calculation.
         seed: The random seed for reproducibility.
+        measure: The entanglement measure ("EF", "MW" or "RE").
+        backend: "qml_essentials" evaluates one density matrix at a time, "batched"
+            evaluates all samples of a noise level with vectorized numpy calls
+            (supports "EF" and "MW"). Logged as the tag "entanglement_backend",
+            as the backends differ for "EF".
+        noise_sweep: Options of the `NoiseSweep` over the noise levels.
+        sequential: Options of the `SequentialSampling`, in which case
+            n_samples is the maximum number of samples ("batched" only).
 
     Returns:
         A dictionary containing a DataFrame with the calculated entangling capability
         and noise levels for each step.
     """
 
+    model = as_model(model)
     noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
+
+    if backend == "batched":
+        batched.validate_measure(measure)
+    # the backends do not agree on "EF", see batched.entanglement_of_formation
+    mlflow.set_tag("entanglement_backend", backend)
+    if measure == "EF" and backend == "qml_essentials":
+        log.warning(
+            "The 'qml_essentials' backend decomposes the states along the rows "
+            "instead of the columns of the eigenvector matrix, its 'EF' differs "
+            "from the 'batched' backend and the analysis pipeline"
+        )
 
     df = pd.DataFrame(
         columns=[
@@ -86,13 +209,12 @@ def iterate_noise(
         ]
     )
 
-    with Progress() as progress:
-        noise_it_task = progress.add_task(
-            "Iterating noise levels...", total=noise_steps + 1
-        )
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
 
-        for step in range(noise_steps + 1):  # +1 to go for 100%
-            part_noise_params = noise_params * (step / noise_steps)
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
+            part_noise_params = noise_params * noise_level
 
             entangling_capability = calculate_entanglement(
                 model=model,
@@ -103,13 +225,132 @@ def iterate_noise(
                 noise_params=part_noise_params,
                 iterator=step,
                 measure=measure,
+                backend=backend,
+                sequential=sequential,
             )
 
             for n, v in part_noise_params.items():
                 df.loc[step, n] = v
-            df.loc[step, "noise_level"] = step / noise_steps
+            df.loc[step, "noise_level"] = noise_level
             df.loc[step, "entangling_capability"] = entangling_capability
 
+            sweep.record(entangling_capability)
+            progress.advance(noise_it_task)
+
+    return {"entangling_capability_noise": df.sort_values("noise_level")}
+
+
+def iterate_noise_shard(
+    model: ModelSpec,
+    noise_params: Dict[str, float],
+    noise_steps: int,
+    n_samples: int,
+    scale: bool,
+    seed: int,
+    measure: str,
+    shard: str,
+    group: str,
+    noise_sweep: Optional[Dict] = None,
+) -> Dict:
+    """
+    Calculates the entanglement of a shard of the parameter samples for each
+    noise level with the "batched" backend. All parameters are drawn as in
+    an unsharded run, but only the slice of the shard is simulated.
+
+    Args:
+        model: Specification of the quantum model to evaluate.
+        noise_params: A dictionary of noise parameters with their initial values.
+        noise_steps: The number of steps to incrementally apply noise.
+        n_samples: The number of parameter samples of all shards.
+        scale: Scale n_samples with 2**n_qubits.
+        seed: The random seed for reproducibility.
+        measure: The entanglement measure ("EF" or "MW").
+        shard: The shard as "i/N".
+        group: Name of the shards of this configuration, see `merge_shards`.
+        noise_sweep: Options of the (uniform) `NoiseSweep` over the noise levels.
+
+    Returns:
+        A dictionary containing the partial results, i.e. the number and sum
+        of the entanglement of the shard's samples for each noise level.
+    """
+    model = as_model(model)
+    noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
+    check_shardable(sweep)
+    batched.validate_measure(measure)
+    shard = shard_from_params(shard, group)
+
+    if scale:
+        n_samples = int(np.power(2, model.n_qubits) * n_samples)
+    samples = shard.samples(n_samples)
+    log.info(f"Shard {shard}: samples {samples.start} to {samples.stop - 1}")
+
+    levels = []
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
+
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
+            part_noise_params = noise_params * noise_level
+            rhos = batched.sample_density_matrices(
+                model=model,
+                n_samples=n_samples,
+                seed=seed,
+                scale=False,
+                noise_params=part_noise_params,
+                samples=samples,
+            )
+            ent = batched.entanglement(rhos, model.n_qubits, measure)
+            levels.append(
+                {
+                    "noise_level": noise_level,
+                    "noise_params": part_noise_params,
+                    "count": len(ent),
+                    "sum": float(np.sum(ent)),
+                }
+            )
             progress.advance(noise_it_task)
 
-    return {"entangling_capability_noise": df}
+    return {
+        "entanglement_partial": {
+            "shard": str(shard),
+            "n_samples": n_samples,
+            "levels": levels,
+        }
+    }
+
+
+def merge_shards(group: str) -> Dict:
+    """
+    Merges the partial results of the entanglement_shard runs of a group
+    into the entangling capability of all samples.
+
+    Args:
+        group: Value of `sharding.group` of the shards.
+
+    Returns:
+        A dictionary containing a DataFrame as returned by `iterate_noise`.
+    """
+    partials = load_partials(group, "entanglement_shard", "entanglement_partial")
+    levels = merge_levels(partials)
+    mlflow.set_tag("entanglement_backend", "batched")
+
+    df = pd.DataFrame(
+        columns=[
+            *[n for n in levels[0][0]["noise_params"].keys()],
+            "noise_level",
+            "entangling_capability",
+        ]
+    )
+    for step, shards in enumerate(levels):
+        entangling_capability = sum(s["sum"] for s in shards) / sum(
+            s["count"] for s in shards
+        )
+        mlflow.log_metric("entangling_capability", entangling_capability, step=step)
+
+        for n, v in shards[0]["noise_params"].items():
+            df.loc[step, n] = v
+        df.loc[step, "noise_level"] = shards[0]["noise_level"]
+        df.loc[step, "entangling_capability"] = entangling_capability
+
+    return {"entangling_capability_noise": df.sort_values("noise_level")}
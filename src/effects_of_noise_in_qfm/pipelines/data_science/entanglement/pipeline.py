@@ -1,6 +1,11 @@
 from kedro.pipeline import Pipeline, node, pipeline
 
-from .nodes import calculate_entanglement, iterate_noise
+from .nodes import (
+    calculate_entanglement,
+    iterate_noise,
+    iterate_noise_shard,
+    merge_shards,
+)
 
 
 def create_pipeline() -> Pipeline:
@@ -16,6 +21,8 @@ def create_pipeline() -> Pipeline:
                     "noise_params": "params:model.noise_params",
                     "seed": "params:seed",
                     "measure": "params:entanglement.measure",
+                    "backend": "params:entanglement.backend",
+                    "sequential": "params:sequential",
                 },
                 outputs="entanglement",
                 name="calculate_entanglement",
@@ -26,14 +33,54 @@ def create_pipeline() -> Pipeline:
                     "model": "model",
                     "noise_params": "params:model.noise_params",
                     "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
                     "n_samples": "params:entanglement.n_samples",
                     "n_sigmas": "params:entanglement.n_sigmas",
                     "scale": "params:entanglement.scale",
                     "seed": "params:seed",
                     "measure": "params:entanglement.measure",
+                    "backend": "params:entanglement.backend",
+                    "sequential": "params:sequential",
                 },
                 outputs={"entangling_capability_noise": "entangling_capability_noise"},
                 name="entanglement_iterate_noise",
             ),
         ]
     )
+
+
+def create_shard_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=iterate_noise_shard,
+                inputs={
+                    "model": "model",
+                    "noise_params": "params:model.noise_params",
+                    "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
+                    "n_samples": "params:entanglement.n_samples",
+                    "scale": "params:entanglement.scale",
+                    "seed": "params:seed",
+                    "measure": "params:entanglement.measure",
+                    "shard": "params:sharding.shard",
+                    "group": "params:sharding.group",
+                },
+                outputs={"entanglement_partial": "entanglement_partial"},
+                name="entanglement_iterate_noise_shard",
+            ),
+        ]
+    )
+
+
+def create_merge_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=merge_shards,
+                inputs={"group": "params:sharding.group"},
+                outputs={"entangling_capability_noise": "entangling_capability_noise"},
+                name="entanglement_merge_shards",
+            ),
+        ]
+    )
@@ -1,40 +1,133 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple, Union
 import logging
 import mlflow
-import plotly.graph_objects as go
-import plotly.express as px
-from rich.progress import Progress, Task
 import pandas as pd
+import numpy as np
+import pennylane.numpy as pnp
 
 from qml_essentials.model import Model
 from qml_essentials.expressibility import Expressibility
 
 from effects_of_noise_in_qfm.helpers.utils import NoiseDict
+from effects_of_noise_in_qfm.helpers.states import (
+    fidelities,
+    simulate_density_matrices,
+)
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.helpers.shards import (
+    check_shardable,
+    load_partials,
+    merge_levels,
+    shard_from_params,
+)
+from effects_of_noise_in_qfm.helpers.model import ModelSpec, as_model
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step
+from effects_of_noise_in_qfm.helpers.progress import create_progress
 
 log = logging.getLogger(__name__)
 
 
-def calculate_expressibility(
+def input_state_fidelities(
     model: Model,
     n_samples: int,
     n_bins: int,
     seed: int,
     noise_params: Dict,
+    n_input_samples: int,
+    input_domain: List[float],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Histograms of the state fidelities for each input sample, as
+    `Expressibility.state_fidelities` with scale=True. The model cannot
+    evaluate a single input with a batch of parameters, so the density
+    matrices are simulated for two inputs at a time instead. Inputs are
+    applied to all input features.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Input samples
+            (n_input_samples,), bin edges (n_bins + 1,) and histograms
+            (n_input_samples, n_bins).
+    """
+    n_samples = int(np.power(2, model.n_qubits) * n_samples)
+    n_bins = model.n_qubits * n_bins
+
+    x = np.linspace(*input_domain, n_input_samples)
+    inputs = np.repeat(x[:, None], model.n_input_feat, axis=1)
+    bin_edges = np.linspace(0, 1, n_bins + 1)
+
+    # two sets of parameters for pairs of random states
+    model.initialize_params(rng=pnp.random.default_rng(seed), repeat=2 * n_samples)
+
+    z = np.zeros((n_input_samples, n_bins))
+    for start in range(0, n_input_samples, 2):
+        rhos = simulate_density_matrices(
+            model, inputs=inputs[start : start + 2], noise_params=noise_params
+        )
+        for i, r in enumerate(rhos, start=start):
+            z[i], _ = np.histogram(
+                fidelities(r[:n_samples], r[n_samples:]), bins=bin_edges
+            )
+
+    return x, bin_edges, z / n_samples
+
+
+def calculate_expressibility(
+    model: Union[ModelSpec, Model],
+    n_samples: int,
+    n_bins: int,
+    seed: int,
+    noise_params: Dict,
     n_input_samples: int = None,
     input_domain: List[float] = None,
     iterator=None,
-):
-    x, _, z = Expressibility.state_fidelities(
-        n_bins=n_bins,
-        n_samples=n_samples,
-        input_domain=input_domain,
-        n_input_samples=n_input_samples,
-        seed=seed,
-        model=model,
-        noise_params=noise_params,
-        scale=True,
-        cache=False,
+) -> Dict[str, np.ndarray]:
+    """
+    Calculates the expressibility (KL divergence of the state fidelity
+    distribution to the Haar distribution), for each input sample if
+    n_input_samples > 0 and input_domain is given.
+
+    Only summary metrics are logged. The fidelity histograms are returned
+    so that they can be saved as a dataset.
+
+    Args:
+        model (Union[ModelSpec, Model]): Model (or its specification).
+        n_samples (int): Number of parameter samples.
+        n_bins (int): Number of histogram bins.
+        seed (int): Random seed.
+        noise_params (Dict): Noise parameters.
+        n_input_samples (int): Number of input samples.
+        input_domain (List[float]): Domain of the input samples.
+        iterator (int): Step of the kl_divergence metric.
+
+    Returns:
+        Dict[str, np.ndarray]: "inputs" (n_inputs,), "bin_edges"
+            (n_bins + 1,), "fidelities" (n_inputs, n_bins) histograms,
+            "haar" (n_bins,) and "kl_divergence" (n_inputs,).
+    """
+    model = as_model(model)
+    input_dependent = (
+        n_input_samples is not None and n_input_samples > 0 and input_domain is not None
     )
+    if input_dependent:
+        x, y, z = input_state_fidelities(
+            model=model,
+            n_samples=n_samples,
+            n_bins=n_bins,
+            seed=seed,
+            noise_params=noise_params,
+            n_input_samples=n_input_samples,
+            input_domain=input_domain,
+        )
+    else:
+        x, y, z = Expressibility.state_fidelities(
+            n_bins=n_bins,
+            n_samples=n_samples,
+            seed=seed,
+            model=model,
+            noise_params=noise_params,
+            scale=True,
+            cache=False,
+        )
 
     _, y_haar = Expressibility.haar_integral(
         n_qubits=model.n_qubits, n_bins=n_bins, scale=True, cache=True
@@ -49,58 +142,102 @@ def calculate_expressibility(
     for i, prob in enumerate(y_haar):
         mlflow.log_metric("haar_probability", prob, i)
 
-    # TODO: I feel like the following part should rather go into a dataframe
-    if n_input_samples is not None and n_input_samples > 0 and input_domain is not None:
-        for i, (x_sample, kl) in enumerate(zip(x, kl_divergence)):
-            mlflow.log_metric("kl_divergence", kl, i)
-            mlflow.log_metric("x", x_sample, i)
-
-            for j, fidelity in enumerate(z[i]):
-                mlflow.log_metric(f"x_{x_sample:.2f}_fidelity", fidelity, j)
+    if input_dependent:
+        mlflow.log_metrics(
+            {
+                "kl_divergence_mean": float(np.mean(kl_divergence)),
+                "kl_divergence_std": float(np.std(kl_divergence)),
+                "kl_divergence_min": float(np.min(kl_divergence)),
+                "kl_divergence_max": float(np.max(kl_divergence)),
+            }
+        )
     elif iterator is not None:
-        mlflow.log_metric("kl_divergence", kl_divergence, step=iterator)
+        mlflow.log_metric("kl_divergence", float(kl_divergence[0]), step=iterator)
 
-    return kl_divergence
+    return {
+        "inputs": np.asarray(x),
+        "bin_edges": np.asarray(y),
+        "fidelities": np.asarray(z).reshape(len(kl_divergence), -1),
+        "haar": np.asarray(y_haar),
+        "kl_divergence": np.asarray(kl_divergence),
+    }
+
+
+def input_expressibility(
+    model: ModelSpec,
+    n_samples: int,
+    n_bins: int,
+    seed: int,
+    noise_params: Dict,
+    n_input_samples: int,
+    input_domain: List[float],
+) -> Dict[str, np.ndarray]:
+    """
+    Input-dependent expressibility for the `expressibility_inputs` dataset,
+    see `calculate_expressibility`.
+
+    Raises:
+        ValueError: If n_input_samples is not positive, as there would be
+            no input samples to save.
+    """
+    if n_input_samples is None or n_input_samples <= 0:
+        raise ValueError(
+            "The input-dependent expressibility requires "
+            f"expressibility.n_input_samples > 0, got {n_input_samples}"
+        )
+
+    return calculate_expressibility(
+        model=model,
+        n_samples=n_samples,
+        n_bins=n_bins,
+        seed=seed,
+        noise_params=noise_params,
+        n_input_samples=n_input_samples,
+        input_domain=input_domain,
+    )
 
 
 def iterate_noise(
-    model: Model,
+    model: ModelSpec,
     noise_params: Dict[str, float],
     noise_steps: int,
     n_samples: int,
     n_bins: int,
     seed: int,
+    noise_sweep: Optional[Dict] = None,
 ) -> None:
     """
     Iterate over different noise levels and calculate the expressibility
     for each level using the given model and noise parameters.
 
     Args:
-        model: The quantum model to evaluate.
+        model: Specification of the quantum model to evaluate.
         noise_params: A dictionary of noise parameters with their initial values.
         noise_steps: The number of steps to incrementally apply noise.
         n_samples: The number of samples to use in the expressibility calculation.
         n_bins: The number of bins for the expressibility calculation.
         seed: The random seed for reproducibility.
+        noise_sweep: Options of the `NoiseSweep` over the noise levels.
 
     Returns:
         A dictionary containing a DataFrame with the calculated expressibility
         and noise levels for each step.
     """
 
+    model = as_model(model)
     noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
 
     df = pd.DataFrame(
         columns=[*[n for n in noise_params.keys()], "noise_level", "expressibility"]
     )
 
-    with Progress() as progress:
-        noise_it_task = progress.add_task(
-            "Iterating noise levels...", total=noise_steps + 1
-        )
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
 
-        for step in range(noise_steps + 1):  # +1 to go for 100%
-            part_noise_params = noise_params * (step / noise_steps)
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
+            part_noise_params = noise_params * noise_level
 
             expressibility = calculate_expressibility(
                 model=model,
@@ -109,13 +246,141 @@ def iterate_noise(
                 seed=seed,
                 noise_params=part_noise_params,
                 iterator=step,
-            )
+            )["kl_divergence"][0]
 
             for n, v in part_noise_params.items():
                 df.loc[step, n] = v
-            df.loc[step, "noise_level"] = step / noise_steps
+            df.loc[step, "noise_level"] = noise_level
             df.loc[step, "expressibility"] = expressibility
 
+            sweep.record(expressibility)
+            progress.advance(noise_it_task)
+
+    return {"expressibility_noise": df.sort_values("noise_level")}
+
+
+def iterate_noise_shard(
+    model: ModelSpec,
+    noise_params: Dict[str, float],
+    noise_steps: int,
+    n_samples: int,
+    n_bins: int,
+    seed: int,
+    shard: str,
+    group: str,
+    noise_sweep: Optional[Dict] = None,
+) -> Dict:
+    """
+    Histograms the state fidelities of a shard of the parameter sample pairs
+    for each noise level. All parameters are drawn as in an unsharded run,
+    but only the pairs of the shard are simulated.
+
+    Args:
+        model: Specification of the quantum model to evaluate.
+        noise_params: A dictionary of noise parameters with their initial values.
+        noise_steps: The number of steps to incrementally apply noise.
+        n_samples: The number of samples of all shards (scaled with 2**n_qubits).
+        n_bins: The number of bins (scaled with n_qubits).
+        seed: The random seed for reproducibility.
+        shard: The shard as "i/N".
+        group: Name of the shards of this configuration, see `merge_shards`.
+        noise_sweep: Options of the (uniform) `NoiseSweep` over the noise levels.
+
+    Returns:
+        A dictionary containing the partial results, i.e. the fidelity
+        histogram counts of the shard's samples for each noise level.
+    """
+    model = as_model(model)
+    noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
+    check_shardable(sweep)
+    shard = shard_from_params(shard, group)
+
+    # scaled as by Expressibility.state_fidelities with scale=True
+    n_pairs = int(np.power(2, model.n_qubits) * n_samples)
+    bin_edges = np.linspace(0, 1, model.n_qubits * n_bins + 1)
+    pairs = np.arange(n_pairs)[shard.samples(n_pairs)]
+    log.info(f"Shard {shard}: samples {pairs[0]} to {pairs[-1]}")
+
+    levels = []
+    with create_progress() as progress:
+        noise_it_task = progress.add_task("Iterating noise levels...", total=len(sweep))
+
+        for step, noise_level in enumerate(sweep):
+            noise_step(step)
+            part_noise_params = noise_params * noise_level
+
+            # the two states of pair i use the parameters i and n_pairs + i
+            model.initialize_params(
+                rng=pnp.random.default_rng(seed), repeat=2 * n_pairs
+            )
+            model.params = model.params[..., np.concatenate([pairs, n_pairs + pairs])]
+            rhos = simulate_density_matrices(model, noise_params=part_noise_params)[0]
+            histogram, _ = np.histogram(
+                fidelities(rhos[: len(pairs)], rhos[len(pairs) :]), bins=bin_edges
+            )
+            levels.append(
+                {
+                    "noise_level": noise_level,
+                    "noise_params": part_noise_params,
+                    "histogram": histogram,
+                }
+            )
             progress.advance(noise_it_task)
 
-    return {"expressibility_noise": df}
+    return {
+        "expressibility_partial": {
+            "shard": str(shard),
+            "n_samples": n_pairs,
+            "n_qubits": model.n_qubits,
+            "n_bins": n_bins,
+            "levels": levels,
+        }
+    }
+
+
+def merge_shards(group: str) -> Dict:
+    """
+    Merges the partial results of the expressibility_shard runs of a group
+    into the expressibility of all samples.
+
+    Args:
+        group: Value of `sharding.group` of the shards.
+
+    Returns:
+        A dictionary containing a DataFrame as returned by `iterate_noise`.
+    """
+    partials = load_partials(group, "expressibility_shard", "expressibility_partial")
+    levels = merge_levels(partials)
+
+    _, y_haar = Expressibility.haar_integral(
+        n_qubits=partials[0]["n_qubits"],
+        n_bins=partials[0]["n_bins"],
+        scale=True,
+        cache=True,
+    )
+    for i, prob in enumerate(y_haar):
+        mlflow.log_metric("haar_probability", prob, i)
+
+    df = pd.DataFrame(
+        columns=[
+            *[n for n in levels[0][0]["noise_params"].keys()],
+            "noise_level",
+            "expressibility",
+        ]
+    )
+    for step, shards in enumerate(levels):
+        z = sum(s["histogram"] for s in shards) / partials[0]["n_samples"]
+        expressibility = float(
+            Expressibility.kullback_leibler_divergence(
+                vqc_prob_dist=z, haar_dist=y_haar
+            )[0]
+        )
+        mlflow.log_metric("kl_divergence", expressibility, step=step)
+
+        for n, v in shards[0]["noise_params"].items():
+            df.loc[step, n] = v
+        df.loc[step, "noise_level"] = shards[0]["noise_level"]
+        df.loc[step, "expressibility"] = expressibility
+
+    return {"expressibility_noise": df.sort_values("noise_level")}
@@ -1,13 +1,39 @@
 from kedro.pipeline import Pipeline, node, pipeline
 
-from .nodes import calculate_expressibility, iterate_noise
+from .nodes import (
+    input_expressibility,
+    iterate_noise,
+    iterate_noise_shard,
+    merge_shards,
+)
 
 
 def create_pipeline() -> Pipeline:
     return pipeline(
         [
             node(
-                func=calculate_expressibility,
+                func=iterate_noise,
+                inputs={
+                    "model": "model",
+                    "noise_params": "params:model.noise_params",
+                    "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
+                    "n_samples": "params:expressibility.n_samples",
+                    "n_bins": "params:expressibility.n_bins",
+                    "seed": "params:seed",
+                },
+                outputs={"expressibility_noise": "expressibility_noise"},
+                name="expressibility_iterate_noise",
+            ),
+        ]
+    )
+
+
+def create_inputs_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=input_expressibility,
                 inputs={
                     "model": "model",
                     "n_bins": "params:expressibility.n_bins",
@@ -17,21 +43,44 @@ def create_pipeline() -> Pipeline:
                     "noise_params": "params:model.noise_params",
                     "seed": "params:seed",
                 },
-                outputs="expressibility",
-                name="calculate_expressibility",
+                outputs="expressibility_inputs",
+                name="input_expressibility",
             ),
+        ]
+    )
+
+
+def create_shard_pipeline() -> Pipeline:
+    return pipeline(
+        [
             node(
-                func=iterate_noise,
+                func=iterate_noise_shard,
                 inputs={
                     "model": "model",
                     "noise_params": "params:model.noise_params",
                     "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
                     "n_samples": "params:expressibility.n_samples",
                     "n_bins": "params:expressibility.n_bins",
                     "seed": "params:seed",
+                    "shard": "params:sharding.shard",
+                    "group": "params:sharding.group",
                 },
+                outputs={"expressibility_partial": "expressibility_partial"},
+                name="expressibility_iterate_noise_shard",
+            ),
+        ]
+    )
+
+
+def create_merge_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=merge_shards,
+                inputs={"group": "params:sharding.group"},
                 outputs={"expressibility_noise": "expressibility_noise"},
-                name="expressibility_iterate_noise",
+                name="expressibility_merge_shards",
             ),
         ]
     )
@@ -1,31 +1,40 @@
 from qml_essentials.entanglement import Entanglement
 from qml_essentials.coefficients import Coefficients
 from qml_essentials.model import Model
-from qml_essentials.ansaetze import Gates
 
 import pennylane as qml
 import pennylane.numpy as np
 import mlflow
-from typing import Dict, Tuple, Callable
-from rich.progress import track
+from typing import Dict, Tuple, Callable, Union, Optional
+from dataclasses import replace
 import pandas as pd
 
 import logging
 
 from effects_of_noise_in_qfm.helpers.utils import NoiseDict
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.helpers.model import ModelSpec, as_model
+from effects_of_noise_in_qfm.helpers.noise import noise_scope
+from effects_of_noise_in_qfm.helpers.coefficients import frequency_grid
+from effects_of_noise_in_qfm.helpers.states import expectation_values_from_probs
+from effects_of_noise_in_qfm.helpers.domain import ChunkedGrid
+from effects_of_noise_in_qfm.helpers.convergence import ConvergenceMonitor
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step
+from effects_of_noise_in_qfm.helpers.progress import track
 
 log = logging.getLogger(__name__)
 
 
-def validate_problem(omegas: int, model: Model):
+def validate_problem(omegas: int, model: Union[ModelSpec, Model]):
     """
     Checks if the complexity of a given model is appropriate to do a regression
     task on a Fourier series.
 
     Args:
         omegas (int): The number of frequencies in the target Fourier series.
-        model (Model): The function approximating model.
+        model (Union[ModelSpec, Model]): The function approximating model.
     """
+    model = as_model(model)
     if model.n_layers == 1 or model.n_qubits == 1:
         if model.degree < omegas:
             log.warning(
@@ -74,9 +83,38 @@ def step_cost_and_grads(
     return new_args, forward, g
 
 
+def shot_schedule(
+    steps: int, shots: Optional[int], shots_max: Optional[int] = None
+) -> Optional[np.ndarray]:
+    """
+    Number of shots in each training step. The shots are doubled in equally
+    long phases, starting with `shots` and ending with at most `shots_max`.
+
+    Args:
+        steps (int): Number of training steps.
+        shots (Optional[int]): Shots in the first step, None for exact
+            expectation values.
+        shots_max (Optional[int]): Shots in the last phase, None for a
+            constant number of shots.
+
+    Returns:
+        Optional[np.ndarray]: Shots per step or None without shots.
+    """
+    if shots is None:
+        if shots_max is not None:
+            raise ValueError("training.shots_max requires model.shots to be set")
+        return None
+    if shots_max is None or shots_max <= shots:
+        return np.full(steps, shots, dtype=int)
+
+    n_phases = int(np.floor(np.log2(shots_max / shots))) + 1
+    phase = np.arange(steps) * n_phases // steps
+    return np.minimum(shots * 2**phase, shots_max).astype(int)
+
+
 def train_model(
-    model: Model,
-    domain_samples: np.ndarray,
+    model: Union[ModelSpec, Model],
+    domain_samples: Union[np.ndarray, ChunkedGrid],
     fourier_series: np.ndarray,
     fourier_coefficients: np.ndarray,
     noise_params: Dict,
@@ -85,13 +123,22 @@ def train_model(
     convergence_threshold: float,
     convergence_gradient: float,
     convergence_steps: int,
+    shots_max: Optional[int] = None,
+    convergence_patience: int = -1,
+    convergence_rel_improvement: float = 0.0,
 ) -> Dict[str, pd.DataFrame]:
     """
     Train a given model on the regression task of a target Fourier series.
 
+    If the model uses shots, the cost is computed from the measured
+    probabilities of all domain samples and the gradients are obtained with
+    the parameter-shift rule. The entanglement and the Fourier coefficients
+    are still computed exactly.
+
     Args:
-        model (Model): The function approximating model.
-        domain_samples (np.ndarray): The inputs to the training task.
+        model (Union[ModelSpec, Model]): The function approximating model.
+        domain_samples (Union[np.ndarray, ChunkedGrid]): The inputs to the
+            training task.
         fourier_series (np.ndarray): The target values (solutions) of the FS to
             be learned.
         fourier_coefficients (np.ndarray): The actual values for the Fourier
@@ -104,18 +151,36 @@ def train_model(
             to disable.
         convergence_gradient (float): Gradient early stopping threshold. Set to
             -1 to disable.
-        convergence_steps (int): Number of steps over which the gradient is
-            checked if convergence_gradient is set.
+        convergence_steps (int): Number of cost deltas which are averaged if
+            convergence_gradient is set.
+        shots_max (Optional[int]): Shot budget of the last steps, see
+            `shot_schedule`. Requires a ModelSpec.
+        convergence_patience (int): Stop if the cost did not improve for this
+            number of steps. Set to -1 to disable.
+        convergence_rel_improvement (float): Minimum relative improvement of
+            the best cost which resets the patience.
 
     Returns:
         Dict[str, pd.DataFrame]: Result dict containing the following:
             - "params": Parameter at each step.
             - "grads": Gradients at each step.
             - "metrics": Metrics occuring during the training (MSE, FS dist,
-                Entanglement, Fourier Coefficients).
+                Entanglement, Fourier Coefficients) and the reason
+                ("threshold", "gradient", "patience" or "steps") and step of
+                stopping.
     """
+    spec = model if isinstance(model, ModelSpec) else None
+    model = as_model(model)
     opt = qml.AdamOptimizer(stepsize=learning_rate)
 
+    shots = shot_schedule(steps, model.shots, shots_max)
+    if shots is None:
+        exact_model = model
+    elif spec is None:
+        raise ValueError("Training with shots requires a ModelSpec")
+    else:
+        exact_model = as_model(replace(spec, shots=None), reset=False)
+
     # Indices for logging params and gradients
     df_param_index_names = ["layer_dim", "param_dim"]
     df_params_index = pd.MultiIndex.from_product(
@@ -136,44 +201,61 @@ def train_model(
             "frequencies",
             "coeffs_real",
             "coeffs_imag",
+            "shots",
         ]
     )
 
     def mse(prediction, target):
         return np.mean((prediction - target) ** 2)
 
-    def cost(params, **kwargs):
-        prediction = model(params=params, **kwargs)
+    def predict(params, inputs, **kwargs):
+        # the inputs are broadcasted and must not be trainable, as the
+        # parameter-shift rule (with shots) does not support gradients with
+        # respect to broadcasted parameters (PennyLane #4462)
+        inputs = np.array(inputs, requires_grad=False)
+        prediction = model(params=params, inputs=inputs, **kwargs)
         if model.execution_type == "probs":
-            # convert probabilities for zero state to expectation value
-            raise NotImplementedError(
-                f"Not implemented gradient calculation for execeution_type "
-                f"{model.execution_type} in conjunction with shots."
-            )
-            prediction = 2 * prediction[:, 0] - 1
+            prediction = expectation_values_from_probs(prediction)
         elif isinstance(model.output_qubit, list):
             prediction = np.mean(prediction, axis=0)
-        return mse(prediction, fourier_series)
-
-    log.info(f"Training model for {steps} steps")
+        return prediction
 
-    costs = np.zeros(steps)
+    def cost(params, **kwargs):
+        if isinstance(domain_samples, ChunkedGrid):
+            # the grid is never materialized, accumulate the squared errors
+            squared_error = sum(
+                np.sum((predict(params, inputs=x, **kwargs) - fourier_series[s]) ** 2)
+                for s, x in domain_samples.chunks()
+            )
+            return squared_error / len(domain_samples)
+        return mse(predict(params, inputs=domain_samples, **kwargs), fourier_series)
 
-    # HACK
-    pqc = model.pqc
+    log.info(f"Training model for {steps} steps")
 
-    def pqc_no_batch_gate_error(*args, **kwargs):
-        Gates.batch_gate_error = False
-        ret = pqc(*args, **kwargs)
-        Gates.batch_gate_error = True
-        return ret
+    monitor = ConvergenceMonitor(
+        threshold=convergence_threshold,
+        gradient=convergence_gradient,
+        window=convergence_steps,
+        patience=convergence_patience,
+        rel_improvement=convergence_rel_improvement,
+    )
+    grid = frequency_grid(model.degree, model.n_input_feat)
 
     for step in track(range(steps), description="Training..", total=steps):
         df_metrics.loc[step, "step"] = step
 
+        if shots is not None:
+            if shots[step] != model.shots:
+                params = model.params
+                model = as_model(replace(spec, shots=int(shots[step])), reset=False)
+                model.params = params
+            mlflow.log_metric("shots", int(shots[step]), step)
+            df_metrics.loc[step, "shots"] = shots[step]
+            exact_model.params = model.params
+
         # log entanglement
         ent_cap = Entanglement.entanglement_of_formation(
-            model=model,
+            model=exact_model,
             n_samples=0,  # disable sampling, use model params
             seed=None,  # set seed none to disable warnings
             noise_params=noise_params,
@@ -183,30 +265,26 @@ def train_model(
         mlflow.log_metric("entangling_capability", ent_cap, step)
         df_metrics.loc[step, "entanglement"] = ent_cap
 
-        # HACK
-        model.pqc = pqc_no_batch_gate_error
         # log coefficients
-        coeffs, freqs = Coefficients.get_spectrum(
-            model=model,
-            shift=True,
-            trim=True,
-            noise_params=noise_params,
-            cache=False,
-        )
-        # HACK
-        model.pqc = pqc
+        # gate errors must not vary over the inputs of the spectrum
+        with noise_scope(batch_gate_error=False):
+            coeffs, _ = Coefficients.get_spectrum(
+                model=exact_model,
+                shift=True,
+                trim=True,
+                noise_params=noise_params,
+                cache=False,
+            )
 
         dist = np.sum(np.abs(coeffs - fourier_coefficients))
         log.debug(f"Coefficients dist: {dist}")
         df_metrics.loc[step, "coeff_dist"] = dist
 
-        if model.n_input_feat == 1:
-            coeffs = coeffs[len(coeffs) // 2 :]
-            freqs = freqs[len(freqs) // 2 :]
+        if grid.n_input_feat == 1:
+            positive = grid.positive_half()
+            coeffs, freqs = coeffs[positive], grid.frequencies[positive]
         else:
-            freqs = np.stack(np.meshgrid(*[freqs] * model.n_input_feat)).T.reshape(
-                *coeffs.shape, model.n_input_feat
-            )
+            freqs = grid.vectors
 
         log.debug(f"Frequencies in step {step}: {freqs}")
         log.debug(f"Coefficients in step {step}: {coeffs}")
@@ -220,11 +298,10 @@ def train_model(
             opt,
             cost,
             model.params,
-            inputs=domain_samples,
             noise_params=noise_params,
             cache=False,  # disable caching because currently no gradients are being stored
-            execution_type="expval",
-            force_mean=True,
+            execution_type="expval" if shots is None else "probs",
+            force_mean=shots is None,
         )
 
         # log params and gradients
@@ -251,7 +328,6 @@ def train_model(
         log.debug(f"Cost in step {step}: {cost_val}")
         mlflow.log_metric("mse", cost_val, step)
         df_metrics.loc[step, "mse"] = cost_val
-        costs[step] = cost_val
 
         # log control parameters
         control_params = np.array(
@@ -270,20 +346,13 @@ def train_model(
             mlflow.log_metric("control_rotation_mean", control_rotation_mean, step)
 
         # early stopping
-        if cost_val < convergence_threshold:
-            log.info(
-                f"Convergence threshold {convergence_threshold} reached after {step} steps."
-            )
-            break
-        elif (
-            step >= convergence_steps
-            and np.abs(np.gradient(costs)[step - convergence_steps : step].mean())
-            < convergence_gradient
-        ):
-            log.info(
-                f"Convergence gradient {convergence_gradient} reached after {step} steps."
-            )
+        if monitor.update(step, cost_val) is not None:
             break
+    else:
+        monitor.stop_reason, monitor.stop_step = "steps", steps - 1
+
+    df_metrics["stop_reason"] = monitor.stop_reason
+    df_metrics["stop_step"] = monitor.stop_step
 
     # Convert indices to columns
     df_params = df_params.rename_axis(df_param_index_names).reset_index()
@@ -297,8 +366,8 @@ def train_model(
 
 
 def iterate_noise(
-    model: Model,
-    domain_samples: np.ndarray,
+    model: ModelSpec,
+    domain_samples: Union[np.ndarray, ChunkedGrid],
     fourier_series: np.ndarray,
     fourier_coefficients: np.ndarray,
     noise_params: Dict,
@@ -309,6 +378,10 @@ def iterate_noise(
     convergence_gradient: float,
     convergence_steps: int,
     seed: int,
+    shots_max: Optional[int] = None,
+    noise_sweep: Optional[Dict] = None,
+    convergence_patience: int = -1,
+    convergence_rel_improvement: float = 0.0,
 ):
     """
     Iterate over different noise levels and train a given model on the
@@ -316,8 +389,9 @@ def iterate_noise(
     parameters.
 
     Args:
-        model (Model): The function approximating model.
-        domain_samples (np.ndarray): The inputs to the training task.
+        model (ModelSpec): Specification of the function approximating model.
+        domain_samples (Union[np.ndarray, ChunkedGrid]): The inputs to the
+            training task.
         fourier_series (np.ndarray): The target values (solutions) of the FS to
             be learned.
         fourier_coefficients (np.ndarray): The actual values for the Fourier
@@ -331,9 +405,17 @@ def iterate_noise(
             to disable.
         convergence_gradient (float): Gradient early stopping threshold. Set to
             -1 to disable.
-        convergence_steps (int): Number of steps over which the gradient is
-            checked if convergence_gradient is set.
+        convergence_steps (int): Number of cost deltas which are averaged if
+            convergence_gradient is set.
         seed (int): Seed for model initialisation each noise param iteration.
+        shots_max (Optional[int]): Shot budget of the last training steps, see
+            `shot_schedule`.
+        noise_sweep (Optional[Dict]): Options of the `NoiseSweep` over the
+            noise levels, which is refined on the final MSE.
+        convergence_patience (int): Patience of the early stopping, see
+            `train_model`.
+        convergence_rel_improvement (float): Minimum relative improvement,
+            see `train_model`.
 
     Returns:
         Dict[str, pd.DataFrame]: Result dict containing the following for all
@@ -344,6 +426,7 @@ def iterate_noise(
                 Entanglement, Fourier Coefficients).
     """
     noise_params = NoiseDict(noise_params)
+    sweep = NoiseSweep(noise_steps, **(noise_sweep or dict()))
     noise_columns_df = [
         *[n for n in noise_params.keys()],
         "noise_level",
@@ -353,11 +436,16 @@ def iterate_noise(
     df_grads = pd.DataFrame(columns=noise_columns_df)
     df_metrics = pd.DataFrame(columns=noise_columns_df)
 
-    for step in range(noise_steps + 1):  # +1 to go for 100%
-        part_noise_params = noise_params * (step / noise_steps)
+    for step, noise_level in enumerate(sweep):
+        noise_step(step)
+        part_noise_params = noise_params * noise_level
 
         # Reset Model
-        model.initialize_params(np.random.default_rng(seed))
+        if isinstance(model, ModelSpec):
+            # models are (re-)initialized with the seed of the specification
+            model = replace(model, seed=seed)
+        else:
+            model.initialize_params(np.random.default_rng(seed))
         res = train_model(
             model,
             domain_samples,
@@ -369,20 +457,27 @@ def iterate_noise(
             convergence_threshold,
             convergence_gradient,
             convergence_steps,
+            shots_max,
+            convergence_patience,
+            convergence_rel_improvement,
         )
 
         # Add noise data to dfs
         for df_name in ["params", "grads", "metrics"]:
             res[df_name]["noise_step"] = step
-            res[df_name]["noise_level"] = step / noise_steps
+            res[df_name]["noise_level"] = noise_level
             for n, v in part_noise_params.items():
                 res[df_name][n] = v
         df_params = pd.concat([df_params, res["params"]])
         df_grads = pd.concat([df_grads, res["grads"]])
         df_metrics = pd.concat([df_metrics, res["metrics"]])
+        mlflow.log_metric(
+            "stop_step", int(res["metrics"]["stop_step"].iloc[-1]), step=step
+        )
+        sweep.record(res["metrics"]["mse"].dropna().iloc[-1])
 
     return {
-        "params": df_params,
-        "grads": df_grads,
-        "metrics": df_metrics,
+        "params": df_params.sort_values("noise_level", kind="stable"),
+        "grads": df_grads.sort_values("noise_level", kind="stable"),
+        "metrics": df_metrics.sort_values("noise_level", kind="stable"),
     }
@@ -24,11 +24,15 @@ def create_noise_iteration_pipeline() -> Pipeline:
                     "fourier_coefficients": "fourier_coefficients",
                     "noise_params": "params:model.noise_params",
                     "noise_steps": "params:model.noise_steps",
+                    "noise_sweep": "params:model.noise_sweep",
                     "steps": "params:training.steps",
                     "learning_rate": "params:training.learning_rate",
                     "convergence_threshold": "params:training.convergence.threshold",
                     "convergence_gradient": "params:training.convergence.gradient",
                     "convergence_steps": "params:training.convergence.steps",
+                    "convergence_patience": "params:training.convergence.patience",
+                    "convergence_rel_improvement": "params:training.convergence.rel_improvement",
+                    "shots_max": "params:training.shots_max",
                     "seed": "params:seed",
                 },
                 outputs={
@@ -67,6 +71,9 @@ def create_pipeline() -> Pipeline:
                     "convergence_threshold": "params:training.convergence.threshold",
                     "convergence_gradient": "params:training.convergence.gradient",
                     "convergence_steps": "params:training.convergence.steps",
+                    "convergence_patience": "params:training.convergence.patience",
+                    "convergence_rel_improvement": "params:training.convergence.rel_improvement",
+                    "shots_max": "params:training.shots_max",
                 },
                 outputs={
                     "params": "trained_params",
@@ -1,3 +1,226 @@
+from typing import Any, List, Optional
+import ast
 import logging
 
+import mlflow
+from mlflow.tracking import MlflowClient
+import pandas as pd
+
 log = logging.getLogger(__name__)
+
+
+def _as_list(value: Any) -> List:
+    """
+    Array valued columns are stored as string representation in the CSV
+    datasets, so we have to parse them after loading.
+    """
+    if isinstance(value, str):
+        return ast.literal_eval(value)
+    return list(value)
+
+
+def log_figure(
+    fig, name: str, file_format: str = "html", run_id: Optional[str] = None
+) -> None:
+    """
+    Logs a plotly figure as MLflow artifact. If no run_id is given, the
+    figure is logged to the active run.
+
+    Args:
+        fig (go.Figure): Figure to log.
+        name (str): Artifact name without file extension.
+        file_format (str): "json" for a plotly JSON artifact or any format
+            supported by `mlflow.log_figure` (e.g. "html", "png", "pdf").
+        run_id (Optional[str]): Run to log the figure to.
+    """
+    if run_id is None:
+        run_id = mlflow.active_run().info.run_id
+    artifact_file = f"{name}.{file_format}"
+
+    client = MlflowClient()
+    if file_format == "json":
+        client.log_text(run_id, fig.to_json(), artifact_file)
+    else:
+        client.log_figure(run_id, fig, artifact_file)
+    log.info(f"Logged figure {artifact_file} to run {run_id}")
+
+
+def plot_coefficients(
+    coefficients_noise: pd.DataFrame,
+    enabled: bool,
+    file_format: str = "html",
+    run_id: Optional[str] = None,
+) -> None:
+    """
+    Plots the mean absolute coefficients over the frequencies for each noise
+    level.
+
+    Args:
+        coefficients_noise (pd.DataFrame): Result of the coefficients pipeline.
+        enabled (bool): Whether to render the figure at all.
+        file_format (str): File format of the figure artifact.
+        run_id (Optional[str]): Run to log the figure to.
+    """
+    if not enabled:
+        return
+
+    import plotly.graph_objects as go
+    import plotly.colors as pc
+
+    colors = pc.sample_colorscale("Plasma", max(len(coefficients_noise), 2))
+
+    data = []
+    for i, (_, row) in enumerate(coefficients_noise.iterrows()):
+        frequencies = _as_list(row["frequencies"])
+        coeffs_abs_mean = _as_list(row["coeffs_abs_mean"])
+        if len(frequencies) > 0 and isinstance(frequencies[0], list):
+            # multi-dimensional inputs: label the flattened frequency vectors
+            frequencies = [str(f) for f in pd.Series(frequencies).explode().tolist()]
+            coeffs_abs_mean = pd.Series(coeffs_abs_mean).explode().tolist()
+        data.append(
+            go.Scatter(
+                x=frequencies,
+                y=coeffs_abs_mean,
+                mode="markers",
+                name=f"Noise level {float(row['noise_level']):.2f}",
+                marker=dict(color=colors[i]),
+            )
+        )
+
+    fig = go.Figure(data=data)
+    fig.update_layout(
+        title="Absolute value of the coefficients",
+        xaxis_title="Frequency",
+        yaxis_title="Absolute value of the coefficient",
+        template="plotly_white",
+        yaxis_type="log",
+    )
+    log_figure(fig, "coefficients_noise", file_format, run_id)
+
+
+def _plot_over_noise(
+    df: pd.DataFrame,
+    metric: str,
+    title: str,
+    name: str,
+    file_format: str,
+    run_id: Optional[str],
+) -> None:
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=df["noise_level"],
+                y=df[metric],
+                mode="lines+markers",
+            )
+        ]
+    )
+    fig.update_layout(
+        title=title,
+        xaxis_title="Noise level",
+        yaxis_title=title,
+        template="plotly_white",
+    )
+    log_figure(fig, name, file_format, run_id)
+
+
+def plot_expressibility(
+    expressibility_noise: pd.DataFrame,
+    enabled: bool,
+    file_format: str = "html",
+    run_id: Optional[str] = None,
+) -> None:
+    """
+    Plots the expressibility (KL divergence to the Haar distribution) over
+    the noise levels.
+
+    Args:
+        expressibility_noise (pd.DataFrame): Result of the expressibility
+            pipeline.
+        enabled (bool): Whether to render the figure at all.
+        file_format (str): File format of the figure artifact.
+        run_id (Optional[str]): Run to log the figure to.
+    """
+    if not enabled:
+        return
+
+    _plot_over_noise(
+        expressibility_noise,
+        "expressibility",
+        "Expressibility",
+        "expressibility_noise",
+        file_format,
+        run_id,
+    )
+
+
+def plot_entanglement(
+    entangling_capability_noise: pd.DataFrame,
+    enabled: bool,
+    file_format: str = "html",
+    run_id: Optional[str] = None,
+) -> None:
+    """
+    Plots the entangling capability over the noise levels.
+
+    Args:
+        entangling_capability_noise (pd.DataFrame): Result of the entanglement
+            pipeline.
+        enabled (bool): Whether to render the figure at all.
+        file_format (str): File format of the figure artifact.
+        run_id (Optional[str]): Run to log the figure to.
+    """
+    if not enabled:
+        return
+
+    _plot_over_noise(
+        entangling_capability_noise,
+        "entangling_capability",
+        "Entangling capability",
+        "entangling_capability_noise",
+        file_format,
+        run_id,
+    )
+
+
+def plot_training(
+    trained_metrics: pd.DataFrame,
+    enabled: bool,
+    file_format: str = "html",
+    run_id: Optional[str] = None,
+) -> None:
+    """
+    Plots the training loss over the training steps for each noise level.
+
+    Args:
+        trained_metrics (pd.DataFrame): Metrics of the training pipeline.
+        enabled (bool): Whether to render the figure at all.
+        file_format (str): File format of the figure artifact.
+        run_id (Optional[str]): Run to log the figure to.
+    """
+    if not enabled:
+        return
+
+    import plotly.graph_objects as go
+
+    fig = go.Figure(
+        data=[
+            go.Scatter(
+                x=df["step"],
+                y=df["mse"],
+                mode="lines",
+                name=f"Noise level {float(noise_level):.2f}",
+            )
+            for noise_level, df in trained_metrics.groupby("noise_level")
+        ]
+    )
+    fig.update_layout(
+        title="Training loss",
+        xaxis_title="Step",
+        yaxis_title="MSE",
+        template="plotly_white",
+        yaxis_type="log",
+    )
+    log_figure(fig, "trained_metrics", file_format, run_id)
@@ -1 +1,69 @@
 from kedro.pipeline import Pipeline, node, pipeline
+
+from .nodes import (
+    plot_coefficients,
+    plot_expressibility,
+    plot_entanglement,
+    plot_training,
+)
+
+
+def _figure_inputs(dataset: str) -> dict:
+    return {
+        dataset: dataset,
+        "enabled": "params:visualization.enabled",
+        "file_format": "params:visualization.format",
+        "run_id": "params:visualization.run_id",
+    }
+
+
+def create_coefficients_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=plot_coefficients,
+                inputs=_figure_inputs("coefficients_noise"),
+                outputs=None,
+                name="plot_coefficients",
+            ),
+        ]
+    )
+
+
+def create_expressibility_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=plot_expressibility,
+                inputs=_figure_inputs("expressibility_noise"),
+                outputs=None,
+                name="plot_expressibility",
+            ),
+        ]
+    )
+
+
+def create_entanglement_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=plot_entanglement,
+                inputs=_figure_inputs("entangling_capability_noise"),
+                outputs=None,
+                name="plot_entanglement",
+            ),
+        ]
+    )
+
+
+def create_training_pipeline() -> Pipeline:
+    return pipeline(
+        [
+            node(
+                func=plot_training,
+                inputs=_figure_inputs("trained_metrics"),
+                outputs=None,
+                name="plot_training",
+            ),
+        ]
+    )
@@ -7,7 +7,13 @@ https://docs.kedro.org/en/stable/kedro_project_setup/settings.html."""
 # from pandas_viz.hooks import ProjectHooks
 
 # Hooks are executed in a Last-In-First-Out (LIFO) order.
-# HOOKS = (ProjectHooks(),)
+from effects_of_noise_in_qfm.hooks import (  # noqa: E402
+    ResourceHooks,
+    SharedDataHooks,
+    TelemetryHooks,
+)
+
+HOOKS = (SharedDataHooks(), ResourceHooks(), TelemetryHooks())
 
 # Installed plugins for which to disable hook auto-registration.
 # DISABLE_HOOKS_FOR_PLUGINS = ("kedro-viz",)
@@ -15,11 +21,17 @@ https://docs.kedro.org/en/stable/kedro_project_setup/settings.html."""
 # Class that manages storing KedroSession data.
 from pathlib import Path  # noqa: E402
 
-from kedro_viz.integrations.kedro.sqlite_store import SQLiteStore  # noqa: E402
+from effects_of_noise_in_qfm.helpers.utils import batch_mode  # noqa: E402
+
+# The kedro-viz session store is only needed for experiment tracking in
+# kedro-viz. Batch jobs (QFM_BATCH_MODE=1) skip it and its import, and fall
+# back to Kedro's default (non-persistent) session store.
+if not batch_mode():
+    from kedro_viz.integrations.kedro.sqlite_store import SQLiteStore  # noqa: E402
 
-SESSION_STORE_CLASS = SQLiteStore
-# Keyword arguments to pass to the `SESSION_STORE_CLASS` constructor.
-SESSION_STORE_ARGS = {"path": str(Path(__file__).parents[2])}
+    SESSION_STORE_CLASS = SQLiteStore
+    # Keyword arguments to pass to the `SESSION_STORE_CLASS` constructor.
+    SESSION_STORE_ARGS = {"path": str(Path(__file__).parents[2])}
 
 # Directory that holds configuration.
 # CONF_SOURCE = "conf"
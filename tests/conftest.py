@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def progress_file(tmp_path, monkeypatch):
+    """
+    Writes the progress records of batch mode (see helpers/progress.py) to
+    the temporary directory of the test instead of logs/progress.
+    """
+    path = tmp_path / "progress.jsonl"
+    monkeypatch.setenv("QFM_PROGRESS_FILE", str(path))
+    return path
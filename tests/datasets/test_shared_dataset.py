@@ -0,0 +1,48 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from effects_of_noise_in_qfm.datasets.shared_dataset import SharedArrayDataset
+from effects_of_noise_in_qfm.helpers.domain import ChunkedGrid
+
+
+def test_array_is_memory_mapped(tmp_path):
+    dataset = SharedArrayDataset(name="fourier_series", directory=tmp_path)
+    data = np.linspace(0, 1, 11)
+    dataset.save(data)
+
+    loaded = dataset.load()
+    assert isinstance(loaded, np.memmap)
+    assert not loaded.flags.writeable
+    np.testing.assert_array_equal(loaded, data)
+
+    dataset.release()
+    assert not dataset.exists()
+    # the memory map is still valid
+    np.testing.assert_array_equal(loaded, data)
+
+
+def test_other_objects_are_pickled(tmp_path):
+    dataset = SharedArrayDataset(name="domain_samples", directory=tmp_path)
+    grid = ChunkedGrid(domain=(0, 1), n_points_per_dim=4, n_dims=2)
+    dataset.save(grid)
+    assert dataset.load() == grid
+
+
+def _load_sum(dataset):
+    data = dataset.load()
+    return isinstance(data, np.memmap), float(data.sum())
+
+
+def test_load_in_other_processes(tmp_path):
+    dataset = SharedArrayDataset(name="fourier_series", directory=tmp_path)
+    data = np.linspace(0, 1, 11)
+    dataset.save(data)
+
+    # spawned workers receive the pickled dataset, not the array
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=2, mp_context=context) as executor:
+        results = list(executor.map(_load_sum, [dataset] * 4))
+
+    assert results == [(True, float(data.sum()))] * 4
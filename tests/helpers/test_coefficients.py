@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from effects_of_noise_in_qfm.helpers.coefficients import (
+    SpectrumSamples,
+    coefficient_statistics,
+    frequency_grid,
+)
+
+
+def _coeffs(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(size=shape) + 1j * rng.normal(size=shape)
+
+
+def test_statistics():
+    coeffs = _coeffs((50, 3, 3))
+    statistics = coefficient_statistics(coeffs)
+
+    np.testing.assert_allclose(statistics["coeffs_var"], coeffs.var(axis=0))
+    np.testing.assert_allclose(statistics["coeffs_abs_var"], np.abs(coeffs).var(axis=0))
+    np.testing.assert_allclose(
+        statistics["coeffs_co_var_real_imag"],
+        np.mean(
+            (coeffs.real - coeffs.real.mean(axis=0))
+            * (coeffs.imag - coeffs.imag.mean(axis=0)),
+            axis=0,
+        ),
+    )
+    assert np.array_equal(statistics["coeffs_full_imag"], coeffs.T.imag)
+
+    single = coefficient_statistics(coeffs, "single")
+    np.testing.assert_allclose(single["coeffs_var"], coeffs.var(axis=0), rtol=1e-5)
+
+    with pytest.raises(ValueError):
+        coefficient_statistics(coeffs, "half")
+
+
+def test_spectrum_samples():
+    # batches as returned by Coefficients.get_spectrum, samples last
+    batches = [_coeffs((5, 4), seed=0), _coeffs((5, 2), seed=1), _coeffs(5, seed=2)]
+    samples = SpectrumSamples(10, n_input_feat=1)
+    for batch in batches:
+        samples.add(batch)
+
+    assert samples.coefficients.shape == (7, 5)
+    assert samples.coefficients.flags["C_CONTIGUOUS"]
+    expected = np.concatenate([b.reshape(5, -1) for b in batches], axis=-1).T
+    assert np.array_equal(samples.coefficients, expected)
+
+
+def test_frequency_grid():
+    grid = frequency_grid(2, 2)
+    assert frequency_grid(2, 2) is grid
+    assert grid.shape == (5, 5) and grid.vectors.shape == (5, 5, 2)
+    assert tuple(grid.vectors[4, 1]) == (2, -1)
+    assert not grid.vectors.flags.writeable
+
+    # one of k and -k, and the zero frequency
+    half = grid.positive_half()
+    assert half.sum() == (grid.size + 1) // 2
+    flat = grid.ravel((4, 1))
+    assert tuple(grid.vectors[grid.unravel(grid.conjugate[flat])]) == (-2, 1)
+    assert half.ravel()[flat] and not half.ravel()[grid.conjugate[flat]]
+
+    assert list(frequency_grid(1, 1, mts=2).frequencies) == [-1, -0.5, 0, 0.5, 1]
@@ -0,0 +1,30 @@
+import numpy as np
+
+from effects_of_noise_in_qfm.helpers.convergence import ConvergenceMonitor
+
+
+def test_threshold():
+    monitor = ConvergenceMonitor(threshold=0.5)
+    assert monitor.update(0, 1.0) is None
+    assert monitor.update(1, 0.4) == "threshold"
+    assert monitor.stop_step == 1
+
+
+def test_gradient_moving_average():
+    monitor = ConvergenceMonitor(gradient=1e-3, window=10)
+    costs = 1 / (1 + np.arange(1000))
+    for step, cost in enumerate(costs):
+        if monitor.update(step, cost) is not None:
+            break
+
+    assert monitor.stop_reason == "gradient"
+    # same as the mean of the last 10 deltas
+    assert np.isclose(monitor.mean_delta, np.diff(costs[: step + 1])[-10:].mean())
+    assert abs(np.diff(costs[:step])[-10:].mean()) >= 1e-3
+
+
+def test_patience():
+    monitor = ConvergenceMonitor(patience=5, rel_improvement=0.01)
+    reasons = [monitor.update(step, 1.0 - 1e-4 * step) for step in range(10)]
+    assert reasons[:5] == [None] * 5
+    assert reasons[5] == "patience"
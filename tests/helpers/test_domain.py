@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from effects_of_noise_in_qfm.helpers.domain import (
+    ChunkedGrid,
+    fourier_series,
+    grid_points,
+    quasi_random_points,
+)
+
+
+def test_chunked_grid_matches_grid():
+    grid = ChunkedGrid((-1.0, 1.0), n_points_per_dim=5, n_dims=3, chunk_size=7)
+    assert len(grid) == 125
+    np.testing.assert_allclose(
+        np.concatenate(list(grid)), grid_points((-1.0, 1.0), 5, 3)
+    )
+
+
+def test_quasi_random_points_in_domain():
+    points = quasi_random_points((-np.pi, np.pi), 128, 2, method="sobol", seed=0)
+    assert points.shape == (128, 2)
+    assert np.all(np.abs(points) <= np.pi)
+
+    # exactly the requested number of points, although not balanced
+    with pytest.warns(UserWarning):
+        points = quasi_random_points((-np.pi, np.pi), 100, 2, method="sobol")
+    assert points.shape == (100, 2)
+
+
+def test_fourier_series_2d():
+    rng = np.random.default_rng(0)
+    omegas = np.arange(-2, 3)
+    coefficients = rng.random((5, 5)) + 1j * rng.random((5, 5))
+    inputs = rng.random((10, 2))
+
+    expected = [
+        sum(
+            coefficients[a, b] * np.exp(1j * (omegas[a] * x[0] + omegas[b] * x[1]))
+            for a in range(5)
+            for b in range(5)
+        )
+        for x in inputs
+    ]
+    np.testing.assert_allclose(fourier_series(coefficients, omegas, inputs), expected)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from effects_of_noise_in_qfm.helpers import entanglement as batched
+
+
+def density(state):
+    state = np.asarray(state, dtype=complex)
+    return np.outer(state, state.conj())
+
+
+class TestBatchedEntanglement:
+    def test_product_and_bell_states(self):
+        product = density([1, 0, 0, 0])
+        bell = density(np.array([1, 0, 0, 1]) / np.sqrt(2))
+        rhos = np.stack([product, bell])
+
+        assert np.allclose(batched.meyer_wallach(rhos, 2), [0.0, 1.0])
+        assert np.allclose(
+            batched.entanglement_of_formation(rhos, 2, always_decompose=True),
+            [0.0, 1.0],
+        )
+
+    def test_mixture_of_bell_states_is_decomposed(self):
+        phi_plus = density(np.array([1, 0, 0, 1]) / np.sqrt(2))
+        phi_minus = density(np.array([1, 0, 0, -1]) / np.sqrt(2))
+        rho = 0.75 * phi_plus + 0.25 * phi_minus
+
+        # both (non-degenerate) eigenstates are maximally entangled
+        assert np.isclose(batched.entanglement_of_formation(rho[None], 2)[0], 1.0)
+
+    def test_entanglement_of_formation_uses_eigenvector_columns(self):
+        # MW = 2 * (1 - 7/9) for both reduced states
+        psi = density(np.array([1, 1, 0, 1]) / np.sqrt(3))
+        rho = 0.75 * psi + 0.25 * density([0, 0, 1, 0])
+
+        # the eigenstates are psi and the product state |10>
+        assert np.allclose(
+            batched.entanglement_of_formation(
+                np.stack([psi, rho]), 2, always_decompose=True
+            ),
+            [4 / 9, 0.75 * 4 / 9],
+        )
+
+    def test_stacked_batch_shape(self):
+        rhos = np.tile(density([1, 0, 0, 0]), (3, 5, 1, 1))
+
+        assert batched.entanglement(rhos, 2, "EF", chunk_size=2).shape == (3, 5)
+        assert batched.purities(rhos).shape == (3, 5)
+
+    def test_results_are_clipped(self):
+        # e.g. rounding errors of the simulation
+        bell = 1.01 * density(np.array([1, 0, 0, 1]) / np.sqrt(2))
+
+        assert batched.entanglement(bell[None], 2, "EF")[0] == 1.0
+
+    def test_unsupported_measure(self):
+        with pytest.raises(ValueError, match="entanglement.measure"):
+            batched.validate_measure("RE")
@@ -0,0 +1,99 @@
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+
+import numpy as np
+import pytest
+from qml_essentials.ansaetze import Gates
+
+from effects_of_noise_in_qfm.helpers.model import (
+    ModelCache,
+    ModelSpec,
+    as_model,
+    precision_deviation,
+)
+
+
+def _spec(**kwargs):
+    return ModelSpec(
+        n_qubits=2,
+        n_layers=1,
+        circuit_type="Circuit_15_Plus",
+        data_reupload=True,
+        initialization="random",
+        initialization_domain=[0, 6.283185307179586],
+        encoding=["RY"],
+        shots=-1,
+        output_qubit=-1,
+        seed=1000,
+        mp_threshold=-1,
+        **kwargs,
+    )
+
+
+def test_spec_is_picklable():
+    spec = _spec(selective_noise="pqc", noise_layers=[0])
+    assert pickle.loads(pickle.dumps(spec)) == spec
+
+
+def test_invalid_selective_noise():
+    with pytest.raises(ValueError):
+        _spec(selective_noise="encoding")
+
+
+def test_model_cache_reuses_models():
+    cache = ModelCache(maxsize=1)
+    model = cache.get(_spec())
+    model.params = model.params * 0
+
+    other_seed = _spec()
+    other_seed.seed = 1001
+    assert cache.get(other_seed) is model
+    assert cache.info()["hits"] == 1
+    # cached models are reset to the state of a freshly built one
+    np.testing.assert_allclose(model.params, other_seed.build().params)
+
+    cache.get(_spec(selective_noise="iec"))
+    assert cache.info()["misses"] == 2
+    assert cache.info()["size"] == 1
+
+
+def test_model_cache_without_reset():
+    cache = ModelCache(maxsize=2)
+    model = cache.get(_spec())
+    model.params = model.params * 0
+
+    Gates.init_rng(1)
+    expected = np.random.default_rng(1).random()
+    # neither a hit nor a miss resets the model or the gate error generator
+    assert cache.get(_spec(), reset=False) is model
+    cache.get(_spec(selective_noise="iec"), reset=False)
+    assert Gates.rng.random() == expected
+    assert np.all(model.params == 0)
+
+
+def test_model_cache_reset_is_thread_local():
+    cache = ModelCache(maxsize=2)
+    Gates.init_rng(1)
+    expected = np.random.default_rng(1).random()
+
+    # resets the model and the gate error generator of the other thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        model = executor.submit(cache.get, _spec()).result()
+    assert cache.get(_spec(), reset=False) is not model
+    assert Gates.rng.random() == expected
+
+
+def test_precision_deviation_is_side_effect_free():
+    spec = _spec(precision="single")
+    model = as_model(spec)
+    params = model.params.copy()
+    Gates.init_rng(1)
+    expected = np.random.default_rng(1).random()
+
+    # both variants draw the same gate errors
+    deviation = precision_deviation(
+        spec, params[..., :1] * 0, lambda m: Gates.rng.random()
+    )
+    assert deviation == 0
+    assert Gates.rng.random() == expected
+    np.testing.assert_array_equal(model.params, params)
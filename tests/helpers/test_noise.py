@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+
+import numpy as np
+from qml_essentials.ansaetze import Gates
+
+from effects_of_noise_in_qfm.helpers.noise import (
+    batch_gate_error,
+    noise_options,
+    noise_scope,
+)
+
+
+def test_noise_scope_nesting():
+    with noise_scope(batch_gate_error=False) as options:
+        assert not options.batch_gate_error
+        with noise_scope(batch_gate_error=True):
+            assert noise_options().batch_gate_error
+        assert not noise_options().batch_gate_error
+    assert noise_options().batch_gate_error
+
+
+def test_batch_gate_error_is_thread_local():
+    entered = threading.Event()
+    release = threading.Event()
+
+    def disabled():
+        with batch_gate_error(False):
+            entered.set()
+            release.wait(timeout=5)
+            return Gates.batch_gate_error
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(disabled)
+        entered.wait(timeout=5)
+        # the other thread does not affect this one
+        assert Gates.batch_gate_error
+        release.set()
+        assert future.result() is False
+
+
+def test_gate_error_rng_is_thread_local():
+    Gates.init_rng(1)
+    expected = np.random.default_rng(1).random()
+
+    def reseed():
+        Gates.init_rng(2)
+        return Gates.rng.random()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(reseed).result() == np.random.default_rng(2).random()
+    # the other thread does not affect this one
+    assert Gates.rng.random() == expected
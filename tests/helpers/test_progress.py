@@ -0,0 +1,21 @@
+import json
+
+from effects_of_noise_in_qfm.helpers.progress import ThroughputProgress
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step, telemetry
+
+
+def test_throughput_records(tmp_path):
+    path = tmp_path / "progress" / "progress.jsonl"
+    telemetry.start_node("node")
+    noise_step(1)
+    with ThroughputProgress(str(path), record_interval=0) as progress:
+        task = progress.add_task("Sampling...", total=4)
+        for _ in range(2):
+            progress.advance(task, advance=2)
+    telemetry.reset()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["completed"] for r in records] == [2, 4, 4]
+    assert [r["final"] for r in records] == [False, False, True]
+    assert records[0]["node"] == "node" and records[0]["noise_step"] == 1
+    assert records[0]["eta_s"] is not None and records[0]["rss_mb"] > 0
@@ -0,0 +1,45 @@
+import pytest
+
+from effects_of_noise_in_qfm.helpers.resources import (
+    BASE_MEMORY_MB,
+    estimate_resources,
+    n_domain_samples,
+)
+
+PARAMS = {
+    "data": {"domain": [-3.1415, 3.1415], "omegas": 5, "sampling": "grid"},
+    "model": {
+        "n_qubits": 3,
+        "n_layers": 1,
+        "data_reupload": True,
+        "encoding": ["RY"],
+        "noise_steps": 4,
+        "precision": "double",
+    },
+    "sequential": {"enabled": False},
+    "sharding": {"shard": "1/4"},
+    "coefficients": {"n_samples": 10, "scale": True, "oversampling": 1},
+    "training": {"steps": 100},
+}
+
+
+def test_coefficients():
+    resources = estimate_resources("coefficients", PARAMS)
+    # 5 noise levels, 2**3 * 10 samples and 2 * 3 + 1 grid points
+    assert resources.evaluations == 5 * 80 * 7
+    assert resources.batch == 80 * 7
+    assert resources.density_matrix_bytes == 64 * 16
+    assert resources.peak_memory_mb > BASE_MEMORY_MB
+
+    assert estimate_resources("coefficients_shard", PARAMS).batch == 20 * 7
+    assert estimate_resources("coefficients_merge", PARAMS).evaluations == 0
+
+
+def test_training():
+    assert n_domain_samples(PARAMS["data"], 2) == 32**2
+    resources = estimate_resources("__default__", PARAMS)
+    assert resources.evaluations == 5 * 100 * (1 + 7 + 32)
+    assert resources.batch == 32
+
+    with pytest.raises(ValueError):
+        estimate_resources("unknown", PARAMS)
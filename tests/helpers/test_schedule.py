@@ -0,0 +1,102 @@
+import sys
+
+import numpy as np
+import pandas as pd
+
+from effects_of_noise_in_qfm.helpers.schedule import (
+    Config,
+    CostModel,
+    Estimate,
+    features,
+    grid,
+    pack,
+    run_local,
+)
+
+DEFAULTS = {
+    "model": {
+        "n_qubits": 5,
+        "n_layers": 1,
+        "circuit_type": "Circuit_15",
+        "noise_params": {"BitFlip": 0.0, "GateError": 0.0},
+        "noise_steps": 2,
+    },
+    "coefficients": {"n_samples": 250},
+}
+
+
+def test_features():
+    config = grid(
+        ["coefficients"], {"noise": ["GateError"], "model.n_qubits+data.omegas": [3]}
+    )[0]
+    assert config.params["data.omegas"] == 3
+    assert features(config.pipeline, config.params, DEFAULTS) == {
+        "n_qubits": 3,
+        "n_layers": 1,
+        "circuit_type": "Circuit_15",
+        "noise_type": "GateError",
+        "n_samples": 250.0,
+        "noise_steps": 2,
+    }
+    # parameters as logged to MLflow
+    logged = {
+        "model.n_qubits": "4",
+        "model.n_layers": "1",
+        "model.circuit_type": "Circuit_19",
+        "model.noise_params": "{'BitFlip': 0.0, 'GateError': 0.0}",
+        "model.noise_steps": "10",
+        "coefficients.n_samples": "100",
+        "sharding.shard": "1/4",
+    }
+    f = features("coefficients_shard", logged)
+    assert f["noise_type"] == "noiseless" and f["n_samples"] == 25
+
+
+def test_cost_model():
+    rng = np.random.default_rng(1000)
+    rows = []
+    for n_qubits in [3, 4, 5]:
+        for noise_type in ["BitFlip", "GateError"]:
+            f = dict(
+                n_qubits=n_qubits,
+                n_layers=1,
+                circuit_type="Circuit_15",
+                noise_type=noise_type,
+                n_samples=250.0,
+                noise_steps=10,
+            )
+            factor = 3 if noise_type == "GateError" else 1
+            duration = 60 * factor * 2.0**n_qubits * rng.uniform(0.9, 1.1)
+            rows.append(
+                dict(f, pipeline="coefficients", duration=duration, memory=np.nan)
+            )
+    model = CostModel().fit(pd.DataFrame(rows))
+
+    f = dict(rows[0], n_qubits=6, noise_type="GateError")
+    predicted = model.predict("coefficients", f).seconds
+    assert 0.5 < predicted / (60 * 3 * 2.0**6) < 2
+    assert model.predict("coefficients", f).memory_mb is None
+    # longer runs are predicted for more samples
+    assert model.predict("coefficients", dict(f, n_samples=500.0)).seconds > predicted
+
+
+def test_pack():
+    configs = [Config("coefficients", {"seed": i}) for i in range(5)]
+    estimates = [Estimate(s) for s in [3, 7, 4, 5, 6]]
+
+    jobs = pack(configs, estimates, n_jobs=2)
+    assert sorted(j.seconds for j in jobs) == [11, 14]
+    assert [e.seconds for e in jobs[0].estimates] == [7, 4, 3]
+
+    jobs = pack(configs, estimates, time_limit=10)
+    assert all(j.seconds <= 10 for j in jobs) and len(jobs) == 3
+
+
+def test_run_local():
+    configs = [Config("a", {"code": 0}), Config("b", {"code": 3})]
+
+    def command(config):
+        return [sys.executable, "-c", f"raise SystemExit({config.params['code']})"]
+
+    codes = run_local(configs, [Estimate(1), Estimate(2)], workers=2, command=command)
+    assert codes == [0, 3]
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from effects_of_noise_in_qfm.helpers.sequential import SequentialSampling
+
+
+def test_batches():
+    assert list(SequentialSampling(batch_size=4).batches(10)) == [10]
+    assert list(SequentialSampling(enabled=True, batch_size=4).batches(10)) == [
+        4,
+        4,
+        2,
+    ]
+
+
+@pytest.mark.parametrize("method", ["se", "bootstrap"])
+def test_converged(method):
+    sampling = SequentialSampling(enabled=True, rtol=0.05, method=method, seed=0)
+    samples = np.random.default_rng(0).normal(1.0, 0.1, size=(1000, 3))
+
+    assert not sampling.converged(samples[:1])
+    assert sampling.converged(samples)
+    assert sampling.relative_half_width(samples) == pytest.approx(
+        1.96 * 0.1 / np.sqrt(1000), rel=0.2
+    )
+
+
+def test_invalid_method():
+    with pytest.raises(ValueError):
+        SequentialSampling(method="jackknife")
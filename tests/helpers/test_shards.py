@@ -0,0 +1,33 @@
+import pytest
+
+from effects_of_noise_in_qfm.helpers.shards import Shard, merge_levels
+
+
+@pytest.mark.parametrize("n_samples, count", [(10, 3), (7, 7), (1000, 16)])
+def test_samples_partition(n_samples, count):
+    slices = [Shard(i, count).samples(n_samples) for i in range(count)]
+    indices = [i for s in slices for i in range(n_samples)[s]]
+    assert indices == list(range(n_samples))
+
+
+def test_parse():
+    assert Shard.parse("3/16") == Shard(3, 16)
+    assert str(Shard.parse("3/16")) == "3/16"
+    for shard in ["16/16", "-1/4", "0/0", "1", "a/b"]:
+        with pytest.raises(ValueError):
+            Shard.parse(shard)
+    with pytest.raises(ValueError):
+        Shard(0, 4).samples(3)
+
+
+def test_merge_levels():
+    partials = [
+        {"n_samples": 4, "levels": [{"noise_level": 0.0, "x": i}]} for i in range(2)
+    ]
+    assert merge_levels(partials) == [
+        [{"noise_level": 0.0, "x": 0}, {"noise_level": 0.0, "x": 1}]
+    ]
+
+    partials[1]["levels"][0]["noise_level"] = 0.5
+    with pytest.raises(ValueError):
+        merge_levels(partials)
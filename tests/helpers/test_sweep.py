@@ -0,0 +1,49 @@
+import numpy as np
+
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+
+
+def test_uniform_sweep():
+    sweep = NoiseSweep(4)
+    levels = []
+    for level in sweep:
+        levels.append(level)
+        sweep.record(level)
+    np.testing.assert_allclose(levels, [0, 0.25, 0.5, 0.75, 1])
+
+
+def test_adaptive_sweep_refines_steep_regions():
+    sweep = NoiseSweep(4, mode="adaptive", max_evaluations=12)
+    for level in sweep:
+        sweep.record(np.tanh(50 * (level - 0.6)))
+
+    assert len(sweep.levels) == 12
+    levels = np.sort(sweep.levels)
+    # the finest intervals are placed around the steep change at 0.6
+    i = np.argsort(np.diff(levels))[:4]
+    assert np.all(levels[i] >= 0.5) and np.all(levels[i + 1] <= 0.7)
+
+
+def test_adaptive_sweep_needs_fewer_evaluations_for_smooth_metrics():
+    uniform = NoiseSweep(10)
+    adaptive = NoiseSweep(10, mode="adaptive")
+    for sweep in [uniform, adaptive]:
+        for level in sweep:
+            sweep.record(np.exp(-3 * level))
+
+    assert len(adaptive.levels) < len(uniform.levels)
+    # the sampled metric is still accurate
+    levels = np.sort(adaptive.levels)
+    x = np.linspace(0, 1, 101)
+    np.testing.assert_allclose(
+        np.interp(x, levels, np.exp(-3 * levels)), np.exp(-3 * x), atol=0.05
+    )
+
+
+def test_adaptive_sweep_ignores_noise_of_flat_metrics():
+    rng = np.random.default_rng(1000)
+    sweep = NoiseSweep(10, mode="adaptive")
+    for level in sweep:
+        sweep.record(0.5 + 1e-3 * rng.normal())
+
+    assert sweep.levels == [0, 0.5, 1]
@@ -0,0 +1,26 @@
+import numpy as np
+
+from effects_of_noise_in_qfm.helpers.telemetry import noise_step, telemetry
+
+from tests.helpers.test_model import _spec
+
+
+def test_executions_are_recorded():
+    model = _spec().build()
+    telemetry.reset()
+    telemetry.start_node("node")
+
+    model(inputs=np.zeros(3))
+    noise_step(0)
+    model(inputs=np.zeros(3), noise_params={"BitFlip": 0.1})
+    model(inputs=np.zeros(3), noise_params={"BitFlip": 0.1})
+
+    stats = telemetry.node_stats("node")
+    assert stats[None].calls == 1 and stats[None].circuits == 3
+    # density matrices of two qubits
+    assert stats[0].calls == 2 and stats[0].state_bytes == 3 * 16 * 16
+
+    summary = telemetry.summary()["node"]
+    assert summary["total"]["circuits"] == 9
+    assert list(summary["noise_steps"]) == ["0"]
+    telemetry.reset()
@@ -0,0 +1,46 @@
+from mlflow.tracking import MlflowClient
+
+from effects_of_noise_in_qfm.helpers.tracking import migrate, open_store
+
+
+def test_indexes(tmp_path):
+    store = open_store(f"sqlite:///{tmp_path / 'mlflow.db'}", str(tmp_path))
+    with store.engine.connect() as connection:
+        names = {
+            row[0]
+            for row in connection.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+    assert {"idx_params_key_value", "idx_tags_key_value"} <= names
+
+
+def test_migrate(tmp_path):
+    mlruns = tmp_path / "mlruns"
+    source = MlflowClient(tracking_uri=mlruns.as_uri())
+    experiment_id = source.create_experiment("qfm")
+    run = source.create_run(experiment_id, tags={"pipeline_name": "training"})
+    source.log_param(run.info.run_id, "model.n_qubits", 3)
+    for step in range(3):
+        source.log_metric(run.info.run_id, "mse", 1.0 / (step + 1), step=step)
+    source.set_terminated(run.info.run_id)
+    deleted = source.create_run(experiment_id)
+    source.delete_run(deleted.info.run_id)
+
+    uri = f"sqlite:///{tmp_path / 'mlflow.db'}"
+    assert migrate(str(mlruns), uri) == 2
+    # already imported runs are skipped
+    assert migrate(str(mlruns), uri) == 0
+
+    target = MlflowClient(tracking_uri=uri)
+    runs = target.search_runs(
+        [experiment_id],
+        filter_string="params.`model.n_qubits` = '3' "
+        "and tags.pipeline_name = 'training'",
+    )
+    assert [r.info.run_id for r in runs] == [run.info.run_id]
+    assert runs[0].info.status == "FINISHED"
+    assert runs[0].info.artifact_uri == run.info.artifact_uri
+    history = target.get_metric_history(run.info.run_id, "mse")
+    assert [m.step for m in history] == [0, 1, 2]
+    assert target.get_run(deleted.info.run_id).info.lifecycle_stage == "deleted"
@@ -0,0 +1,111 @@
+import mlflow
+import numpy as np
+import pytest
+
+from effects_of_noise_in_qfm.helpers.model import ModelSpec
+from effects_of_noise_in_qfm.helpers.sweep import NoiseSweep
+from effects_of_noise_in_qfm.pipelines.data_science.analysis import nodes as analysis
+from effects_of_noise_in_qfm.pipelines.data_science.coefficients import (
+    nodes as coefficients,
+)
+
+NOISE_PARAMS = {
+    "GateError": 0.1,
+    "BitFlip": 0.0,
+    "PhaseFlip": 0.0,
+    "AmplitudeDamping": 0.0,
+    "PhaseDamping": 0.0,
+    "Depolarizing": 0.0,
+    "MultiQubitDepolarizing": 0.0,
+    "StatePreparation": 0.0,
+    "Measurement": 0.0,
+    "ThermalRelaxation": 0.0,
+}
+
+
+class FullNoise(NoiseSweep):
+    """
+    Evaluates the full noise level only. Both pipelines draw new parameters
+    for each further level, so only their first level is comparable.
+    """
+
+    def __iter__(self):
+        self.levels.append(1.0)
+        yield 1.0
+
+
+def _spec():
+    return ModelSpec(
+        n_qubits=2,
+        n_layers=1,
+        circuit_type="Circuit_15",
+        data_reupload=True,
+        initialization="random",
+        initialization_domain=[0, 6.283185307179586],
+        encoding=["RY"],
+        shots=None,
+        output_qubit=-1,
+        seed=1000,
+        mp_threshold=-1,
+    )
+
+
+def test_gate_error_coefficients(tmp_path, monkeypatch):
+    monkeypatch.setattr(analysis, "NoiseSweep", FullNoise)
+    monkeypatch.setattr(coefficients, "NoiseSweep", FullNoise)
+
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    with mlflow.start_run():
+        expected = coefficients.iterate_noise(
+            model=_spec(),
+            noise_params=NOISE_PARAMS,
+            noise_steps=1,
+            n_samples=16,
+            seed=1000,
+            zero_coefficient=True,
+        )["coefficients_noise"]
+        result = analysis.iterate_noise(
+            model=_spec(),
+            noise_params=NOISE_PARAMS,
+            noise_steps=1,
+            seed=1000,
+            coefficients_n_samples=16,
+            coefficients_scale=False,
+            zero_coefficient=True,
+            oversampling=1,
+            expressibility_n_samples=1,
+            n_bins=5,
+            entanglement_n_samples=4,
+            entanglement_scale=False,
+            measure="MW",
+        )["coefficients_noise"]
+
+    for column in ["coeffs_full_real", "coeffs_full_imag"]:
+        np.testing.assert_allclose(
+            np.asarray(result[column].iloc[0], dtype=float),
+            np.asarray(expected[column].iloc[0], dtype=float),
+            atol=1e-10,
+        )
+
+
+def test_unsupported_measure_fails_early(monkeypatch):
+    def simulate(*args, **kwargs):
+        raise AssertionError("no model should be simulated")
+
+    monkeypatch.setattr(analysis, "as_model", simulate)
+    with pytest.raises(ValueError, match="entanglement.measure 'MW' and 'EF'"):
+        analysis.iterate_noise(
+            model=_spec(),
+            noise_params=NOISE_PARAMS,
+            noise_steps=1,
+            seed=1000,
+            coefficients_n_samples=16,
+            coefficients_scale=False,
+            zero_coefficient=True,
+            oversampling=1,
+            expressibility_n_samples=1,
+            n_bins=5,
+            entanglement_n_samples=4,
+            entanglement_scale=False,
+            measure="RE",
+        )
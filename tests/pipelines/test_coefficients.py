@@ -0,0 +1,78 @@
+import mlflow
+import numpy as np
+
+from effects_of_noise_in_qfm.helpers.model import ModelSpec
+from effects_of_noise_in_qfm.pipelines.data_science.coefficients import nodes
+
+# the shards draw their own gate errors, see iterate_noise_shard
+NOISE_PARAMS = {
+    "GateError": 0.0,
+    "BitFlip": 0.0,
+    "PhaseFlip": 0.0,
+    "AmplitudeDamping": 0.0,
+    "PhaseDamping": 0.0,
+    "Depolarizing": 0.1,
+    "MultiQubitDepolarizing": 0.0,
+    "StatePreparation": 0.0,
+    "Measurement": 0.0,
+    "ThermalRelaxation": 0.0,
+}
+
+
+def _spec():
+    return ModelSpec(
+        n_qubits=2,
+        n_layers=1,
+        circuit_type="Circuit_15",
+        data_reupload=True,
+        initialization="random",
+        initialization_domain=[0, 6.283185307179586],
+        encoding=["RY"],
+        shots=None,
+        output_qubit=-1,
+        seed=1000,
+        mp_threshold=-1,
+    )
+
+
+def test_shards_reproduce_unsharded_run(tmp_path):
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    with mlflow.start_run():
+        expected = nodes.iterate_noise(
+            model=_spec(),
+            noise_params=NOISE_PARAMS,
+            noise_steps=1,
+            n_samples=4,
+            seed=1000,
+            zero_coefficient=True,
+        )["coefficients_noise"]
+        partials = [
+            nodes.iterate_noise_shard(
+                model=_spec(),
+                noise_params=NOISE_PARAMS,
+                noise_steps=1,
+                n_samples=4,
+                seed=1000,
+                shard=f"{i}/2",
+                group="test",
+            )["coefficients_partial"]
+            for i in range(2)
+        ]
+
+    for step in range(2):
+        # samples last, all frequencies
+        coeffs = np.concatenate(
+            [p["levels"][step]["coefficients"] for p in partials], axis=-1
+        )
+        # positive half with the zero frequency of the 1D spectrum
+        coeffs = coeffs[coeffs.shape[0] // 2 :]
+        np.testing.assert_allclose(
+            coeffs.real,
+            np.asarray(expected["coeffs_full_real"].iloc[step], dtype=float),
+            atol=1e-10,
+        )
+        np.testing.assert_allclose(
+            coeffs.imag,
+            np.asarray(expected["coeffs_full_imag"].iloc[step], dtype=float),
+            atol=1e-10,
+        )
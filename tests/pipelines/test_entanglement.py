@@ -0,0 +1,37 @@
+import numpy as np
+
+from effects_of_noise_in_qfm.helpers.model import ModelSpec
+from effects_of_noise_in_qfm.pipelines.data_science.entanglement.nodes import (
+    calculate_entanglement,
+)
+
+
+def test_meyer_wallach_backends_agree():
+    spec = ModelSpec(
+        n_qubits=3,
+        n_layers=1,
+        circuit_type="Circuit_15",
+        data_reupload=True,
+        initialization="random",
+        initialization_domain=[0, 6.283185307179586],
+        encoding=["RY"],
+        shots=None,
+        output_qubit=-1,
+        seed=1000,
+        mp_threshold=-1,
+    )
+
+    results = [
+        calculate_entanglement(
+            model=spec,
+            samples=20,
+            sigmas=1,
+            scale=False,
+            seed=1000,
+            noise_params=None,
+            measure="MW",
+            backend=backend,
+        )
+        for backend in ["qml_essentials", "batched"]
+    ]
+    assert np.isclose(results[0], results[1])
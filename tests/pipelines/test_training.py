@@ -0,0 +1,54 @@
+import mlflow
+import numpy as np
+import pennylane.numpy as pnp
+
+from effects_of_noise_in_qfm.helpers.model import ModelSpec
+from effects_of_noise_in_qfm.pipelines.data_science.training.nodes import train_model
+
+NOISE_PARAMS = {
+    "GateError": 0.0,
+    "BitFlip": 0.0,
+    "PhaseFlip": 0.0,
+    "AmplitudeDamping": 0.0,
+    "PhaseDamping": 0.0,
+    "Depolarizing": 0.0,
+    "MultiQubitDepolarizing": 0.0,
+    "StatePreparation": 0.0,
+}
+
+
+def test_train_with_shots(tmp_path):
+    spec = ModelSpec(
+        n_qubits=2,
+        n_layers=1,
+        circuit_type="Circuit_15",
+        data_reupload=True,
+        initialization="random",
+        initialization_domain=[0, 6.283185307179586],
+        encoding=["RY"],
+        shots=100,
+        output_qubit=-1,
+        seed=1000,
+        mp_threshold=-1,
+    )
+    # trainable (broadcasted) inputs are not supported by the parameter-shift rule
+    x = pnp.linspace(-np.pi, np.pi, 5, requires_grad=True)
+
+    mlflow.set_tracking_uri(f"file:{tmp_path / 'mlruns'}")
+    with mlflow.start_run():
+        res = train_model(
+            model=spec,
+            domain_samples=x,
+            fourier_series=np.sin(x),
+            fourier_coefficients=np.zeros(5),
+            noise_params=NOISE_PARAMS,
+            steps=1,
+            learning_rate=0.01,
+            convergence_threshold=-1,
+            convergence_gradient=-1,
+            convergence_steps=5,
+        )
+
+    assert res["metrics"]["shots"].iloc[0] == 100
+    grads = res["grads"]["param"].to_numpy(dtype=float)
+    assert np.all(np.isfinite(grads)) and np.any(grads != 0)
@@ -0,0 +1,74 @@
+"""
+Smoke test of ``kedro run --runner ParallelRunner``: all datasets of a
+pipeline have to be picklable to be sent to the worker processes.
+"""
+
+import os
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from mlflow.tracking import MlflowClient
+
+PROJECT = Path(__file__).parents[1]
+
+
+@pytest.mark.parametrize(
+    "pipeline, params, artifact",
+    [
+        (
+            "coefficients",
+            "model.noise_steps=1,coefficients.n_samples=2",
+            "coefficients_noise.csv",
+        ),
+        # the training data are loaded as shared memory maps by the workers
+        (
+            "training",
+            "model.n_qubits=2,data.omegas=2,model.noise_steps=1,training.steps=2",
+            "trained_metrics.csv",
+        ),
+    ],
+)
+def test_parallel_run(tmp_path, pipeline, params, artifact):
+    # run in a copy of the project, such that no outputs end up in the checkout
+    shutil.copy(PROJECT / "pyproject.toml", tmp_path)
+    shutil.copytree(PROJECT / "conf", tmp_path / "conf")
+    # the package itself is imported from the checkout, see PYTHONPATH
+    (tmp_path / "src").mkdir()
+    # mlflow.set_tracking_uri of other tests is exported to the environment
+    env = {k: v for k, v in os.environ.items() if not k.startswith("MLFLOW_")}
+    env = {
+        **env,
+        "PYTHONPATH": str(PROJECT / "src"),
+        "QFM_BATCH_MODE": "1",
+    }
+
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "kedro",
+            "run",
+            "--runner",
+            "ParallelRunner",
+            "--pipeline",
+            pipeline,
+            "--params",
+            params,
+        ],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    client = MlflowClient(f"file:{tmp_path / 'mlruns'}")
+    (experiment,) = [e for e in client.search_experiments() if e.name != "Default"]
+    (run,) = client.search_runs([experiment.experiment_id])
+    artifacts = [a.path for a in client.list_artifacts(run.info.run_id)]
+    # saved by the worker processes into the run of the session
+    assert artifact in artifacts
+    assert any(m.endswith(".calls_total") for m in run.data.metrics)
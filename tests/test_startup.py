@@ -0,0 +1,101 @@
+"""
+Startup benchmarks for ``kedro run``. Every sweep launches thousands of short
+runs, so registering the pipelines must not import the simulation stack of
+pipelines that are not executed.
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "pennylane",
+    "qml_essentials",
+    "mlflow",
+    "plotly",
+    "rich.progress",
+    "kedro_viz",
+]
+
+
+def run_python(code, env=None):
+    """
+    Runs code in a fresh interpreter (such that no module is cached) and
+    returns the json object printed in the last line of its output.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, **(env or {})},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+class TestStartup:
+    def test_registry_defers_heavy_imports(self):
+        loaded = run_python(
+            "import sys, json\n"
+            "from effects_of_noise_in_qfm.pipeline_registry import register_pipelines\n"
+            "pipelines = register_pipelines()\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES} if m in sys.modules]))"
+        )
+        assert loaded == []
+
+    def test_pipeline_only_imports_its_nodes(self):
+        loaded = run_python(
+            "import sys, json\n"
+            "from effects_of_noise_in_qfm.pipeline_registry import register_pipelines\n"
+            "register_pipelines()['expressibility']\n"
+            "print(json.dumps(sorted(m for m in sys.modules"
+            " if m.startswith('effects_of_noise_in_qfm.pipelines')"
+            " and m.endswith('nodes'))))"
+        )
+        assert loaded == [
+            "effects_of_noise_in_qfm.pipelines.data_generation.nodes",
+            "effects_of_noise_in_qfm.pipelines.data_science.expressibility.nodes",
+            "effects_of_noise_in_qfm.pipelines.visualization.nodes",
+        ]
+
+    def test_settings_defer_heavy_imports(self):
+        loaded = run_python(
+            "import sys, json\n"
+            "import effects_of_noise_in_qfm.settings\n"
+            f"print(json.dumps([m for m in {HEAVY_MODULES} if m in sys.modules]))",
+            env={"QFM_BATCH_MODE": "1"},
+        )
+        assert loaded == []
+
+    def test_batch_mode_skips_session_store(self):
+        loaded = run_python(
+            "import sys, json\n"
+            "import effects_of_noise_in_qfm.settings as s\n"
+            "print(json.dumps(['kedro_viz' in sys.modules,"
+            " hasattr(s, 'SESSION_STORE_CLASS')]))",
+            env={"QFM_BATCH_MODE": "1"},
+        )
+        assert loaded == [False, False]
+
+    def test_registry_import_time(self):
+        """
+        Registering the pipelines must take considerably less time than
+        importing the simulation stack, which is what an eager registry costs.
+        """
+        timing = (
+            "import time, json\n"
+            "t = time.perf_counter()\n"
+            "{}\n"
+            "print(json.dumps(time.perf_counter() - t))"
+        )
+        registry = run_python(
+            timing.format(
+                "from effects_of_noise_in_qfm.pipeline_registry import "
+                "register_pipelines; register_pipelines()"
+            )
+        )
+        stack = run_python(
+            timing.format("import kedro.pipeline, qml_essentials.model, mlflow")
+        )
+        assert registry < 0.5 * stack